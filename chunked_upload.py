@@ -0,0 +1,225 @@
+'''
+chunked_upload
+==============
+
+chunked, resumable uploads to Shotgrid cloud storage with progress reporting
+
+Shotgun.upload sends the whole file in one go and can't tell us how far along it is,
+this module drives the same multipart cloud storage upload the api uses internally
+one chunk at a time so we can report progress, retry a failed chunk and pick an
+interrupted upload back up from the last confirmed chunk
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import hashlib
+import json
+from logging import getLogger
+import mimetypes
+import os
+from tempfile import gettempdir
+import time
+import urllib.parse
+from shot_grid_sub_2_dailies.tracing import TRACER
+
+
+class UploadInterruptedError(RuntimeError):
+    '''
+    raised when a chunk keeps failing after all the retries, the progress is kept on
+    disk so calling upload again with the same arguments resumes the transfer
+    '''
+
+    def __init__(self, msg, path=None, entity_type=None, entity_id=None):
+        super(UploadInterruptedError, self).__init__(msg)
+        self.path = path
+        self.entity_type = entity_type
+        self.entity_id = entity_id
+
+
+class ChunkedUploader(object):
+    '''
+    upload a file to an entity field in chunks
+
+    :param Shotgun sg: client used for the upload, it must not be used by other threads meanwhile
+    :param int chunk_size: bytes per chunk, cloud storage needs at least 5MB for all but the last one
+    :param int retries: how many times a chunk is retried before giving up
+    :param float backoff: seconds to wait before the first retry, doubled on every attempt
+    :param str state_dir: folder where the progress of unfinished uploads is kept
+    :param Tracer tracer: span recorder, defaults to the shared tracing.TRACER
+    '''
+    min_chunk_size = 5 * 1024 * 1024
+
+    def __init__(self, sg, chunk_size=20 * 1024 * 1024, retries=5, backoff=1.0, state_dir=None, tracer=None):
+        self.chunk_size = max(chunk_size, self.min_chunk_size)
+        self.retries = retries
+        self.backoff = backoff
+        self.state_dir = state_dir or os.path.join(gettempdir(), 'sub2d_uploads')
+        self.tracer = tracer or TRACER
+
+        self._sg = sg
+        self.log = getLogger('Sub2D_Upload')
+
+    def _supports_chunks(self, entity_type, field_name):
+        # NOTE: sites on local storage only take the single request upload
+        return self._sg._requires_direct_s3_upload(entity_type, field_name)
+
+    def _state_path(self, entity_type, entity_id, path, field_name):
+        key = '%s|%s|%s|%s' % (entity_type, entity_id, os.path.abspath(path), field_name)
+        return os.path.join(self.state_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _load_state(self, state_path, path):
+        if not os.path.isfile(state_path):
+            return None
+
+        try:
+            with open(state_path, 'r') as strm:
+                state = json.loads(strm.read())
+        except ValueError:
+            return None
+
+        stat = os.stat(path)
+        # NOTE: the file changed since the interrupted upload so we have to start over
+        if (state['size'], state['mtime'], state['chunk_size']) != (stat.st_size, stat.st_mtime, self.chunk_size):
+            return None
+
+        return state
+
+    def _save_state(self, state_path, state):
+        if not os.path.isdir(self.state_dir):
+            os.makedirs(self.state_dir)
+
+        temp_path = state_path + '.tmp'
+        with open(temp_path, 'w') as strm:
+            strm.write(json.dumps(state))
+        os.replace(temp_path, state_path)
+
+    @staticmethod
+    def _report(qt_pg, sent, total):
+        # NOTE: progress bars are int32 so we report KiB to fit multi GB files
+        if qt_pg:
+            qt_pg.setMaximum(max(total // 1024, 1))
+            qt_pg.setValue(sent // 1024)
+
+    def _with_retries(self, label, func, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return func(*args)
+            except Exception as msg:
+                if attempt == self.retries:
+                    raise
+
+                delay = self.backoff * (2 ** attempt)
+                self.log.warning('%s failed (%s), retrying in %.1fs' % (label, msg, delay))
+                time.sleep(delay)
+
+    def upload(self, entity_type, entity_id, path, field_name='sg_uploaded_movie', display_name=None, qt_pg=None):
+        '''
+        upload the file, resuming a previous interrupted upload of the same file if there is one
+
+        :param str entity_type:
+        :param int entity_id:
+        :param str path: file to upload
+        :param str field_name: field the file gets attached to
+        :param str display_name: name shown in Shotgrid, defaults to the file name
+        :param QtWidgets.QProgressBar qt_pg: receives the KiB sent so far
+        :return: id of the Attachment
+        '''
+        total = os.path.getsize(path)
+        self._report(qt_pg, 0, total)
+
+        if total <= self.chunk_size or not self._supports_chunks(entity_type, field_name):
+            attachment_id = self._sg.upload(entity_type, entity_id, path, field_name, display_name)
+            self._report(qt_pg, total, total)
+            return attachment_id
+
+        filename = os.path.basename(path)
+        state_path = self._state_path(entity_type, entity_id, path, field_name)
+        state = self._load_state(state_path, path)
+
+        if state:
+            self.log.info('resuming upload of %s from chunk %d' % (path, len(state['etags']) + 1))
+        else:
+            stat = os.stat(path)
+            upload_info = self._with_retries('upload request',
+                                             self._sg._get_attachment_upload_info,
+                                             False, filename, True)
+            state = {'size': stat.st_size,
+                     'mtime': stat.st_mtime,
+                     'chunk_size': self.chunk_size,
+                     'upload_info': upload_info,
+                     'etags': []}
+            self._save_state(state_path, state)
+
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        try:
+            self._upload_chunks(path, filename, content_type, state, state_path, qt_pg)
+            self._with_retries('upload completion',
+                               self._sg._complete_multipart_upload,
+                               state['upload_info'], filename, state['etags'])
+        except Exception as msg:
+            raise UploadInterruptedError('upload of %s was interrupted: %s' % (path, msg),
+                                         path=path,
+                                         entity_type=entity_type,
+                                         entity_id=entity_id)
+
+        attachment_id = self._link_upload(entity_type, entity_id, state['upload_info'], field_name, display_name or filename)
+
+        os.unlink(state_path)
+        return attachment_id
+
+    def _upload_chunks(self, path, filename, content_type, state, state_path, qt_pg):
+        upload_info = state['upload_info']
+        total = state['size']
+
+        with open(path, 'rb') as strm:
+            # NOTE: skip what the server already confirmed
+            strm.seek(len(state['etags']) * self.chunk_size)
+
+            while True:
+                data = strm.read(self.chunk_size)
+                if not data:
+                    return
+
+                part_number = len(state['etags']) + 1
+
+                def send_chunk():
+                    part_url = self._sg._get_upload_part_link(upload_info, filename, part_number)
+                    return self._sg._upload_data_to_storage(data, content_type, len(data), part_url)
+
+                with self.tracer.span('upload.chunk', part=part_number, bytes=len(data)):
+                    etag = self._with_retries('chunk %d' % part_number, send_chunk)
+
+                state['etags'].append(etag)
+                self._save_state(state_path, state)
+
+                self._report(qt_pg, min(len(state['etags']) * self.chunk_size, total), total)
+
+    def _link_upload(self, entity_type, entity_id, upload_info, field_name, display_name):
+        '''
+        last step of the upload, creates the Attachment pointing to what we sent to storage
+        '''
+        url = urllib.parse.urlunparse((self._sg.config.scheme,
+                                       self._sg.config.server,
+                                       '/upload/api_link_file',
+                                       None, None, None))
+
+        params = {'entity_type': entity_type,
+                  'entity_id': entity_id,
+                  'upload_link_info': upload_info['upload_info'],
+                  'display_name': display_name}
+
+        if field_name is not None:
+            params['field_name'] = field_name
+
+        params.update(self._sg._auth_params())
+
+        # NOTE: not retried, linking twice would leave two attachments behind
+        result = self._sg._send_form(url, params)
+        if not result.startswith('1'):
+            # NOTE: shotgun_api3 is only imported once a client exists, see sub2d_api
+            from shotgun_api3.shotgun import ShotgunError
+            raise ShotgunError('Could not link uploaded file %s: %s' % (display_name, result))
+
+        return int(result.split(':', 2)[1].split('\n', 1)[0])
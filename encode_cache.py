@@ -0,0 +1,232 @@
+'''
+encode_cache
+============
+
+content addressed on disk cache of encoded review movies, the key is a fingerprint of
+the input frames plus every encode setting so resubmitting the same frames (to another
+task or after a failed upload) reuses the movie instead of running ffmpeg again
+
+each entry is a folder holding the movie, the folder mtime is bumped on every hit and
+the least recently used entries are removed once the cache grows past max_bytes, jobs
+get their own hard link (or copy) of the movie so an eviction never pulls it from under
+an encode or upload that is still running
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import hashlib
+import json
+from logging import getLogger
+import os
+import shutil
+from tempfile import gettempdir, mkdtemp
+from threading import Lock
+
+
+class EncodeCache(object):
+    '''
+    size capped LRU cache of encoded movies
+
+    :param str root: folder holding the cache, defaults to sub2d_encode_cache in the temp folder
+    :param int max_bytes: the oldest movies are evicted once the cache is bigger than this
+    :param bool content_hash: also hash the content of the frames, slower but survives
+                              tools that rewrite frames keeping their size and mtime
+    '''
+    movie_name = 'review.mov'
+
+    def __init__(self, root=None, max_bytes=20 * 1024 ** 3, content_hash=False):
+        self.root = root or os.path.join(gettempdir(), 'sub2d_encode_cache')
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self.log = getLogger('Sub2D_EncodeCache')
+
+    def fingerprint(self, frame_paths, params):
+        '''
+        returns the cache key for the given frames and encode settings, the frames are
+        identified by their path, size and mtime and optionally by their content
+
+        :param [str] frame_paths: frames in encode order
+        :param dict params: every setting that changes the output ie profile, frame rate, lut
+        '''
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+
+        for path in frame_paths:
+            stat = os.stat(path)
+            digest.update(('%s|%d|%d\n' % (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)).encode('utf-8'))
+
+            if self.content_hash:
+                digest.update(self._hash_file(path))
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_file(path):
+        digest = hashlib.sha1()
+        with open(path, 'rb') as strm:
+            for block in iter(lambda: strm.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.digest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key, target=None):
+        '''
+        returns the cached movie for the key or None
+
+        :param str key: see fingerprint
+        :param str target: link (or copy) the movie to this path and return it instead, the
+                           extras are placed next to it, the link outlives an eviction of the entry
+        '''
+        entry = self._entry_dir(key)
+        movie = os.path.join(entry, self.movie_name)
+
+        with self._lock:
+            if not os.path.isfile(movie):
+                self._misses += 1
+                return None
+
+            if target:
+                try:
+                    self._link_entry(entry, target)
+                except OSError:
+                    # NOTE: another process evicted the entry in the meantime
+                    self._misses += 1
+                    return None
+                movie = target
+
+            self._hits += 1
+
+        # NOTE: the folder is touched instead of the movie so resumable uploads still see the same file
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+
+        return movie
+
+    def put(self, key, movie_path, move=False, extras=()):
+        '''
+        add a movie to the cache and returns its cached path
+
+        :param str key: see fingerprint
+        :param str movie_path: encoded movie
+        :param bool move: move the movie into the cache instead of linking or copying it
+        :param [str] extras: files rendered with the movie (thumbnail, filmstrip), they are stored
+                             next to the cached movie under the same file name
+        '''
+        entry = self._entry_dir(key)
+        movie = os.path.join(entry, self.movie_name)
+
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+
+        # NOTE: build the entry next to its final place and rename it so readers never see half a movie
+        temp_dir = mkdtemp(prefix='.tmp_', dir=self.root)
+        try:
+            self._add_file(movie_path, os.path.join(temp_dir, self.movie_name), move)
+            for extra in extras:
+                if os.path.isfile(extra):
+                    self._add_file(extra, os.path.join(temp_dir, os.path.basename(extra)), move)
+
+            try:
+                os.rename(temp_dir, entry)
+            except OSError:
+                # NOTE: another process cached the same movie first
+                if not os.path.isfile(movie):
+                    raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.evict(keep=key)
+        return movie
+
+    def _link_entry(self, entry, target):
+        root = os.path.dirname(target)
+        for name in os.listdir(entry):
+            path = os.path.join(root, os.path.basename(target) if name == self.movie_name else name)
+            if os.path.isfile(path):
+                os.unlink(path)
+
+            self._add_file(os.path.join(entry, name), path, False)
+
+    @staticmethod
+    def _add_file(source, target, move):
+        if move:
+            shutil.move(source, target)
+            return
+
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    def contains(self, path):
+        '''
+        returns True when the path is a movie owned by the cache, those must not be deleted by the caller
+
+        :param str path:
+        '''
+        root = os.path.normcase(os.path.abspath(self.root))
+        return os.path.normcase(os.path.abspath(path)).startswith(root + os.sep)
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+
+        with os.scandir(self.root) as items:
+            for item in items:
+                if item.name.startswith('.') or not item.is_dir():
+                    continue
+
+                movie = os.path.join(item.path, self.movie_name)
+                try:
+                    size = os.path.getsize(movie)
+                except OSError:
+                    size = 0
+
+                entries.append((item.stat().st_mtime, size, item.path))
+
+        return entries
+
+    def evict(self, keep=None):
+        '''
+        remove the least recently used movies until the cache fits in max_bytes
+
+        :param str keep: key that must survive, ie the movie that was just added
+        '''
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+
+                if keep and os.path.basename(path) == keep:
+                    continue
+
+                self.log.info('evicting %s from the encode cache' % path)
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def stats(self):
+        '''
+        returns the hits, misses, number of movies and bytes used
+        '''
+        entries = self._entries()
+        with self._lock:
+            return {'hits': self._hits,
+                    'misses': self._misses,
+                    'entries': len(entries),
+                    'bytes': sum(size for _, size, _ in entries)}
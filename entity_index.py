@@ -0,0 +1,131 @@
+'''
+entity_index
+============
+
+in memory search index over the labels of a list of entities (Project names, Shot codes,
+Task names ...) used by the pickers to filter as the user types, prefix matches come from
+a sorted copy of the labels with bisect and substring matches from a single str.find pass
+over all the labels joined together so a search over 50k shots stays interactive
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from bisect import bisect_left, bisect_right
+
+
+class EntityIndex(object):
+    '''
+    case insensitive prefix and substring search over entity labels, rows are the
+    positions of the entities in the list given to the index
+
+    :param [dict] entities: entities in display order
+    :param str label_key: field that is shown and searched ie "code"
+    '''
+
+    def __init__(self, entities=(), label_key='code'):
+        self.label_key = label_key
+        self.entities = list(entities)
+        self.labels = [self._label(entity, label_key) for entity in self.entities]
+
+        folded = [label.lower() for label in self.labels]
+        order = sorted(range(len(folded)), key=folded.__getitem__)
+        self._sorted_labels = [folded[row] for row in order]
+        self._sorted_rows = order
+
+        # NOTE: labels can't hold new lines so a match never spans two of them
+        self._haystack = '\n'.join(folded)
+        self._offsets = []
+        offset = 0
+        for label in folded:
+            self._offsets.append(offset)
+            offset += len(label) + 1
+
+        self._rows_by_id = {}
+        for row, entity in enumerate(self.entities):
+            self._rows_by_id.setdefault(entity.get('id'), row)
+
+    def __len__(self):
+        return len(self.entities)
+
+    @staticmethod
+    def _label(entity, label_key):
+        label = entity.get(label_key)
+        if label is None:
+            return ''
+
+        return str(label).replace('\n', ' ')
+
+    def label(self, row):
+        return self.labels[row]
+
+    def row_of(self, entity_id):
+        '''
+        returns the row of the entity with the given id or None
+        '''
+        return self._rows_by_id.get(entity_id)
+
+    def prefix(self, text):
+        '''
+        returns the rows whose label starts with text, in display order
+
+        :param str text:
+        '''
+        text = text.lower()
+        start = bisect_left(self._sorted_labels, text)
+        # NOTE: every label starting with text sorts before text followed by the highest code point
+        end = bisect_left(self._sorted_labels, text + '\U0010ffff', start)
+        return sorted(self._sorted_rows[start:end])
+
+    def substring(self, text, limit=None):
+        '''
+        returns the rows whose label contains text, in display order
+
+        :param str text:
+        :param int limit: stop after this many rows
+        '''
+        text = text.lower().replace('\n', ' ')
+        rows = []
+        if not text:
+            return rows
+
+        find = self._haystack.find
+        position = find(text)
+        while position != -1:
+            row = bisect_right(self._offsets, position) - 1
+            rows.append(row)
+            if limit is not None and len(rows) >= limit:
+                break
+
+            # NOTE: jump to the next label so a label matching twice is only listed once
+            if row + 1 >= len(self._offsets):
+                break
+            position = find(text, self._offsets[row + 1])
+
+        return rows
+
+    def search(self, text, limit=None):
+        '''
+        returns the rows matching text, the labels starting with it first and then the ones
+        containing it, an empty text returns every row
+
+        :param str text:
+        :param int limit: maximum number of rows returned
+        '''
+        text = text.strip()
+        if not text:
+            rows = list(range(len(self.entities)))
+            return rows[:limit] if limit is not None else rows
+
+        rows = self.prefix(text)
+        if limit is not None and len(rows) >= limit:
+            return rows[:limit]
+
+        starts = set(rows)
+        for row in self.substring(text):
+            if row not in starts:
+                rows.append(row)
+                if limit is not None and len(rows) >= limit:
+                    break
+
+        return rows
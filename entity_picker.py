@@ -0,0 +1,197 @@
+'''
+entity_picker
+=============
+
+model/view pickers for the project, sequence, shot and task combo boxes, the rows are
+handed to the view in batches (canFetchMore/fetchMore) so a show with thousands of shots
+doesn't build thousands of items up front, and typing in the combo box filters the
+entities through an EntityIndex shown in a completer popup
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from shot_grid_sub_2_dailies.entity_index import EntityIndex
+
+from PySide2 import QtCore, QtWidgets
+
+
+class EntityListModel(QtCore.QAbstractListModel):
+    '''
+    list model over an EntityIndex, optionally filtered, rows are fetched lazily
+
+    :param int batch_size: rows handed to the view on each fetchMore
+    '''
+    EntityRole = QtCore.Qt.UserRole + 1
+
+    def __init__(self, batch_size=200, parent=None):
+        super(EntityListModel, self).__init__(parent)
+        self.batch_size = batch_size
+
+        self._index = EntityIndex()
+        self._filter = ''
+        self._rows = []
+        self._fetched = 0
+
+    def set_index(self, entity_index):
+        '''
+        show the entities of another EntityIndex, the filter is kept
+
+        :param EntityIndex entity_index:
+        '''
+        self.beginResetModel()
+        self._index = entity_index
+        self._apply_filter()
+        self.endResetModel()
+
+    def set_filter(self, text):
+        '''
+        only show the entities matching text, see EntityIndex.search
+        '''
+        if text == self._filter:
+            return
+
+        self.beginResetModel()
+        self._filter = text
+        self._apply_filter()
+        self.endResetModel()
+
+    def _apply_filter(self):
+        self._rows = self._index.search(self._filter)
+        self._fetched = min(len(self._rows), self.batch_size)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return self._fetched
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._fetched:
+            return None
+
+        row = self._rows[index.row()]
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self._index.label(row)
+
+        if role == self.EntityRole:
+            return self._index.entities[row]
+
+        return None
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return False
+
+        return self._fetched < len(self._rows)
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return
+
+        count = min(self.batch_size, len(self._rows) - self._fetched)
+        if count <= 0:
+            return
+
+        self.beginInsertRows(QtCore.QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def ensure_fetched(self, row):
+        '''
+        fetch the batches up to the given row so it can be selected
+        '''
+        while row >= self._fetched and self.canFetchMore():
+            self.fetchMore()
+
+    def index_row(self, row):
+        '''
+        returns the EntityIndex row shown at the given model row
+        '''
+        return self._rows[row]
+
+    def label(self, row):
+        if row < 0 or row >= len(self._rows):
+            return ''
+
+        return self._index.label(self._rows[row])
+
+
+class EntityPicker(QtCore.QObject):
+    '''
+    turns a QComboBox into a searchable entity picker, the combo box keeps listing all
+    the entities in their order so its currentIndex is still the position of the entity
+    in the list given to set_entities, typing shows the matches in a completer popup
+
+    :param QtWidgets.QComboBox combo:
+    :param str label_key: entity field shown and searched
+    '''
+
+    def __init__(self, combo, label_key='code', parent=None):
+        super(EntityPicker, self).__init__(parent or combo)
+        self.label_key = label_key
+
+        self._combo = combo
+        self.model = EntityListModel(parent=combo)
+        self._matches = EntityListModel(parent=combo)
+
+        # NOTE: setModel first, QComboBox hands its own model to any completer it already has
+        combo.setModel(self.model)
+        combo.setEditable(True)
+        combo.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+
+        self._completer = QtWidgets.QCompleter(self._matches, combo)
+        # NOTE: the filtering is done by the EntityIndex, the completer only shows the popup
+        self._completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        self._completer.setCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        combo.setCompleter(self._completer)
+
+        combo.lineEdit().textEdited.connect(self._on_text_edited)
+        combo.lineEdit().editingFinished.connect(self._restore_text)
+        self._completer.activated[QtCore.QModelIndex].connect(self._on_match_activated)
+
+    def set_entities(self, entities, index=0):
+        '''
+        replace the entities without emitting currentIndexChanged
+
+        :param [dict] entities:
+        :param int index: row selected afterwards
+        '''
+        entity_index = EntityIndex(entities, self.label_key)
+
+        self._combo.blockSignals(True)
+        self.model.set_index(entity_index)
+        self._matches.set_index(entity_index)
+        self._matches.set_filter('')
+
+        if entities:
+            index = min(max(index, 0), len(entities) - 1)
+            self.model.ensure_fetched(index)
+            self._combo.setCurrentIndex(index)
+        else:
+            self._combo.setCurrentIndex(-1)
+            self._combo.setEditText('')
+        self._combo.blockSignals(False)
+
+    def set_placeholder(self, text):
+        '''
+        greyed out text shown while the picker is empty ie "Loading..."
+        '''
+        self._combo.lineEdit().setPlaceholderText(text)
+
+    def _on_text_edited(self, text):
+        self._matches.set_filter(text)
+        if text:
+            self._completer.complete()
+
+    def _on_match_activated(self, index):
+        # NOTE: the completion model maps 1:1 to our model in UnfilteredPopupCompletion mode
+        row = self._matches.index_row(index.row())
+        self.model.ensure_fetched(row)
+        self._combo.setCurrentIndex(row)
+        self._restore_text()
+
+    def _restore_text(self):
+        # NOTE: half typed text never sticks, the combo box always shows what is selected
+        self._combo.setEditText(self.model.label(self._combo.currentIndex()))
+        self._matches.set_filter('')
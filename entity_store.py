@@ -0,0 +1,175 @@
+'''
+entity_store
+============
+
+sqlite backed store that keeps the results of previous Shotgrid queries on disk
+so the tool can show them right away on launch and only ask the server for the
+rows that changed since the last sync
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import json
+import os
+import sqlite3
+from threading import RLock
+import time
+
+
+class EntityStore(object):
+    '''
+    on disk store of Shotgrid find results, each result set is stored under the
+    query key (see query_cache.make_query_key) that produced it
+
+    :param str db_path: path to the sqlite file, use ":memory:" for a throw away store
+    :param float full_sync_interval: seconds after which a full query is done again to drop
+                                     rows that were retired or no longer match the filters
+    :param float clock_skew: seconds subtracted from the last sync time to cover clock drift
+                             between this machine and the server
+    '''
+    entity_types = ('Project', 'Sequence', 'Shot', 'Task')
+
+    def __init__(self, db_path, full_sync_interval=86400.0, clock_skew=60.0):
+        self.db_path = db_path
+        self.full_sync_interval = full_sync_interval
+        self.clock_skew = clock_skew
+
+        if db_path != ':memory:':
+            rdir = os.path.dirname(db_path)
+            if rdir and not os.path.isdir(rdir):
+                os.makedirs(rdir)
+
+        self._lock = RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        with self._lock, self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS rows ('
+                               'scope TEXT NOT NULL, '
+                               'entity_type TEXT NOT NULL, '
+                               'id INTEGER NOT NULL, '
+                               'data TEXT NOT NULL, '
+                               'PRIMARY KEY (scope, id))')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS syncs ('
+                               'scope TEXT PRIMARY KEY, '
+                               'entity_type TEXT NOT NULL, '
+                               'synced_at REAL NOT NULL, '
+                               'full_synced_at REAL NOT NULL)')
+
+    @staticmethod
+    def _scope(key):
+        return '%s|%s' % key
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_sync(self, key):
+        '''
+        returns a dict with "synced_at" and "full_synced_at" or None if the query was never stored
+
+        :param tuple key: key built with make_query_key
+        '''
+        with self._lock:
+            row = self._conn.execute('SELECT synced_at, full_synced_at FROM syncs WHERE scope = ?',
+                                     (self._scope(key),)).fetchone()
+        if not row:
+            return None
+
+        return {'synced_at': row[0], 'full_synced_at': row[1]}
+
+    def needs_full_sync(self, key, now=None):
+        '''
+        returns True when the query was never stored or the last full sync is too old
+
+        :param tuple key: key built with make_query_key
+        :param float now:
+        '''
+        sync = self.get_sync(key)
+        if not sync:
+            return True
+
+        now = now or time.time()
+        return now - sync['full_synced_at'] > self.full_sync_interval
+
+    def since(self, key):
+        '''
+        returns the epoch time to use on the "updated_at greater_than" filter for the query
+
+        :param tuple key: key built with make_query_key
+        '''
+        sync = self.get_sync(key)
+        if not sync:
+            return None
+
+        return sync['synced_at'] - self.clock_skew
+
+    def rows(self, key, order=None):
+        '''
+        returns the stored rows for the query or None if the query was never stored
+
+        :param tuple key: key built with make_query_key
+        :param [dict] order: Shotgrid style order used to sort the stored rows
+        '''
+        scope = self._scope(key)
+        with self._lock:
+            synced = self._conn.execute('SELECT 1 FROM syncs WHERE scope = ?', (scope,)).fetchone()
+            if not synced:
+                return None
+
+            data = self._conn.execute('SELECT data FROM rows WHERE scope = ?', (scope,)).fetchall()
+
+        rows = [json.loads(item[0]) for item in data]
+
+        for sort in reversed(order or []):
+            field = sort['field_name']
+            rows.sort(key=lambda row: (row.get(field) is not None, str(row.get(field) or '').lower()),
+                      reverse=sort.get('direction') == 'desc')
+
+        return rows
+
+    def replace(self, key, rows, synced_at=None):
+        '''
+        stores the full result of a query dropping whatever was there before
+
+        :param tuple key: key built with make_query_key
+        :param list rows: find result
+        :param float synced_at: epoch time the query was run
+        '''
+        synced_at = synced_at or time.time()
+        scope = self._scope(key)
+
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM rows WHERE scope = ?', (scope,))
+            self._insert_rows(scope, key[0], rows)
+            self._conn.execute('INSERT OR REPLACE INTO syncs VALUES (?, ?, ?, ?)',
+                               (scope, key[0], synced_at, synced_at))
+
+    def upsert(self, key, rows, synced_at=None):
+        '''
+        merges the rows changed since the last sync into the stored result
+
+        :param tuple key: key built with make_query_key
+        :param list rows: find result of the incremental query
+        :param float synced_at: epoch time the query was run
+        '''
+        synced_at = synced_at or time.time()
+        scope = self._scope(key)
+
+        with self._lock, self._conn:
+            self._insert_rows(scope, key[0], rows)
+            self._conn.execute('UPDATE syncs SET synced_at = ? WHERE scope = ?', (synced_at, scope))
+
+    def _insert_rows(self, scope, entity_type, rows):
+        self._conn.executemany('INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?)',
+                               [(scope, entity_type, row['id'], json.dumps(row, default=str)) for row in rows])
+
+    def clear(self):
+        '''
+        drop everything stored
+        '''
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM rows')
+            self._conn.execute('DELETE FROM syncs')
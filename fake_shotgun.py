@@ -0,0 +1,247 @@
+'''
+fake_shotgun
+============
+
+in memory stand in for a ShotGrid site, enough of the shotgun_api3.Shotgun api for
+Sub2DAPI to browse, create Versions and upload without a network, the round trip
+latency and the upload bandwidth can be simulated so the benchmarks see realistic
+waits
+
+mockgun needs schema files pulled from a live site so this fake is used instead
+
+    site = FakeSite()
+    tasks = site.populate(shots=4)
+    api = Sub2DAPI(sg_factory=lambda: FakeShotgun(site, latency=0.05))
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import copy
+import datetime
+import os
+from threading import Lock
+import time
+
+
+class FakeSite(object):
+    '''
+    entities and uploads shared by all the FakeShotgun clients of a site
+    '''
+
+    def __init__(self):
+        self.entities = {}
+        self.uploads = []
+        self.lock = Lock()
+        self._next_id = 1
+
+    def add(self, entity_type, **data):
+        '''
+        store a new entity and returns it
+
+        :param str entity_type:
+        :param data: field values
+        '''
+        with self.lock:
+            entity = dict(data, type=entity_type, id=self._next_id)
+            entity.setdefault('updated_at', datetime.datetime.now())
+            self._next_id += 1
+            self.entities.setdefault(entity_type, {})[entity['id']] = entity
+            return copy.deepcopy(entity)
+
+    def populate(self, project='Bench', sequences=1, shots=4, tasks=('comp',)):
+        '''
+        create an active project with sequences, shots and tasks, returns the Tasks with
+        the fields Sub2DAPI needs to submit to them
+
+        :param str project: project name
+        :param int sequences:
+        :param int shots: shots per sequence
+        :param [str] tasks: task names created on every shot
+        '''
+        proj_ent = self.add('Project', name=project, code=project, sg_status='Active')
+        proj_ref = {'type': 'Project', 'id': proj_ent['id'], 'name': project}
+
+        out = []
+        for seq_index in range(sequences):
+            seq_code = 'SQ%03d' % ((seq_index + 1) * 10)
+            seq_ent = self.add('Sequence', code=seq_code, name=seq_code, project=proj_ref, sg_status_list='ip')
+            seq_ref = {'type': 'Sequence', 'id': seq_ent['id'], 'name': seq_code}
+
+            for shot_index in range(shots):
+                shot_code = '%s_SH%04d' % (seq_code, (shot_index + 1) * 10)
+                shot_ent = self.add('Shot',
+                                    code=shot_code,
+                                    name=shot_code,
+                                    project=proj_ref,
+                                    sg_sequence=seq_ref,
+                                    sg_status_list='ip')
+                shot_ref = {'type': 'Shot', 'id': shot_ent['id'], 'name': shot_code}
+
+                for task_name in tasks:
+                    out.append(self.add('Task',
+                                        content=task_name,
+                                        name=task_name,
+                                        code=task_name,
+                                        cached_display_name=task_name,
+                                        project=proj_ref,
+                                        entity=shot_ref))
+
+        return out
+
+
+def _same(value, expected):
+    if isinstance(expected, dict) and 'type' in expected and 'id' in expected:
+        return isinstance(value, dict) and (value.get('type'), value.get('id')) == (expected['type'], expected['id'])
+
+    return value == expected
+
+
+def _matches(entity, flt):
+    field, operator, value = flt[0], flt[1], flt[2] if len(flt) > 2 else None
+    current = entity.get(field)
+
+    if operator == 'is':
+        return _same(current, value)
+    if operator == 'is_not':
+        return not _same(current, value)
+    if operator == 'in':
+        return any(_same(current, item) for item in value)
+    if operator == 'not_in':
+        return not any(_same(current, item) for item in value)
+    if operator == 'starts_with':
+        return isinstance(current, str) and current.startswith(value)
+    if operator == 'contains':
+        return isinstance(current, str) and value in current
+    if operator == 'greater_than':
+        return current is not None and current > value
+    if operator == 'less_than':
+        return current is not None and current < value
+    if operator == 'type_is':
+        return isinstance(current, dict) and current.get('type') == value
+
+    raise NotImplementedError('FakeShotgun does not support the "%s" filter' % operator)
+
+
+class FakeShotgun(object):
+    '''
+    client of a FakeSite, every call sleeps latency seconds and uploads also take
+    size / bandwidth seconds
+
+    :param FakeSite site:
+    :param float latency: seconds per request
+    :param float bandwidth: upload bytes per second, None uploads instantly
+    '''
+
+    def __init__(self, site, latency=0.0, bandwidth=None):
+        self.site = site
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def _round_trip(self, nbytes=0):
+        delay = self.latency
+        if self.bandwidth and nbytes:
+            delay += float(nbytes) / self.bandwidth
+
+        if delay:
+            time.sleep(delay)
+
+    @staticmethod
+    def _project(entity, fields):
+        out = {'type': entity['type'], 'id': entity['id']}
+        for field in fields or []:
+            out[field] = copy.deepcopy(entity.get(field))
+        return out
+
+    def _find(self, entity_type, filters, fields=None, order=None, limit=0):
+        with self.site.lock:
+            rows = [entity for entity in self.site.entities.get(entity_type, {}).values()
+                    if all(_matches(entity, flt) for flt in filters)]
+
+            for sort in reversed(order or []):
+                rows.sort(key=lambda entity: (entity.get(sort['field_name']) is not None,
+                                              entity.get(sort['field_name'])),
+                          reverse=sort.get('direction') == 'desc')
+
+            if limit:
+                rows = rows[:limit]
+
+            return [self._project(entity, fields) for entity in rows]
+
+    def find(self, entity_type, filters, fields=None, order=None, limit=0, **kwargs):
+        self._round_trip()
+        return self._find(entity_type, filters, fields=fields, order=order, limit=limit)
+
+    def find_one(self, entity_type, filters, fields=None, order=None, **kwargs):
+        rows = self.find(entity_type, filters, fields=fields, order=order, limit=1)
+        return rows[0] if rows else None
+
+    def _create(self, entity_type, data, return_fields=None):
+        entity = self.site.add(entity_type, **data)
+        return self._project(entity, sorted(set(data) | set(return_fields or [])))
+
+    def create(self, entity_type, data, return_fields=None):
+        self._round_trip()
+        return self._create(entity_type, data, return_fields)
+
+    def _update(self, entity_type, entity_id, data):
+        with self.site.lock:
+            entity = self.site.entities[entity_type][entity_id]
+            entity.update(copy.deepcopy(data))
+            entity['updated_at'] = datetime.datetime.now()
+            return self._project(entity, sorted(data))
+
+    def update(self, entity_type, entity_id, data, **kwargs):
+        self._round_trip()
+        return self._update(entity_type, entity_id, data)
+
+    def _delete(self, entity_type, entity_id):
+        with self.site.lock:
+            return self.site.entities.get(entity_type, {}).pop(entity_id, None) is not None
+
+    def delete(self, entity_type, entity_id):
+        self._round_trip()
+        return self._delete(entity_type, entity_id)
+
+    def batch(self, requests):
+        # NOTE: one round trip for the whole batch like the real api
+        self._round_trip()
+
+        results = []
+        for request in requests:
+            request_type = request['request_type']
+            if request_type == 'create':
+                results.append(self._create(request['entity_type'], request['data'], request.get('return_fields')))
+            elif request_type == 'update':
+                results.append(self._update(request['entity_type'], request['entity_id'], request['data']))
+            elif request_type == 'delete':
+                results.append(self._delete(request['entity_type'], request['entity_id']))
+            else:
+                raise ValueError('unknown batch request type %s' % request_type)
+
+        return results
+
+    def _requires_direct_s3_upload(self, entity_type, field_name):
+        # NOTE: keeps ChunkedUploader on the single request upload
+        return False
+
+    def upload(self, entity_type, entity_id, path, field_name=None, display_name=None, tag_list=None):
+        nbytes = os.path.getsize(path)
+        self._round_trip(nbytes)
+
+        with self.site.lock:
+            if entity_id not in self.site.entities.get(entity_type, {}):
+                raise ValueError('%s %s does not exist' % (entity_type, entity_id))
+
+            self.site.uploads.append({'entity_type': entity_type,
+                                      'entity_id': entity_id,
+                                      'field_name': field_name,
+                                      'path': path,
+                                      'bytes': nbytes})
+            return len(self.site.uploads)
+
+    def upload_thumbnail(self, entity_type, entity_id, path, **kwargs):
+        return self.upload(entity_type, entity_id, path, 'thumb_image')
+
+    def upload_filmstrip_thumbnail(self, entity_type, entity_id, path, **kwargs):
+        return self.upload(entity_type, entity_id, path, 'filmstrip_thumb_image')
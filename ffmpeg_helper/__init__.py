@@ -1,11 +1,21 @@
 '''
 '''
-from glob import glob
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
 import os
 import re
+import shutil
+import subprocess
+from tempfile import mkdtemp
+from threading import Lock, Thread
+import time
 
-from pexpect import popen_spawn, EOF
+from shot_grid_sub_2_dailies.ffmpeg_helper.capabilities import find_ffmpeg, probe_capabilities
+from shot_grid_sub_2_dailies.ffmpeg_helper.encode_profiles import get_profile
+from shot_grid_sub_2_dailies.ffmpeg_helper.progress import ProgressParser, ProgressTracker
+from shot_grid_sub_2_dailies.ffmpeg_helper.sequence_index import SEQUENCE_INDEX
+from shot_grid_sub_2_dailies.tracing import TRACER
 
 
 class FFMpegHelper(object):
@@ -17,11 +27,35 @@ class FFMpegHelper(object):
 
     '''
 
-    def __init__(self):
+    min_frames_per_segment = 24
+    # NOTE: gpu encoders only open a few sessions at once (3 to 5 on consumer nvidia cards) and
+    # a chunk is a session, so the encoders other than x264 are capped to this many chunks
+    max_encoder_sessions = 1
+    # NOTE: seconds between two progress updates, ffmpeg reports twice a second at most anyway
+    progress_interval = 0.25
+    # NOTE: Shotgrid filmstrips are a single row of 240px wide frames
+    thumbnail_width = 240
+    filmstrip_frames = 20
 
+    def __init__(self, tracer=None, sequence_index=None):
+
+        self.tracer = tracer or TRACER
+        self.sequence_index = sequence_index or SEQUENCE_INDEX
         self.string_padding_regex = re.compile(r'(\d+)$')
         self.log = getLogger('FFMpeg_Hepler')
-        self._exe = self._get_exe()
+        self._exe_path = None
+        self._capabilities = None
+
+    @property
+    def _exe(self):
+        '''
+        path to the binary, only looked up by the first command that needs it so building a
+        helper never touches the disk
+        '''
+        if self._exe_path is None:
+            self._exe_path = self._get_exe()
+
+        return self._exe_path
 
     def extract_padding(self, str_val, as_string=False):
         '''
@@ -42,42 +76,140 @@ class FFMpegHelper(object):
 
     def _get_exe(self):
         """
-        find ffmpeg exe
+        find ffmpeg exe, see capabilities.find_ffmpeg for the places we look in
 
         """
-        root = os.path.dirname(__file__)
-        exepath = os.path.join(root, 'ffmpeg-20191018-feaec3b-win64-static', 'bin', 'ffmpeg.exe')
+        return find_ffmpeg()
+
+    @property
+    def capabilities(self):
+        """
+        encoders, filters and version of the binary, probed on first use and cached on disk
+        """
+        if self._capabilities is None:
+            self._capabilities = probe_capabilities(self._exe)
+
+        return self._capabilities
+
+    def _resolve_profile(self, codec):
+        '''
+        returns the encode profile to use for the codec name, swapped for a faster alternative
+        when the binary supports one
+
+        :param codec: profile name (see encode_profiles), 'mjpeg', 'h264' or an EncodeProfile
+        '''
+        return get_profile(codec).resolve(self.capabilities)
+
+    def _encode(self, cmd, workdir, output, frames=None, qt_pg=None, on_progress=None):
+        '''
+        run an encode command recording its duration, frame count, fps and output size
+
+        :param list(str) cmd:
+        :param str workdir:
+        :param str output: path of the rendered file
+        :param int frames: number of frames being encoded if known
+        :param qt_pg: takes a QProgressbar that will be updated as the process runs
+        :param callable on_progress: gets a ProgressEvent as the process runs
+        '''
+        with self.tracer.span('ffmpeg.encode', output=output, frames=frames) as span:
+            start = time.perf_counter()
+            result = self._launch_and_track(cmd, workdir, qt_pg=qt_pg, total_frames=frames, on_progress=on_progress)
+            elapsed = time.perf_counter() - start
+
+            if frames and elapsed:
+                span.set(fps=frames / elapsed)
 
-        if not os.path.isfile(exepath):
-            raise RuntimeError('could not find %s' % exepath)
+            if os.path.isfile(output):
+                span.set(bytes=os.path.getsize(output))
 
-        return exepath
+        return result
 
-    def _launch_and_track(self, cmd, workdir, qt_pg=None):
+    def render_test_sequence(self, output_pattern, frames=48, size='1920x1080', frame_rate=24):
         '''
-        used to launch ffmpeg and track the progress based on the consoule output
-        this is not using stdout as usual, so we use pexpect to track the output
+        render a synthetic image sequence with ffmpeg's test source, used to benchmark encodes
+        without needing real plates
+
+        :param str output_pattern: printf style output ie /tmp/bench/test.%04d.jpg
+        :param int frames: number of frames to render
+        :param str size: width x height
+        :param int frame_rate:
+        '''
+        out_root = os.path.dirname(output_pattern)
+        if not os.path.isdir(out_root):
+            os.makedirs(out_root)
+
+        cmd = [self._exe, '-y']
+        cmd.extend(['-f', 'lavfi', '-i', 'testsrc2=size=%s:rate=%s' % (size, frame_rate)])
+        cmd.extend(['-frames:v', str(frames), '-q:v', '2'])
+        cmd.extend(['-start_number', '1001'])
+        cmd.append(output_pattern.replace('\\', '/'))
+
+        if self._launch_and_track(cmd, out_root):
+            raise RuntimeError('Failed to render test sequence %s' % output_pattern)
+
+        self.sequence_index.invalidate(out_root)
+        return output_pattern % 1001
+
+    def _progress_tracker(self, total_frames=None, qt_pg=None, on_progress=None):
+        '''
+        returns a ProgressTracker forwarding the frames done to the progress bar and
+        the events to the callback
+
+        :param int total_frames:
+        :param qt_pg: QProgressbar or anything with a setValue method
+        :param callable on_progress: gets each ProgressEvent
+        '''
+        def emit(event):
+            if qt_pg:
+                qt_pg.setValue(event.frame)
+
+            if on_progress:
+                on_progress(event)
+
+        return ProgressTracker(total_frames=total_frames, callback=emit, min_interval=self.progress_interval)
+
+    def _launch_and_track(self, cmd, workdir, qt_pg=None, total_frames=None, on_progress=None):
+        '''
+        used to launch ffmpeg and track the progress, ffmpeg writes its progress as key=value
+        blocks to stdout (-progress pipe:1) and the status line is turned off (-nostats)
 
         :param cmd: list of string that make the command flags and values to be launched
         :type cmd: list(str)
         :param workdir: the directory to use the as the current working directory for the process
         :type workdir: str
         :param qt_pg: takes a QProgressbar that will be updated as the process runs
+        :param int total_frames: frames expected, used for the eta of the progress events
+        :param callable on_progress: gets a ProgressEvent at most every progress_interval seconds
+        :return: exit code of ffmpeg
         '''
-        thread = popen_spawn.PopenSpawn(cmd, cwd=workdir, encoding='utf-8')
-        cpl = thread.compile_pattern_list([EOF, u"frame= *\d+"])
+        cmd = [cmd[0], '-nostats', '-progress', 'pipe:1'] + list(cmd[1:])
+        parser = ProgressParser(self._progress_tracker(total_frames, qt_pg=qt_pg, on_progress=on_progress))
+
+        process = subprocess.Popen(cmd,
+                                   cwd=workdir,
+                                   stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   encoding='utf-8',
+                                   errors='replace')
+
+        # NOTE: stderr is drained on the side so a chatty ffmpeg can't fill the pipe and stall
+        errors = deque(maxlen=20)
+        err_thread = Thread(target=errors.extend, args=(process.stderr,))
+        err_thread.daemon = True
+        err_thread.start()
 
-        while True:
-            i = thread.expect_list(cpl, timeout=None)
+        with process.stdout:
+            parser.read(process.stdout)
 
-            if i == 0:
-                return thread.wait()
+        result = process.wait()
+        err_thread.join()
+        process.stderr.close()
 
-            if i != 1 or not qt_pg:
-                continue
+        if result:
+            self.log.error('ffmpeg exited with %d:\n%s' % (result, ''.join(errors)))
 
-            val = int(thread.match.group(0).replace('frame=', ''))
-            qt_pg.setValue(val)
+        return result
 
     def mov_to_mov(self,
                    in_file,
@@ -86,7 +218,8 @@ class FFMpegHelper(object):
                    frame_rate=23.98,
                    lut_3d=None,
                    qt_pg=None,
-                   codec=None):
+                   codec=None,
+                   on_progress=None):
         """
         Encode incoming movies to a standard output format
 
@@ -97,7 +230,8 @@ class FFMpegHelper(object):
         :param float frame_rate: the play back frame rate for the movie (default 23.98)
         :param str lut_3d: path to lut path to be applied to image during encoding
         :param Qt.QtWidgets.QProgressBar qt_pg: optional QProgressBar so that will be kept up to date during the process
-        :param codec: Name of codec. Currently support 'mjpeg' and 'h264'.
+        :param codec: encode profile name ie 'final', 'dailies-fast', 'preview', 'mjpeg' ('h264' is 'final')
+        :param callable on_progress: gets a ProgressEvent with the frame, fps, speed and eta as ffmpeg runs
 
         :example:
 
@@ -115,60 +249,160 @@ class FFMpegHelper(object):
         cmd = [self._exe, '-y']
         cmd.extend(['-r', str(frame_rate)])
         cmd.extend(['-i', in_file.replace('\\', '/')])
+        cmd.extend(self._codec_args(codec))
 
-        # set codec
-        codec = codec.lower()
-        # Motion jpeg, high quality
-        if codec == 'mjpeg':
-            cmd.extend(['-vcodec', 'mjpeg', '-qscale', '1'])
+        filter_args, lut_cwd = self._filter_args(scale=scale, lut_3d=lut_3d)
+        cmd.extend(filter_args)
+        cwd = lut_cwd or cwd
 
-        # h264 high quality
-        elif codec == 'h264':
-            cmd.extend(['-c:v', 'libx264', '-preset', 'slow', '-crf', '18'])
+        cmd.append(output.replace('\\', '/'))
 
-        else:
-            raise ValueError("Unsupported codec: %s" % codec)
+        return self._encode(cmd, cwd, output, qt_pg=qt_pg, on_progress=on_progress)
+
+    def get_image_sequence(self, input_image):
+        '''
+        returns the ImageSequence the given image belongs to, the directory is indexed
+        in a single pass and cached until its contents change
+
+        :param str input_image: any image of the sequence
+        '''
+        with self.tracer.span('ffmpeg.sequence_discovery', input_image=input_image) as span:
+            sequence = self.sequence_index.find(input_image)
+            span.set(frames=sequence.count, bytes=sequence.total_bytes)
+
+        return sequence
+
+    def gen_image_sequence_data_from_file(self, input_image):
+        '''
+        returns the first frame number as a string, the number of frames, the first image and the extension
 
+        :param str input_image: any image of the sequence
+        '''
+        sequence = self.get_image_sequence(input_image)
+        return sequence.frame_string(sequence.first_frame), sequence.count, sequence.first_path, sequence.ext
+
+    def _codec_args(self, codec, threads=None):
+        '''
+        returns the ffmpeg flags for the given encode profile
+
+        :param codec: profile name (see encode_profiles), 'mjpeg', 'h264' or an EncodeProfile
+        :param int threads: encoder threads unless the profile sets its own
+        '''
+        return self._resolve_profile(codec).args(threads=threads)
+
+    @staticmethod
+    def _filter_chain(scale=False, lut_3d=None):
+        '''
+        returns the scale/lut filters and the working directory the lut needs
+
+        :param boolean scale:
+        :param str lut_3d:
+        '''
+        cwd = None
         vf_cmds = []
 
         if lut_3d and os.path.isfile(lut_3d):
             vf_cmds.append('lut_3d=file=%s' % os.path.basename(lut_3d))
             cwd = os.path.dirname(lut_3d)
 
+        if scale:
+            vf_cmds += [r'scale=iw*min(720/iw\,480/ih):ih*min(720/iw\,480/ih)', r'pad=720:480:(720-iw)/2:(480-ih)/2']
+
+        return vf_cmds, cwd
+
+    @classmethod
+    def _filter_args(cls, scale=False, lut_3d=None):
+        '''
+        returns the ffmpeg flags for the scale/lut filters and the working directory the lut needs
+
+        :param boolean scale:
+        :param str lut_3d:
+        '''
+        cmd = []
+        vf_cmds, cwd = cls._filter_chain(scale=scale, lut_3d=lut_3d)
+
         if scale:
             cmd += ['-aspect', '1.5']
-            vf_cmds += ['scale=iw*min(720/iw\,480/ih):ih*min(720/iw\,480/ih)', 'pad=720:480:(720-iw)/2:(480-ih)/2']
 
         if vf_cmds:
             cmd += ['-vf', ','.join(vf_cmds)]
 
-        cmd.append(output.replace('\\', '/'))
+        return cmd, cwd
 
-        return self._launch_and_track(cmd, cwd, qt_pg=qt_pg)
+    def _extras_plan(self, img_count):
+        '''
+        returns the index of the poster frame and the indices of the filmstrip frames
 
-    def gen_image_sequence_data_from_file(self, input_image):
-        root, base = os.path.split(input_image)
-        fname, ext = os.path.splitext(base)
+        :param int img_count: frames in the encode
+        '''
+        count = max(1, min(img_count, self.filmstrip_frames))
+        step = max(1, img_count // count)
+        return img_count // 2, [index * step for index in range(count)]
+
+    def _output_args(self,
+                     codec_args,
+                     output,
+                     scale=False,
+                     vf_cmds=None,
+                     start=0,
+                     frames=0,
+                     thumbnail=None,
+                     filmstrip=None,
+                     poster=None,
+                     strip=()):
+        '''
+        returns the output flags of an encode, when a thumbnail or a filmstrip is asked for the
+        decoded frames are split with a filter_complex so the extras come out of the same pass
+
+        :param [str] codec_args: see _codec_args
+        :param str output: movie to write
+        :param boolean scale: letterbox the movie
+        :param [str] vf_cmds: filters applied to every output, see _filter_chain
+        :param int start: index of the first frame of this command in the whole encode
+        :param int frames: number of frames of this command
+        :param str thumbnail: image to write the poster frame to
+        :param str filmstrip: image to write the filmstrip to
+        :param int poster: index of the poster frame in the whole encode, see _extras_plan
+        :param [int] strip: indices of the filmstrip frames in the whole encode
+        '''
+        vf_cmds = vf_cmds or []
+        aspect = ['-aspect', '1.5'] if scale else []
+        end = start + frames
+
+        thumb_at = poster - start if thumbnail and poster is not None and start <= poster < end else None
+        strip_at = [index - start for index in strip if start <= index < end] if filmstrip else []
+
+        if thumb_at is None and not strip_at:
+            cmd = list(codec_args) + aspect
+            if vf_cmds:
+                cmd += ['-vf', ','.join(vf_cmds)]
+            return cmd + [output.replace('\\', '/')]
+
+        labels = ['[mv]']
+        graph = []
+
+        if thumb_at is not None:
+            labels.append('[th]')
+            graph.append("[th]select='eq(n,%d)',scale=%d:-2[thumb]" % (thumb_at, self.thumbnail_width))
 
-        padding = self.extract_padding(fname, as_string=True)
-        if not padding:
-            raise ValueError('%s is not part of an input_image sequence (no padding)' % input_image)
-        subname = fname[:-len(padding)]
-        search = os.path.join(root, subname + '*' + ext)
+        if strip_at:
+            labels.append('[fs]')
+            expr = '+'.join('eq(n,%d)' % index for index in strip_at)
+            graph.append("[fs]select='%s',scale=%d:-2,tile=%dx1[strip]" % (expr, self.thumbnail_width, len(strip_at)))
 
-        images = glob(search)
-        pre_regex = os.path.join(root, subname).lower()
-        pre_regex = pre_regex.replace('\\', '\\\\')
-        confirm_regex = r'(%s)(\d+)(%s)$' % (pre_regex, ext.lower())
-        cregex = re.compile(confirm_regex, flags=re.IGNORECASE)
+        graph.insert(0, '[0:v]%s,split=%d%s' % (','.join(vf_cmds) or 'null', len(labels), ''.join(labels)))
 
-        images = [img for img in images if cregex.match(img)]
-        images.sort(key=lambda x: x.lower())
+        cmd = ['-filter_complex', ';'.join(graph), '-map', '[mv]']
+        cmd += list(codec_args) + aspect
+        cmd.append(output.replace('\\', '/'))
+
+        if thumb_at is not None:
+            cmd += ['-map', '[thumb]', '-frames:v', '1', '-update', '1', thumbnail.replace('\\', '/')]
 
-        if not images:
-            raise ValueError('Could not determine input_image list from path %s' % input_image)
+        if strip_at:
+            cmd += ['-map', '[strip]', '-frames:v', '1', '-update', '1', filmstrip.replace('\\', '/')]
 
-        return self.extract_padding(images[0][:-len(ext)], as_string=True), len(images), images[0], ext
+        return cmd
 
     def image_list_to_mov(self,
                           input_image,
@@ -177,9 +411,17 @@ class FFMpegHelper(object):
                           frame_rate=23.98,
                           lut_3d=None,
                           qt_pg=None,
-                          codec=None):
+                          codec=None,
+                          segments=1,
+                          frame_step=1,
+                          hold_missing=False,
+                          on_progress=None,
+                          predecoder=None,
+                          thumbnail=None,
+                          filmstrip=None):
         '''
-        this method is for encodeing image sequences into movies
+        this method is for encodeing image sequences into movies, sequences with missing frames
+        or a frame_step are fed to ffmpeg as a frame list so nothing has to be copied or renamed
 
         :param str first_img: the first image that makes up the image sequence
         :param str output: the output for the final movie container
@@ -188,7 +430,15 @@ class FFMpegHelper(object):
         :param float frame_rate: the play back frame rate for the movie (default 23.98)
         :param str lut_3d: path to lut path to be applied to image during encoding
         :param Qt.QtWidgets.QProgressBar qt_pg: optional QProgressBar so that will be kept up to date during the process
-        :param codec: Name of codec. Currently support 'mjpeg' and 'h264'.
+        :param codec: encode profile name ie 'final', 'dailies-fast', 'preview', 'mjpeg' ('h264' is 'final')
+        :param int segments: split the sequence in this many chunks encoded in parallel,
+                             None uses one chunk per core (see image_list_to_mov_segmented)
+        :param int frame_step: only encode every nth frame
+        :param bool hold_missing: fill missing frames with the previous frame instead of skipping them
+        :param callable on_progress: gets a ProgressEvent with the frame, fps, speed and eta as ffmpeg runs
+        :param ExrPredecoder predecoder: converts the frames it handles to light PNGs before the encode
+        :param str thumbnail: also write the middle frame to this image, from the same decode
+        :param str filmstrip: also write a filmstrip (one row of frames) to this image, from the same decode
 
         :example:
 
@@ -201,62 +451,368 @@ class FFMpegHelper(object):
         >>> ffmpg.image_list_to_mov(image_seq[0], movfile) #ecode image sequence to .mov
 
         '''
-        codec = codec or 'h264'
+        if segments != 1:
+            return self.image_list_to_mov_segmented(input_image,
+                                                    output,
+                                                    segments=segments,
+                                                    scale=scale,
+                                                    frame_rate=frame_rate,
+                                                    lut_3d=lut_3d,
+                                                    qt_pg=qt_pg,
+                                                    codec=codec,
+                                                    frame_step=frame_step,
+                                                    hold_missing=hold_missing,
+                                                    on_progress=on_progress,
+                                                    predecoder=predecoder,
+                                                    thumbnail=thumbnail,
+                                                    filmstrip=filmstrip)
+
+        sequence = self.get_image_sequence(input_image)
+        paths = self._plan_frame_list(sequence, frame_step, hold_missing, predecoder=predecoder, qt_pg=qt_pg)
+
+        return self._encode_single(sequence, paths, output, scale=scale, frame_rate=frame_rate, lut_3d=lut_3d,
+                                   qt_pg=qt_pg, codec=codec, on_progress=on_progress, thumbnail=thumbnail,
+                                   filmstrip=filmstrip)
+
+    def _encode_single(self,
+                       sequence,
+                       paths,
+                       output,
+                       scale=False,
+                       frame_rate=23.98,
+                       lut_3d=None,
+                       qt_pg=None,
+                       codec=None,
+                       on_progress=None,
+                       thumbnail=None,
+                       filmstrip=None):
+        '''
+        encode an already planned sequence with a single ffmpeg process, see image_list_to_mov
 
-        start_frame, img_count, first_img, ext = self.gen_image_sequence_data_from_file(input_image)
+        :param ImageSequence sequence:
+        :param [str] paths: frame list from _plan_frame_list, None encodes the sequence pattern
+        '''
+        codec = codec or 'h264'
+        img_count = len(paths) if paths is not None else sequence.count
 
         # NOTE: set progress bar to match number of frames
         if qt_pg:
             qt_pg.setValue(0)
             qt_pg.setMaximum(img_count)
 
-        img_root, base_name = os.path.split(first_img)
-
-        input_img = os.path.join(img_root, base_name.replace(start_frame + ext, '%04d' + ext))
+        input_img = sequence.pattern
 
         out_root = os.path.dirname(output)
 
         if not os.path.isdir(out_root):
             os.makedirs(out_root)
 
-        cwd = os.path.dirname(input_img)
+        list_root = None
+        if paths is None:
+            cmd = self._image_input_args(input_img, sequence.first_frame, frame_rate)
+        else:
+            list_root = mkdtemp(prefix='frames_', dir=out_root)
+            cmd = self._frame_list_input_args(paths, frame_rate, os.path.join(list_root, 'frames.txt'))
+
+        vf_cmds, cwd = self._filter_chain(scale=scale, lut_3d=lut_3d)
+        poster, strip = self._extras_plan(img_count)
+        cmd.extend(self._output_args(self._codec_args(codec),
+                                     output,
+                                     scale=scale,
+                                     vf_cmds=vf_cmds,
+                                     frames=img_count,
+                                     thumbnail=thumbnail,
+                                     filmstrip=filmstrip,
+                                     poster=poster,
+                                     strip=strip))
+        try:
+            return self._encode(cmd, cwd or os.path.dirname(input_img), output, frames=img_count, qt_pg=qt_pg,
+                                on_progress=on_progress)
+        finally:
+            if list_root:
+                shutil.rmtree(list_root, ignore_errors=True)
+
+    def sequence_frame_paths(self, sequence, frame_step=1, hold_missing=False):
+        '''
+        returns the paths of the frames to encode in order
+
+        :param ImageSequence sequence:
+        :param int frame_step: only take every nth frame of the range
+        :param bool hold_missing: use the closest previous frame for the frames that are missing
+        '''
+        paths = []
+        for frame in range(sequence.first_frame, sequence.last_frame + 1, frame_step):
+            if sequence.has_frame(frame):
+                paths.append(sequence.path(frame))
+            elif hold_missing:
+                paths.append(sequence.path(sequence.previous_frame(frame)))
+
+        return paths
+
+    def _plan_frame_list(self, sequence, frame_step, hold_missing, predecoder=None, qt_pg=None):
+        if predecoder is not None and predecoder.handles(sequence):
+            frame_paths = self.sequence_frame_paths(sequence, frame_step=frame_step, hold_missing=hold_missing)
+            return predecoder.decode(frame_paths, self, qt_pg=qt_pg)
+
+        # NOTE: contiguous sequences go through image2 which needs no list file
+        if frame_step == 1 and sequence.is_contiguous:
+            return None
+
+        return self.sequence_frame_paths(sequence, frame_step=frame_step, hold_missing=hold_missing)
+
+    def _frame_list_input_args(self, paths, frame_rate, list_file):
+        '''
+        write a concat demuxer list playing each path for one frame and return the input flags
+
+        :param [str] paths: frames in play back order, a path can show up more than once
+        :param float frame_rate:
+        :param str list_file: where to write the list
+        '''
+        duration = 1.0 / float(frame_rate)
+
+        with open(list_file, 'w') as strm:
+            strm.write('ffconcat version 1.0\n')
+            for path in paths:
+                strm.write("file '%s'\nduration %.6f\n" % (self._escape_concat_path(path), duration))
+
+            # NOTE: the concat demuxer ignores the duration of the last entry unless it is repeated
+            strm.write("file '%s'\n" % self._escape_concat_path(paths[-1]))
+
         cmd = [self._exe, '-y']
+        cmd.extend(['-f', 'concat', '-safe', '0'])
+        cmd.extend(['-i', list_file.replace('\\', '/')])
+        cmd.extend(['-r', str(frame_rate)])
+        cmd.extend(['-frames:v', str(len(paths))])
+
+        return cmd
 
-        cmd.extend(['-start_number', str(int(start_frame))])
+    @staticmethod
+    def _escape_concat_path(path):
+        return path.replace('\\', '/').replace("'", "'\\''")
+
+    def _image_input_args(self, input_img, start_number, frame_rate, frames=None):
+        cmd = [self._exe, '-y']
+
+        cmd.extend(['-start_number', str(start_number)])
         cmd.extend(['-f', 'image2'])
         cmd.extend(['-r', str(frame_rate)])
         cmd.extend(['-i', input_img.replace('\\', '/')])
 
-        # set codec
-        codec = codec.lower()
-        # Motion jpeg, high quality
-        if codec == 'mjpeg':
-            cmd.extend(['-vcodec', 'mjpeg', '-qscale', '1'])
+        if frames is not None:
+            cmd.extend(['-frames:v', str(frames)])
+
+        return cmd
+
+    def image_list_to_mov_segmented(self,
+                                    input_image,
+                                    output,
+                                    segments=None,
+                                    scale=False,
+                                    frame_rate=23.98,
+                                    lut_3d=None,
+                                    qt_pg=None,
+                                    codec=None,
+                                    frame_step=1,
+                                    hold_missing=False,
+                                    on_progress=None,
+                                    predecoder=None,
+                                    thumbnail=None,
+                                    filmstrip=None):
+        '''
+        encode an image sequence by splitting the frame range in chunks that are encoded by
+        separate ffmpeg processes at the same time and then joined without re encoding with
+        the concat demuxer, this keeps all the cores busy on long shots
 
-        # h264 high quality
-        elif codec == 'h264':
-            cmd.extend(['-c:v', 'libx264', '-preset', 'slow', '-crf', '18'])
+        :param str input_image: any image of the sequence
+        :param str output: the output for the final movie container
+        :param int segments: number of chunks, defaults to the number of cores
+        :param boolean scale: if set to true will scalse down the move to a 720 by 480 square with latter box
+        :param float frame_rate: the play back frame rate for the movie (default 23.98)
+        :param str lut_3d: path to lut path to be applied to image during encoding
+        :param Qt.QtWidgets.QProgressBar qt_pg: optional QProgressBar, gets the frames done across all the chunks
+        :param codec: encode profile name ie 'final', 'dailies-fast', 'preview', 'mjpeg' ('h264' is 'final')
+        :param int frame_step: only encode every nth frame
+        :param bool hold_missing: fill missing frames with the previous frame instead of skipping them
+        :param callable on_progress: gets a ProgressEvent with the frames done across all the chunks
+        :param ExrPredecoder predecoder: converts the frames it handles to light PNGs before the encode
+        :param str thumbnail: also write the middle frame to this image, from the same decode
+        :param str filmstrip: also write a filmstrip (one row of frames) to this image, from the same decode
+        '''
+        codec = codec or 'h264'
+        cores = os.cpu_count() or 1
 
-        else:
-            raise ValueError("Unsupported codec: %s" % codec)
+        sequence = self.get_image_sequence(input_image)
+        paths = self._plan_frame_list(sequence, frame_step, hold_missing, predecoder=predecoder, qt_pg=qt_pg)
+        img_count = len(paths) if paths is not None else sequence.count
 
-        vf_cmds = []
+        profile = self._resolve_profile(codec)
 
-        if lut_3d and os.path.isfile(lut_3d):
-            vf_cmds.append('lut_3d=file=%s' % os.path.basename(lut_3d))
-            cwd = os.path.dirname(lut_3d)
+        # NOTE: tiny chunks cost more in process start up than they save
+        segments = segments or cores
+        segments = max(1, min(segments, img_count // self.min_frames_per_segment))
+        if not profile.is_x264:
+            segments = min(segments, self.max_encoder_sessions)
 
-        if scale:
-            cmd += ['-aspect', '1.5']
-            vf_cmds += [r'scale=iw*min(720/iw\,480/ih):ih*min(720/iw\,480/ih)', r'pad=720:480:(720-iw)/2:(480-ih)/2']
+        if segments == 1:
+            return self._encode_single(sequence, paths, output, scale=scale, frame_rate=frame_rate, lut_3d=lut_3d,
+                                       qt_pg=qt_pg, codec=profile, on_progress=on_progress, thumbnail=thumbnail,
+                                       filmstrip=filmstrip)
 
-        if vf_cmds:
-            cmd += ['-vf', ','.join(vf_cmds)]
+        if qt_pg:
+            qt_pg.setValue(0)
+            qt_pg.setMaximum(img_count)
 
-        cmd.append(output.replace('\\', '/'))
-        return self._launch_and_track(cmd, cwd, qt_pg=qt_pg)
+        input_img = sequence.pattern
+
+        out_root = os.path.dirname(output)
+        if not os.path.isdir(out_root):
+            os.makedirs(out_root)
+
+        seg_root = mkdtemp(prefix='segments_', dir=out_root)
+        # NOTE: everything from here on cleans up the segments folder when it fails
+        try:
+            tracker = self._progress_tracker(img_count, qt_pg=qt_pg, on_progress=on_progress)
+            progress = _SegmentedProgress(tracker, segments)
+
+            # NOTE: share the cores between the chunks instead of every x264 grabbing all of them
+            codec_args = profile.args(threads=max(1, cores // segments) if profile.is_x264 else None)
+
+            vf_cmds, cwd = self._filter_chain(scale=scale, lut_3d=lut_3d)
+            cwd = cwd or os.path.dirname(input_img)
+
+            # NOTE: each chunk renders its share of the filmstrip, the parts are stacked at the end
+            poster, strip = self._extras_plan(img_count)
+            strip_parts = []
+
+            seg_size, remainder = divmod(img_count, segments)
+            seg_outputs = []
+            cmds = []
+            seg_index = 0
+
+            for index in range(segments):
+                frames = seg_size + (1 if index < remainder else 0)
+                seg_output = os.path.join(seg_root, 'segment_%04d%s' % (index, os.path.splitext(output)[1]))
+
+                if paths is None:
+                    cmd = self._image_input_args(input_img, sequence.frames[seg_index], frame_rate, frames=frames)
+                else:
+                    cmd = self._frame_list_input_args(paths[seg_index:seg_index + frames],
+                                                      frame_rate,
+                                                      os.path.join(seg_root, 'segment_%04d.txt' % index))
+                strip_part = None
+                if filmstrip and any(seg_index <= strip_index < seg_index + frames for strip_index in strip):
+                    strip_part = os.path.join(seg_root, 'filmstrip_%04d.png' % index)
+                    strip_parts.append(strip_part)
+
+                cmd.extend(self._output_args(codec_args,
+                                             seg_output,
+                                             scale=scale,
+                                             vf_cmds=vf_cmds,
+                                             start=seg_index,
+                                             frames=frames,
+                                             thumbnail=thumbnail,
+                                             filmstrip=strip_part,
+                                             poster=poster,
+                                             strip=strip))
+
+                cmds.append((cmd, seg_output, frames, progress.segment(index)))
+                seg_outputs.append(seg_output)
+                seg_index += frames
+
+            with self.tracer.span('ffmpeg.encode_segmented', output=output, frames=img_count, segments=segments) as span:
+                start = time.perf_counter()
+
+                with ThreadPoolExecutor(max_workers=segments) as executor:
+                    futures = [executor.submit(self._encode, cmd, cwd, seg_output, frames=frames, qt_pg=seg_pg)
+                               for cmd, seg_output, frames, seg_pg in cmds]
+                    results = [future.result() for future in futures]
+
+                if any(results) or not all(os.path.isfile(seg_output) for seg_output in seg_outputs):
+                    raise RuntimeError('Failed to encode all the segments of %s' % input_image)
+
+                result = self._concat_movies(seg_outputs, output, seg_root)
+                if not result and strip_parts:
+                    result = self._join_images(strip_parts, filmstrip, seg_root)
+
+                if not result:
+                    tracker.update(img_count, done=True)
+
+                span.set(fps=img_count / (time.perf_counter() - start))
+        finally:
+            shutil.rmtree(seg_root, ignore_errors=True)
+
+        return result
+
+    def _join_images(self, images, output, workdir):
+        '''
+        place images of the same height side by side
+
+        :param [str] images:
+        :param str output:
+        :param str workdir:
+        '''
+        cmd = [self._exe, '-y']
+        for image in images:
+            cmd.extend(['-i', image.replace('\\', '/')])
+
+        if len(images) > 1:
+            cmd.extend(['-filter_complex', 'hstack=inputs=%d' % len(images)])
+
+        cmd.extend(['-frames:v', '1', '-update', '1', output.replace('\\', '/')])
+        return self._launch_and_track(cmd, workdir)
+
+    def _concat_movies(self, movies, output, workdir):
+        '''
+        join movies with the same codec settings without re encoding them
+
+        :param [str] movies:
+        :param str output:
+        :param str workdir: folder to write the concat list to
+        '''
+        list_file = os.path.join(workdir, 'concat.txt')
+        with open(list_file, 'w') as strm:
+            for movie in movies:
+                strm.write("file '%s'\n" % self._escape_concat_path(movie))
+
+        cmd = [self._exe, '-y', '-f', 'concat', '-safe', '0', '-i', list_file.replace('\\', '/'),
+               '-c', 'copy', output.replace('\\', '/')]
+
+        with self.tracer.span('ffmpeg.concat', output=output, segments=len(movies)):
+            return self._launch_and_track(cmd, workdir)
+
+
+class _SegmentedProgress(object):
+    '''
+    adds up the frames done by each chunk of a segmented encode into one progress value
+    '''
+
+    def __init__(self, tracker, segments):
+        self._tracker = tracker
+        self._done = [0] * segments
+        self._lock = Lock()
+
+    def segment(self, index):
+        return _SegmentProgress(self, index)
+
+    def update(self, index, value):
+        with self._lock:
+            self._done[index] = value
+            self._tracker.update(sum(self._done))
+
+
+class _SegmentProgress(object):
+    def __init__(self, parent, index):
+        self._parent = parent
+        self._index = index
+
+    def setValue(self, value):
+        self._parent.update(self._index, value)
+
+    def setMaximum(self, value):
+        pass
 
 
 if __name__ == '__main__':
     FFMPEG = FFMpegHelper()
     print(FFMPEG._get_exe())
+    print(FFMPEG.capabilities)
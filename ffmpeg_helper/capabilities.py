@@ -0,0 +1,192 @@
+'''
+capabilities
+============
+
+finds the ffmpeg binary to use and what it can do, the answer of "ffmpeg -encoders",
+"-filters" and "-version" is kept on disk next to the other caches and only asked again
+when the binary changes so starting the tool never waits on ffmpeg
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import hashlib
+import json
+from logging import getLogger
+import os
+import re
+import shutil
+import subprocess
+from tempfile import gettempdir
+from threading import Lock
+
+
+LOG = getLogger('FFMpeg_Capabilities')
+
+_BUNDLED = os.path.join(os.path.dirname(__file__), 'ffmpeg-20191018-feaec3b-win64-static', 'bin', 'ffmpeg.exe')
+
+# NOTE: hardware encoders are listed by any build that has them compiled in even if the
+# machine has no such gpu, so these are only trusted after a one frame test encode
+HARDWARE_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_amf', 'h264_videotoolbox')
+
+_ENCODER_REGEX = re.compile(r'^\s*[VASFXBD.]{6}\s+(\S+)\s')
+_FILTER_REGEX = re.compile(r'^\s*[TSC.|]{2,3}\s+(\S+)\s+\S+->\S+')
+
+_MEMO = {}
+_MEMO_LOCK = Lock()
+
+
+def find_ffmpeg():
+    '''
+    returns the ffmpeg binary to use, in order: the FFMPEG environment variable, the binary
+    bundled with the tool and the first ffmpeg on the PATH
+    '''
+    candidates = [os.environ.get('FFMPEG'), _BUNDLED, shutil.which('ffmpeg')]
+
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+
+    raise RuntimeError('could not find ffmpeg, set FFMPEG or add it to the PATH (looked for %s)' % _BUNDLED)
+
+
+class FFMpegCapabilities(object):
+    '''
+    what an ffmpeg binary supports
+
+    :param str exe: path to the binary
+    :param str version: version string ie "4.4.2"
+    :param [str] encoders: names of the encoders compiled in
+    :param [str] filters: names of the filters compiled in
+    :param [str] working_encoders: hardware encoders that passed the test encode
+    '''
+
+    def __init__(self, exe, version, encoders, filters, working_encoders=()):
+        self.exe = exe
+        self.version = version
+        self.encoders = set(encoders)
+        self.filters = set(filters)
+        self.working_encoders = set(working_encoders)
+
+    def __repr__(self):
+        return '<FFMpegCapabilities %s (%d encoders, %d filters)>' % (self.version, len(self.encoders), len(self.filters))
+
+    def has_encoder(self, name):
+        if name not in self.encoders:
+            return False
+
+        return name not in HARDWARE_ENCODERS or name in self.working_encoders
+
+    def has_filter(self, name):
+        return name in self.filters
+
+    def to_dict(self):
+        return {'exe': self.exe,
+                'version': self.version,
+                'encoders': sorted(self.encoders),
+                'filters': sorted(self.filters),
+                'working_encoders': sorted(self.working_encoders)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['exe'], data['version'], data['encoders'], data['filters'], data['working_encoders'])
+
+
+def _run(cmd):
+    result = subprocess.run(cmd,
+                            stdin=subprocess.DEVNULL,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            encoding='utf-8',
+                            errors='replace')
+    return result.returncode, result.stdout
+
+
+def _parse_names(text, regex):
+    names = []
+    for line in text.splitlines():
+        match = regex.match(line)
+        if match and match.group(1) != '=':
+            names.append(match.group(1))
+    return names
+
+
+def _parse_version(text):
+    match = re.search(r'ffmpeg version (\S+)', text)
+    return match.group(1) if match else 'unknown'
+
+
+def _test_encoder(exe, encoder):
+    cmd = [exe, '-hide_banner', '-v', 'error',
+           '-f', 'lavfi', '-i', 'color=black:size=256x256:duration=0.1',
+           '-frames:v', '1', '-c:v', encoder, '-f', 'null', '-']
+    try:
+        return _run(cmd)[0] == 0
+    except OSError:
+        return False
+
+
+def _run_probe(exe):
+    _, version_text = _run([exe, '-version'])
+    _, encoders_text = _run([exe, '-hide_banner', '-encoders'])
+    _, filters_text = _run([exe, '-hide_banner', '-filters'])
+
+    encoders = _parse_names(encoders_text, _ENCODER_REGEX)
+    working = [encoder for encoder in HARDWARE_ENCODERS if encoder in encoders and _test_encoder(exe, encoder)]
+
+    return FFMpegCapabilities(exe,
+                              _parse_version(version_text),
+                              encoders,
+                              _parse_names(filters_text, _FILTER_REGEX),
+                              working)
+
+
+def _cache_path(exe, cache_dir):
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(exe)).encode('utf-8')).hexdigest()[:10]
+    return os.path.join(cache_dir, 'ffmpeg_caps_%s.json' % key)
+
+
+def probe_capabilities(exe, cache_dir=None):
+    '''
+    returns the FFMpegCapabilities of the binary, the probe result is cached on disk and
+    reused until the binary's size or mtime changes
+
+    :param str exe: ffmpeg binary
+    :param str cache_dir: where the probe result is kept, defaults to sub2d_ffmpeg in the temp folder
+    '''
+    cache_dir = cache_dir or os.path.join(gettempdir(), 'sub2d_ffmpeg')
+    stat = os.stat(exe)
+    stamp = [stat.st_size, stat.st_mtime_ns]
+
+    cache_path = _cache_path(exe, cache_dir)
+    with _MEMO_LOCK:
+        memo = _MEMO.get(cache_path)
+        if memo and memo[0] == stamp:
+            return memo[1]
+
+    capabilities = None
+    if os.path.isfile(cache_path):
+        try:
+            with open(cache_path, 'r') as strm:
+                data = json.loads(strm.read())
+            if data['stamp'] == stamp:
+                capabilities = FFMpegCapabilities.from_dict(data['capabilities'])
+        except (ValueError, KeyError, IOError, OSError):
+            capabilities = None
+
+    if capabilities is None:
+        LOG.info('probing %s' % exe)
+        capabilities = _run_probe(exe)
+
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        temp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        with open(temp_path, 'w') as strm:
+            strm.write(json.dumps({'stamp': stamp, 'capabilities': capabilities.to_dict()}))
+        os.replace(temp_path, cache_path)
+
+    with _MEMO_LOCK:
+        _MEMO[cache_path] = (stamp, capabilities)
+
+    return capabilities
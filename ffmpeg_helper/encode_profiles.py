@@ -0,0 +1,189 @@
+'''
+encode_profiles
+===============
+
+named sets of encoder settings so a submission can trade quality for speed without
+touching the ffmpeg flags, use profile_benchmark to see how each one does on a machine
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from collections import OrderedDict
+
+
+class EncodeProfile(object):
+    '''
+    encoder settings used to render a movie
+
+    :param str name: name used to select the profile
+    :param str codec: ffmpeg encoder ie libx264 or mjpeg
+    :param str preset: x264 speed preset
+    :param int crf: x264 constant rate factor, lower is better looking and bigger
+    :param int qscale: fixed quantizer for the encoders that don't take a crf (mjpeg)
+    :param int threads: encoder threads, None lets ffmpeg or the caller decide
+    :param str tune: x264 tune ie film or fastdecode
+    :param str pix_fmt: output pixel format
+    :param str description: short text shown to the users
+    :param [str] extra_args: encoder flags that have no parameter of their own ie ['-cq', '21']
+    :param [EncodeProfile] alternatives: faster encoders producing a similar result, the first one
+                                         the ffmpeg binary supports is used instead (see resolve)
+    '''
+
+    def __init__(self,
+                 name,
+                 codec='libx264',
+                 preset=None,
+                 crf=None,
+                 qscale=None,
+                 threads=None,
+                 tune=None,
+                 pix_fmt=None,
+                 description='',
+                 extra_args=(),
+                 alternatives=()):
+        self.name = name
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.qscale = qscale
+        self.threads = threads
+        self.tune = tune
+        self.pix_fmt = pix_fmt
+        self.description = description
+        self.extra_args = list(extra_args)
+        self.alternatives = list(alternatives)
+
+    def __repr__(self):
+        return '<EncodeProfile %s>' % self.name
+
+    @property
+    def is_x264(self):
+        return self.codec == 'libx264'
+
+    def resolve(self, capabilities=None):
+        '''
+        returns the first alternative whose encoder the binary has, or this profile
+
+        :param FFMpegCapabilities capabilities: None skips the check and returns this profile
+        '''
+        if capabilities is None:
+            return self
+
+        for alternative in self.alternatives:
+            if capabilities.has_encoder(alternative.codec):
+                return alternative
+
+        return self
+
+    def args(self, threads=None):
+        '''
+        returns the ffmpeg output flags for this profile
+
+        :param int threads: used when the profile doesn't set its own thread count
+        '''
+        cmd = ['-c:v', self.codec]
+
+        if self.preset:
+            cmd.extend(['-preset', self.preset])
+
+        if self.crf is not None:
+            cmd.extend(['-crf', str(self.crf)])
+
+        if self.qscale is not None:
+            cmd.extend(['-qscale', str(self.qscale)])
+
+        if self.tune:
+            cmd.extend(['-tune', self.tune])
+
+        if self.pix_fmt:
+            cmd.extend(['-pix_fmt', self.pix_fmt])
+
+        cmd.extend(self.extra_args)
+
+        threads = self.threads if self.threads is not None else threads
+        if threads:
+            cmd.extend(['-threads', str(threads)])
+
+        return cmd
+
+
+PROFILES = OrderedDict()
+
+# NOTE: the codec names FFMpegHelper took before there were profiles
+_ALIASES = {'h264': 'final'}
+
+
+def register_profile(profile):
+    '''
+    add a profile to the registry, replacing any profile with the same name
+
+    :param EncodeProfile profile:
+    '''
+    PROFILES[profile.name] = profile
+    return profile
+
+
+def get_profile(name):
+    '''
+    returns the profile registered with the given name
+
+    :param name: profile name, one of the old codec names ('h264', 'mjpeg') or an EncodeProfile
+    '''
+    if isinstance(name, EncodeProfile):
+        return name
+
+    key = name.lower()
+    key = _ALIASES.get(key, key)
+
+    if key not in PROFILES:
+        raise ValueError('Unsupported encode profile: %s (available: %s)' % (name, ', '.join(PROFILES)))
+
+    return PROFILES[key]
+
+
+register_profile(EncodeProfile('final',
+                               preset='slow',
+                               crf=18,
+                               pix_fmt='yuv420p',
+                               description='high quality h264, slowest'))
+
+# NOTE: the speed profiles move to the gpu when there is one, the final one always stays on x264
+register_profile(EncodeProfile('dailies-fast',
+                               preset='veryfast',
+                               crf=20,
+                               tune='film',
+                               pix_fmt='yuv420p',
+                               description='h264 for day to day reviews',
+                               alternatives=[EncodeProfile('dailies-fast',
+                                                           codec='h264_nvenc',
+                                                           preset='fast',
+                                                           pix_fmt='yuv420p',
+                                                           extra_args=['-rc', 'vbr', '-cq', '21']),
+                                             EncodeProfile('dailies-fast',
+                                                           codec='h264_qsv',
+                                                           preset='veryfast',
+                                                           pix_fmt='nv12',
+                                                           extra_args=['-global_quality', '21'])]))
+
+register_profile(EncodeProfile('preview',
+                               preset='ultrafast',
+                               crf=28,
+                               tune='fastdecode',
+                               pix_fmt='yuv420p',
+                               description='quick low quality h264 to check timing',
+                               alternatives=[EncodeProfile('preview',
+                                                           codec='h264_nvenc',
+                                                           preset='fast',
+                                                           pix_fmt='yuv420p',
+                                                           extra_args=['-rc', 'vbr', '-cq', '28']),
+                                             EncodeProfile('preview',
+                                                           codec='h264_qsv',
+                                                           preset='veryfast',
+                                                           pix_fmt='nv12',
+                                                           extra_args=['-global_quality', '28'])]))
+
+register_profile(EncodeProfile('mjpeg',
+                               codec='mjpeg',
+                               qscale=1,
+                               description='motion jpeg, every frame is a key frame'))
@@ -0,0 +1,217 @@
+'''
+exr_predecode
+=============
+
+decoding big multi channel EXRs is what slows an EXR submission down, a single ffmpeg
+decodes them one after the other while x264 waits, this module converts the frames to
+small 8/16 bit PNGs first with one ffmpeg per frame on all the cores, only the RGB layer
+is read and the exposure and LUT are applied at that point so the encode gets light
+frames that need no more color work
+
+converted frames are cached by path, size, mtime and settings so a resubmit only converts
+the frames that changed
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+from logging import getLogger
+import os
+from tempfile import gettempdir
+from threading import Lock, get_ident
+
+
+class ExrPredecoder(object):
+    '''
+    converts EXR frames into cached PNGs
+
+    :param str cache_dir: where the converted frames are kept, defaults to sub2d_exr_frames in the temp folder
+    :param int workers: ffmpeg processes running at the same time, defaults to the number of cores
+    :param str layer: EXR layer to read ie "beauty", None reads the default RGB channels
+    :param float exposure: stops applied before the LUT
+    :param str lut_3d: optional .cube/.3dl LUT applied after the exposure
+    :param int max_width: frames wider than this are scaled down, None keeps the resolution
+    :param int bit_depth: 8 or 16 bits per channel PNGs
+    :param int max_bytes: the least recently used frames are removed once the cache grows past this
+    '''
+    extensions = ('.exr',)
+
+    def __init__(self,
+                 cache_dir=None,
+                 workers=None,
+                 layer=None,
+                 exposure=0.0,
+                 lut_3d=None,
+                 max_width=2048,
+                 bit_depth=8,
+                 max_bytes=10 * 1024 ** 3):
+        self.cache_dir = cache_dir or os.path.join(gettempdir(), 'sub2d_exr_frames')
+        self.workers = workers or os.cpu_count() or 1
+        self.layer = layer
+        self.exposure = exposure
+        self.lut_3d = lut_3d
+        self.max_width = max_width
+        self.bit_depth = bit_depth
+        self.max_bytes = max_bytes
+
+        self._lock = Lock()
+        self.log = getLogger('Sub2D_ExrPredecode')
+
+    def handles(self, sequence):
+        '''
+        returns True for the sequences this predecoder converts
+
+        :param ImageSequence sequence:
+        '''
+        return sequence.ext.lower() in self.extensions
+
+    def params(self):
+        '''
+        returns every setting that changes the converted frames
+        '''
+        lut_stamp = None
+        if self.lut_3d and os.path.isfile(self.lut_3d):
+            lut_stamp = [os.path.abspath(self.lut_3d), os.path.getmtime(self.lut_3d)]
+
+        return {'layer': self.layer,
+                'exposure': self.exposure,
+                'lut_3d': lut_stamp,
+                'max_width': self.max_width,
+                'bit_depth': self.bit_depth}
+
+    def _frame_key(self, path, params):
+        stat = os.stat(path)
+        key = '%s|%d|%d|%s' % (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, params)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _filter_args(self, capabilities=None):
+        '''
+        returns the decoder flags, the filter flags and the folder the filters run from
+
+        :param FFMpegCapabilities capabilities: the exposure is only done in linear light when
+                                                the binary has zscale for the sRGB curve
+        '''
+        input_args = ['-apply_trc', 'iec61966_2_1']
+        vf_cmds = []
+        cwd = None
+
+        if self.exposure and capabilities is not None and capabilities.has_filter('zscale'):
+            # NOTE: the decoder hands out linear float pixels without -apply_trc, the gain is
+            # applied on those and zscale does the sRGB curve afterwards
+            gain = 2 ** self.exposure
+            input_args = []
+            vf_cmds.append('format=gbrpf32le')
+            vf_cmds.append('colorchannelmixer=rr=%.6f:gg=%.6f:bb=%.6f' % (gain, gain, gain))
+            vf_cmds.append('zscale=transferin=linear:transfer=iec61966-2-1')
+        elif self.exposure:
+            # NOTE: without zscale the gain is applied after the sRGB curve, an approximate
+            # display space gain that is only right for the midtones
+            gain = 2 ** (self.exposure / 2.2)
+            vf_cmds.append('colorchannelmixer=rr=%.6f:gg=%.6f:bb=%.6f' % (gain, gain, gain))
+
+        if self.lut_3d and os.path.isfile(self.lut_3d):
+            vf_cmds.append('lut3d=file=%s' % os.path.basename(self.lut_3d))
+            cwd = os.path.dirname(self.lut_3d)
+
+        if self.max_width:
+            vf_cmds.append(r"scale=w='min(iw\,%d)':h=-2" % self.max_width)
+
+        return input_args, (['-vf', ','.join(vf_cmds)] if vf_cmds else []), cwd
+
+    def _convert(self, ffmpeg, source, target, input_args, filter_args, cwd):
+        temp_target = '%s.%d_%d.tmp.png' % (target[:-4], os.getpid(), get_ident())
+
+        cmd = [ffmpeg._exe, '-y', '-v', 'error']
+        if self.layer:
+            cmd.extend(['-layer', self.layer])
+        cmd.extend(input_args)
+        cmd.extend(['-i', source.replace('\\', '/')])
+        cmd.extend(['-frames:v', '1', '-threads', '1'])
+        cmd.extend(filter_args)
+        cmd.extend(['-pix_fmt', 'rgb48be' if self.bit_depth > 8 else 'rgb24'])
+        cmd.append(temp_target.replace('\\', '/'))
+
+        if ffmpeg._launch_and_track(cmd, cwd or os.path.dirname(source)) or not os.path.isfile(temp_target):
+            raise RuntimeError('Failed to convert %s' % source)
+
+        os.replace(temp_target, target)
+
+    def decode(self, frame_paths, ffmpeg, qt_pg=None):
+        '''
+        returns the converted frame for every input frame in the same order, only the frames
+        missing from the cache are converted
+
+        :param [str] frame_paths: EXR frames, a frame can show up more than once
+        :param FFMpegHelper ffmpeg: used to run the conversions
+        :param QtWidgets.QProgressBar qt_pg: gets the frames converted so far
+        '''
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        params = json.dumps(self.params(), sort_keys=True)
+        targets = {}
+        for path in frame_paths:
+            if path not in targets:
+                targets[path] = os.path.join(self.cache_dir, self._frame_key(path, params) + '.png')
+
+        todo = [(path, target) for path, target in targets.items() if not os.path.isfile(target)]
+        input_args, filter_args, cwd = self._filter_args(ffmpeg.capabilities)
+
+        if qt_pg:
+            qt_pg.setValue(0)
+            qt_pg.setMaximum(max(len(todo), 1))
+
+        with ffmpeg.tracer.span('ffmpeg.exr_predecode', frames=len(targets), converted=len(todo)):
+            done = [0]
+
+            def convert(item):
+                self._convert(ffmpeg, item[0], item[1], input_args, filter_args, cwd)
+                with self._lock:
+                    done[0] += 1
+                    if qt_pg:
+                        qt_pg.setValue(done[0])
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # NOTE: list() so the first failure is raised here
+                list(executor.map(convert, todo))
+
+        # NOTE: bump the cached frames so the ones in use are the last to be evicted
+        for target in targets.values():
+            os.utime(target, None)
+
+        self.evict(keep=set(targets.values()))
+        return [targets[path] for path in frame_paths]
+
+    def evict(self, keep=()):
+        '''
+        remove the least recently used frames until the cache fits in max_bytes
+
+        :param set keep: frames that must survive, ie the ones about to be encoded
+        '''
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        with self._lock:
+            entries = []
+            with os.scandir(self.cache_dir) as items:
+                for item in items:
+                    if item.name.endswith('.png') and not item.name.endswith('.tmp.png'):
+                        stat = item.stat()
+                        entries.append((stat.st_mtime, stat.st_size, item.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+
+                if path in keep:
+                    continue
+
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
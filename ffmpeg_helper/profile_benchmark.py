@@ -0,0 +1,111 @@
+'''
+profile_benchmark
+=================
+
+encodes the same synthetic sequence with every encode profile and reports frames per
+second and movie size, run it on the submission machines to pick the fastest profile
+that still looks good enough
+
+    python -m shot_grid_sub_2_dailies.ffmpeg_helper.profile_benchmark --frames 96 --size 2048x1080
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import argparse
+import json
+import os
+import shutil
+from tempfile import mkdtemp
+import time
+
+from shot_grid_sub_2_dailies.ffmpeg_helper import FFMpegHelper
+from shot_grid_sub_2_dailies.ffmpeg_helper.encode_profiles import PROFILES
+
+
+def benchmark_profiles(names=None, frames=48, size='1920x1080', frame_rate=24, segments=1, ffmpeg=None):
+    '''
+    encode a synthetic sequence once per profile
+
+    :param [str] names: profiles to measure, defaults to all the registered ones
+    :param int frames: length of the synthetic sequence
+    :param str size: width x height of the synthetic sequence
+    :param int frame_rate:
+    :param int segments: passed to image_list_to_mov, None uses one chunk per core
+    :param FFMpegHelper ffmpeg:
+    :return: one {"profile", "encoder", "frames", "seconds", "fps", "bytes"} dict per profile
+    '''
+    ffmpeg = ffmpeg or FFMpegHelper()
+    names = names or list(PROFILES)
+    root = mkdtemp(prefix='sub2d_bench_')
+
+    try:
+        first_frame = ffmpeg.render_test_sequence(os.path.join(root, 'plate', 'bench.%04d.jpg'),
+                                                  frames=frames,
+                                                  size=size,
+                                                  frame_rate=frame_rate)
+        results = []
+        for name in names:
+            output = os.path.join(root, 'movies', '%s.mov' % name)
+
+            start = time.perf_counter()
+            ffmpeg.image_list_to_mov(first_frame, output, frame_rate=frame_rate, codec=name, segments=segments)
+            seconds = time.perf_counter() - start
+
+            if not os.path.isfile(output):
+                raise RuntimeError('profile %s failed to encode' % name)
+
+            results.append({'profile': name,
+                            'encoder': ffmpeg._resolve_profile(name).codec,
+                            'frames': frames,
+                            'seconds': seconds,
+                            'fps': frames / seconds if seconds else 0.0,
+                            'bytes': os.path.getsize(output)})
+        return results
+
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def format_table(results):
+    '''
+    returns the results as a plain text table, fastest profile first
+
+    :param [dict] results: output of benchmark_profiles
+    '''
+    lines = ['%-16s %-12s %10s %10s %12s' % ('profile', 'encoder', 'fps', 'seconds', 'size (MB)')]
+    for result in sorted(results, key=lambda res: res['fps'], reverse=True):
+        lines.append('%-16s %-12s %10.1f %10.2f %12.2f' % (result['profile'],
+                                                           result['encoder'],
+                                                           result['fps'],
+                                                           result['seconds'],
+                                                           result['bytes'] / (1024.0 * 1024.0)))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='measure the encode speed and size of each encode profile')
+    parser.add_argument('profiles', nargs='*', help='profiles to measure, all of them by default')
+    parser.add_argument('--frames', type=int, default=48)
+    parser.add_argument('--size', default='1920x1080')
+    parser.add_argument('--frame-rate', type=int, default=24)
+    parser.add_argument('--segments', type=int, default=1, help='0 uses one chunk per core')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    results = benchmark_profiles(names=args.profiles,
+                                 frames=args.frames,
+                                 size=args.size,
+                                 frame_rate=args.frame_rate,
+                                 segments=args.segments or None)
+    print(format_table(results))
+
+    if args.json:
+        with open(args.json, 'w') as strm:
+            strm.write(json.dumps(results, indent=4))
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
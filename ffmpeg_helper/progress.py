@@ -0,0 +1,201 @@
+'''
+progress
+========
+
+parser for the key=value blocks ffmpeg writes with "-progress pipe:1", every block
+ends with a "progress=continue" or "progress=end" line and becomes one ProgressEvent
+
+    frame=120
+    fps=48.02
+    bitrate=5210.3kbits/s
+    total_size=1572912
+    out_time_us=5005000
+    speed=1.92x
+    progress=continue
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import time
+
+
+class ProgressEvent(object):
+    '''
+    snapshot of a running encode
+
+    :param int frame: frames written so far
+    :param float fps: encoding speed as reported by ffmpeg
+    :param float speed: encoding speed relative to real time ie 2.0 for twice as fast as play back
+    :param float out_time: seconds of movie written so far
+    :param float bitrate: kbits/s of the output so far
+    :param int total_size: bytes written so far
+    :param int total_frames: frames expected, None when unknown
+    :param float eta: estimated seconds left, None when it can't be estimated yet
+    :param bool done: True for the last event of the encode
+    '''
+    __slots__ = ('frame', 'fps', 'speed', 'out_time', 'bitrate', 'total_size', 'total_frames', 'eta', 'done')
+
+    def __init__(self,
+                 frame=0,
+                 fps=None,
+                 speed=None,
+                 out_time=None,
+                 bitrate=None,
+                 total_size=None,
+                 total_frames=None,
+                 eta=None,
+                 done=False):
+        self.frame = frame
+        self.fps = fps
+        self.speed = speed
+        self.out_time = out_time
+        self.bitrate = bitrate
+        self.total_size = total_size
+        self.total_frames = total_frames
+        self.eta = eta
+        self.done = done
+
+    def __repr__(self):
+        return '<ProgressEvent frame=%s/%s eta=%s done=%s>' % (self.frame, self.total_frames, self.eta, self.done)
+
+    @property
+    def percent(self):
+        if not self.total_frames:
+            return None
+
+        return min(100.0, 100.0 * self.frame / self.total_frames)
+
+
+def _to_float(value, suffix=''):
+    value = value.strip()
+    if suffix and value.endswith(suffix):
+        value = value[:-len(suffix)]
+
+    try:
+        return float(value)
+    except ValueError:
+        # NOTE: ffmpeg writes N/A until it has something to report
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value.strip())
+    except ValueError:
+        return None
+
+
+class ProgressTracker(object):
+    '''
+    turns frame counts into ProgressEvents with an eta and only passes them on to the
+    callback every min_interval seconds, the last event always gets through
+
+    :param int total_frames: frames expected, used for the eta
+    :param callable callback: gets each ProgressEvent that is let through
+    :param float min_interval: minimum seconds between two events
+    :param callable clock: time source, only replaced by the tests
+    '''
+
+    def __init__(self, total_frames=None, callback=None, min_interval=0.25, clock=time.monotonic):
+        self.total_frames = total_frames
+        self.min_interval = min_interval
+
+        self._callback = callback
+        self._clock = clock
+        self._start = clock()
+        self._last_emit = None
+        self.last_event = None
+
+    def _eta(self, frame, fps, now):
+        if not self.total_frames or frame <= 0:
+            return None
+
+        left = max(self.total_frames - frame, 0)
+
+        # NOTE: wall clock rate works for segmented encodes where no single ffmpeg knows the total
+        elapsed = now - self._start
+        rate = frame / elapsed if elapsed > 0 else fps
+        if not rate:
+            return None
+
+        return left / rate
+
+    def update(self, frame, done=False, **stats):
+        '''
+        record the progress and returns the event if it was passed on to the callback
+
+        :param int frame: frames done so far
+        :param bool done: True when the encode finished
+        :param stats: fps, speed, out_time, bitrate and total_size as found in ProgressEvent
+        '''
+        now = self._clock()
+        event = ProgressEvent(frame=frame,
+                              total_frames=self.total_frames,
+                              eta=0.0 if done else self._eta(frame, stats.get('fps'), now),
+                              done=done,
+                              **stats)
+        self.last_event = event
+
+        if not done and self._last_emit is not None and now - self._last_emit < self.min_interval:
+            return None
+
+        self._last_emit = now
+        if self._callback:
+            self._callback(event)
+
+        return event
+
+
+class ProgressParser(object):
+    '''
+    collects the key=value lines of ffmpeg -progress output and hands every complete
+    block to a ProgressTracker
+
+    :param ProgressTracker tracker:
+    '''
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self._block = {}
+
+    def feed(self, line):
+        '''
+        parse one line, returns the event when the line closed a block and the event was let through
+
+        :param str line:
+        '''
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return None
+
+        if key != 'progress':
+            self._block[key] = value
+            return None
+
+        block, self._block = self._block, {}
+
+        out_time = None
+        if 'out_time_us' in block or 'out_time_ms' in block:
+            # NOTE: both keys hold microseconds, out_time_ms is an old misnomer
+            micro = _to_int(block.get('out_time_us', block.get('out_time_ms', '')))
+            out_time = micro / 1e6 if micro is not None else None
+
+        total_size = _to_int(block.get('total_size', ''))
+
+        return self.tracker.update(_to_int(block.get('frame', '0')) or 0,
+                                   done=value.strip() == 'end',
+                                   fps=_to_float(block.get('fps', '')),
+                                   speed=_to_float(block.get('speed', ''), 'x'),
+                                   out_time=out_time,
+                                   bitrate=_to_float(block.get('bitrate', ''), 'kbits/s'),
+                                   total_size=total_size)
+
+    def read(self, stream):
+        '''
+        parse the stream until it is closed
+
+        :param stream: text stream ie the stdout of the ffmpeg process
+        '''
+        for line in stream:
+            self.feed(line)
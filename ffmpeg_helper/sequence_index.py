@@ -0,0 +1,243 @@
+'''
+sequence_index
+==============
+
+groups all the image sequences of a directory in a single os.scandir pass, the
+result is cached per directory and only rebuilt when the directory mtime changes
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from bisect import bisect_right
+from collections import OrderedDict
+import os
+import re
+from threading import Lock
+
+
+_FRAME_REGEX = re.compile(r'^(.*?)(\d+)(\.[^.]+)$')
+
+
+class ImageSequence(object):
+    '''
+    frames sharing the same prefix and extension inside a directory
+
+    :param str root: directory holding the frames
+    :param str prefix: file name before the frame number ie "box" for box0001.jpg
+    :param str ext: extension including the dot
+    :param int padding: width of the frame number, 0 when the numbers are not padded
+    :param dict files: frame number -> file name
+    :param int total_bytes: size of all the frames together
+    '''
+
+    def __init__(self, root, prefix, ext, padding, files, total_bytes):
+        self.root = root
+        self.prefix = prefix
+        self.ext = ext
+        self.padding = padding
+        self.total_bytes = total_bytes
+        self.frames = sorted(files)
+
+        self._files = files
+
+    def __repr__(self):
+        return '<ImageSequence %s [%d-%d]>' % (self.pattern, self.first_frame, self.last_frame)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def count(self):
+        return len(self.frames)
+
+    @property
+    def first_frame(self):
+        return self.frames[0]
+
+    @property
+    def last_frame(self):
+        return self.frames[-1]
+
+    @property
+    def gaps(self):
+        '''
+        frame numbers missing between the first and last frame
+        '''
+        if self.is_contiguous:
+            return []
+
+        present = set(self.frames)
+        return [frame for frame in range(self.first_frame, self.last_frame + 1) if frame not in present]
+
+    @property
+    def is_contiguous(self):
+        return self.last_frame - self.first_frame + 1 == len(self.frames)
+
+    @property
+    def frame_token(self):
+        '''
+        printf style token for the frame number ie %04d
+        '''
+        return '%%0%dd' % self.padding if self.padding else '%d'
+
+    @property
+    def pattern(self):
+        '''
+        printf style path of the sequence as used by ffmpeg's image2 demuxer
+        '''
+        return os.path.join(self.root, self.prefix + self.frame_token + self.ext)
+
+    @property
+    def first_path(self):
+        return self.path(self.first_frame)
+
+    def has_frame(self, frame):
+        return frame in self._files
+
+    def previous_frame(self, frame):
+        '''
+        returns the closest frame on disk at or before the given frame
+
+        :param int frame:
+        '''
+        index = bisect_right(self.frames, frame)
+        return self.frames[max(index - 1, 0)]
+
+    def path(self, frame):
+        '''
+        returns the path of the given frame
+
+        :param int frame:
+        '''
+        return os.path.join(self.root, self._files[frame])
+
+    def paths(self):
+        return [self.path(frame) for frame in self.frames]
+
+    def frame_string(self, frame):
+        '''
+        returns the frame number as it is written in the file name
+
+        :param int frame:
+        '''
+        return self._files[frame][len(self.prefix):-len(self.ext)]
+
+
+class SequenceIndex(object):
+    '''
+    per directory cache of the image sequences found on disk
+
+    :param int max_dirs: how many directories are kept in the cache
+    '''
+
+    def __init__(self, max_dirs=256):
+        self.max_dirs = max_dirs
+        self._dirs = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _dir_key(root):
+        return os.path.normcase(os.path.abspath(root))
+
+    @staticmethod
+    def _group_key(prefix, ext):
+        # NOTE: names only differing in case are different files on linux, only fold where the os does
+        return os.path.normcase(prefix), os.path.normcase(ext)
+
+    def scan(self, root):
+        '''
+        returns all the image sequences in the directory, repeated calls are free
+        until something is added, removed or renamed in it
+
+        :param str root:
+        '''
+        key = self._dir_key(root)
+        mtime = os.stat(root).st_mtime_ns
+
+        with self._lock:
+            cached = self._dirs.get(key)
+            if cached and cached[0] == mtime:
+                self._dirs.move_to_end(key)
+                return cached[1]
+
+        sequences = self._scan(root)
+
+        with self._lock:
+            self._dirs[key] = (mtime, sequences)
+            self._dirs.move_to_end(key)
+            while len(self._dirs) > self.max_dirs:
+                self._dirs.popitem(last=False)
+
+        return sequences
+
+    def invalidate(self, root=None):
+        with self._lock:
+            if root is None:
+                self._dirs.clear()
+            else:
+                self._dirs.pop(self._dir_key(root), None)
+
+    @staticmethod
+    def _scan(root):
+        groups = {}
+
+        with os.scandir(root) as entries:
+            for entry in entries:
+                match = _FRAME_REGEX.match(entry.name)
+                if not match or not entry.is_file():
+                    continue
+
+                prefix, frame_str, ext = match.groups()
+                group = groups.setdefault(SequenceIndex._group_key(prefix, ext), {'prefix': prefix,
+                                                                                  'ext': ext,
+                                                                                  'files': {},
+                                                                                  'widths': set(),
+                                                                                  'zero_led': False,
+                                                                                  'bytes': 0})
+                group['files'][int(frame_str)] = entry.name
+                group['widths'].add(len(frame_str))
+                group['zero_led'] = group['zero_led'] or (len(frame_str) > 1 and frame_str[0] == '0')
+                group['bytes'] += entry.stat().st_size
+
+        sequences = []
+        for key in sorted(groups):
+            group = groups[key]
+
+            # NOTE: padded numbers have a fixed width or leading zeros, anything else is unpadded
+            if len(group['widths']) == 1 or group['zero_led']:
+                padding = min(group['widths'])
+            else:
+                padding = 0
+
+            sequences.append(ImageSequence(root,
+                                           group['prefix'],
+                                           group['ext'],
+                                           padding,
+                                           group['files'],
+                                           group['bytes']))
+
+        return sequences
+
+    def find(self, path):
+        '''
+        returns the sequence the given frame belongs to
+
+        :param str path: path to any frame of the sequence
+        '''
+        root, base = os.path.split(path)
+        match = _FRAME_REGEX.match(base)
+        if not match:
+            raise ValueError('%s is not part of an input_image sequence (no padding)' % path)
+
+        prefix, _, ext = match.groups()
+        key = self._group_key(prefix, ext)
+        for sequence in self.scan(root or '.'):
+            if self._group_key(sequence.prefix, sequence.ext) == key:
+                return sequence
+
+        raise ValueError('Could not determine input_image list from path %s' % path)
+
+
+# NOTE: shared by all the FFMpegHelpers so each directory is only scanned once per change
+SEQUENCE_INDEX = SequenceIndex()
@@ -1,7 +1,9 @@
 from glob import glob
 import os
+import shutil
 from shot_grid_sub_2_dailies.ffmpeg_helper import FFMpegHelper
-from tempfile import gettempdir
+from shot_grid_sub_2_dailies.ffmpeg_helper.capabilities import FFMpegCapabilities
+from tempfile import gettempdir, mkdtemp
 import unittest
 
 
@@ -31,6 +33,132 @@ class FFMpegHelperTest(unittest.TestCase):
 
         self.assertTrue(os.path.isfile(self._mov_output))
 
+    def test_image_list_to_mov_segmented(self):
+        self.assertFalse(os.path.isfile(self._mov_output))
+
+        sfiles = os.path.join(os.path.dirname(__file__),
+                              'test_files',
+                              'image_seq',
+                              'box*.jpg')
+
+        files = glob(sfiles)
+        self._ffmpeg.min_frames_per_segment = 2
+        self._ffmpeg.image_list_to_mov_segmented(files[0],
+                                                 self._mov_output,
+                                                 segments=3)
+
+        self.assertTrue(os.path.isfile(self._mov_output))
+        self.assertListEqual(glob(os.path.join(os.path.dirname(self._mov_output), 'segments_*')), [])
+
+    def test_image_list_to_mov_segmented_cleanup(self):
+        root = mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+
+        def broken_filters(scale=False, lut_3d=None):
+            raise ValueError('bad lut %s' % lut_3d)
+
+        image = os.path.join(os.path.dirname(__file__), 'test_files', 'image_seq', 'box0000.jpg')
+        self._ffmpeg.min_frames_per_segment = 2
+        self._ffmpeg._filter_chain = broken_filters
+
+        with self.assertRaises(ValueError):
+            self._ffmpeg.image_list_to_mov_segmented(image, os.path.join(root, 'review.mov'), segments=3)
+
+        # NOTE: a failure while the commands are built still removes the segments folder
+        self.assertListEqual(os.listdir(root), [])
+
+    def test_image_list_to_mov_segmented_hardware(self):
+        root = mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+
+        cmds = []
+
+        def fake_encode(cmd, workdir, output, frames=None, qt_pg=None, on_progress=None):
+            cmds.append(cmd)
+            return 0
+
+        image = os.path.join(os.path.dirname(__file__), 'test_files', 'image_seq', 'box0000.jpg')
+        self._ffmpeg.min_frames_per_segment = 2
+        self._ffmpeg._exe_path = 'ffmpeg'
+        self._ffmpeg._capabilities = FFMpegCapabilities('ffmpeg', '6.0', ['libx264', 'h264_nvenc'], [],
+                                                        working_encoders=['h264_nvenc'])
+        self._ffmpeg._encode = fake_encode
+
+        self._ffmpeg.image_list_to_mov_segmented(image, os.path.join(root, 'review.mov'),
+                                                 segments=3, codec='dailies-fast')
+
+        # NOTE: a gpu encoder gets the whole sequence in one session
+        self.assertEqual(len(cmds), 1)
+        self.assertIn('h264_nvenc', cmds[0])
+
+    def test_image_list_to_mov_segmented_plans_once(self):
+        root = mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+
+        plans = []
+        plan_frame_list = self._ffmpeg._plan_frame_list
+
+        def counted_plan(*args, **kwargs):
+            plans.append(args)
+            return plan_frame_list(*args, **kwargs)
+
+        image = os.path.join(os.path.dirname(__file__), 'test_files', 'image_seq', 'box0000.jpg')
+        self._ffmpeg._exe_path = 'ffmpeg'
+        self._ffmpeg._capabilities = FFMpegCapabilities('ffmpeg', '6.0', ['libx264'], [])
+        self._ffmpeg._encode = lambda cmd, workdir, output, **kwargs: 0
+        self._ffmpeg._plan_frame_list = counted_plan
+
+        # NOTE: too few frames for more than one chunk, falls back to a single encode
+        self._ffmpeg.image_list_to_mov_segmented(image, os.path.join(root, 'review.mov'), segments=3)
+
+        self.assertEqual(len(plans), 1)
+
+    def test_image_list_to_mov_extras(self):
+        root = mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+
+        image = os.path.join(os.path.dirname(__file__), 'test_files', 'image_seq', 'box0000.jpg')
+        thumbnail = os.path.join(root, 'thumbnail.jpg')
+        filmstrip = os.path.join(root, 'filmstrip.jpg')
+
+        self._ffmpeg.min_frames_per_segment = 2
+        for segments in (1, 3):
+            self._ffmpeg.image_list_to_mov(image,
+                                           os.path.join(root, 'review_%d.mov' % segments),
+                                           segments=segments,
+                                           thumbnail=thumbnail,
+                                           filmstrip=filmstrip)
+
+            self.assertTrue(os.path.isfile(os.path.join(root, 'review_%d.mov' % segments)))
+            self.assertTrue(os.path.isfile(thumbnail))
+            self.assertTrue(os.path.isfile(filmstrip))
+
+            os.unlink(thumbnail)
+            os.unlink(filmstrip)
+
+    def test_sequence_frame_paths(self):
+        image = os.path.join(os.path.dirname(__file__), 'test_files', 'image_seq', 'box0000.jpg')
+        sequence = self._ffmpeg.get_image_sequence(image)
+
+        paths = self._ffmpeg.sequence_frame_paths(sequence, frame_step=2)
+        self.assertListEqual(paths, [sequence.path(frame) for frame in sequence.frames[::2]])
+
+    def test_image_list_to_mov_gapped(self):
+        seq_root = mkdtemp()
+        self.addCleanup(shutil.rmtree, seq_root)
+        output = os.path.join(seq_root, 'review', 'gapped.mov')
+
+        source = os.path.join(os.path.dirname(__file__), 'test_files', 'image_seq')
+        for frame in (0, 1, 2, 5, 6):
+            shutil.copy(os.path.join(source, 'box%04d.jpg' % frame), seq_root)
+
+        self._ffmpeg.image_list_to_mov(os.path.join(seq_root, 'box0000.jpg'),
+                                       output,
+                                       hold_missing=True)
+
+        self.assertTrue(os.path.isfile(output))
+        self.assertListEqual(glob(os.path.join(seq_root, 'review', 'frames_*')), [])
+
     def test_gen_image_sequence_data_from_file(self):
         image = os.path.join(os.path.dirname(__file__), r'test_files\image_seq\box0004.jpg')
         fimage = os.path.join(os.path.dirname(__file__), r'test_files\image_seq\box0000.jpg')
@@ -0,0 +1,79 @@
+import os
+import shutil
+from shot_grid_sub_2_dailies.ffmpeg_helper import capabilities
+from shot_grid_sub_2_dailies.ffmpeg_helper.encode_profiles import get_profile
+from tempfile import mkdtemp
+import unittest
+from unittest import mock
+
+
+_ENCODERS = '''Encoders:
+ V..... = Video
+ A..... = Audio
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (codec h264)
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ V....D mjpeg                MJPEG (Motion JPEG)
+'''
+
+_FILTERS = '''Filters:
+  T.. = Timeline support
+  ... = Source or sink filter
+ TSC hstack            N->V       Stack video inputs horizontally.
+ ... split             V->N       Pass on the input to N video outputs.
+ T.. tile              V->V       Tile several successive frames together.
+'''
+
+
+class CapabilitiesTest(unittest.TestCase):
+    def setUp(self):
+        self._root = mkdtemp()
+        self._exe = os.path.join(self._root, 'ffmpeg')
+        with open(self._exe, 'w') as strm:
+            strm.write('fake')
+
+        capabilities._MEMO.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self._root)
+
+    def test_parse(self):
+        self.assertListEqual(capabilities._parse_names(_ENCODERS, capabilities._ENCODER_REGEX),
+                             ['libx264', 'h264_nvenc', 'mjpeg'])
+        self.assertListEqual(capabilities._parse_names(_FILTERS, capabilities._FILTER_REGEX),
+                             ['hstack', 'split', 'tile'])
+        self.assertEqual(capabilities._parse_version('ffmpeg version 4.4.2-0ubuntu0.22.04.1 Copyright'),
+                         '4.4.2-0ubuntu0.22.04.1')
+
+    def test_probe_cached_on_disk(self):
+        caps = capabilities.FFMpegCapabilities(self._exe, '4.4', ['libx264', 'h264_nvenc'], ['split'])
+        cache_dir = os.path.join(self._root, 'cache')
+
+        with mock.patch.object(capabilities, '_run_probe', return_value=caps) as run_probe:
+            capabilities.probe_capabilities(self._exe, cache_dir=cache_dir)
+            capabilities._MEMO.clear()
+            probed = capabilities.probe_capabilities(self._exe, cache_dir=cache_dir)
+            self.assertEqual(run_probe.call_count, 1)
+
+            # NOTE: a new binary gets probed again
+            with open(self._exe, 'w') as strm:
+                strm.write('a newer fake')
+            capabilities.probe_capabilities(self._exe, cache_dir=cache_dir)
+            self.assertEqual(run_probe.call_count, 2)
+
+        self.assertEqual(probed.version, '4.4')
+        self.assertTrue(probed.has_filter('split'))
+        # NOTE: listed but never passed the test encode
+        self.assertFalse(probed.has_encoder('h264_nvenc'))
+
+    def test_profile_alternatives(self):
+        cpu = capabilities.FFMpegCapabilities(self._exe, '4.4', ['libx264', 'h264_nvenc'], [])
+        gpu = capabilities.FFMpegCapabilities(self._exe, '4.4', ['libx264', 'h264_nvenc'], [], ['h264_nvenc'])
+
+        self.assertEqual(get_profile('dailies-fast').resolve(cpu).codec, 'libx264')
+        self.assertEqual(get_profile('dailies-fast').resolve(gpu).codec, 'h264_nvenc')
+        self.assertEqual(get_profile('final').resolve(gpu).codec, 'libx264')
+
+
+if __name__ == '__main__':
+    unittest.main()
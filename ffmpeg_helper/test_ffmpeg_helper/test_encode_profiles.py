@@ -0,0 +1,24 @@
+from shot_grid_sub_2_dailies.ffmpeg_helper.encode_profiles import EncodeProfile, get_profile
+import unittest
+
+
+class EncodeProfilesTest(unittest.TestCase):
+    def test_legacy_codec_names(self):
+        self.assertListEqual(get_profile('h264').args(),
+                             ['-c:v', 'libx264', '-preset', 'slow', '-crf', '18', '-pix_fmt', 'yuv420p'])
+        self.assertListEqual(get_profile('MJPEG').args(), ['-c:v', 'mjpeg', '-qscale', '1'])
+
+    def test_threads(self):
+        self.assertListEqual(get_profile('preview').args(threads=4)[-2:], ['-threads', '4'])
+
+        profile = EncodeProfile('pinned', preset='fast', crf=22, threads=2)
+        self.assertIs(get_profile(profile), profile)
+        self.assertListEqual(profile.args(threads=8)[-2:], ['-threads', '2'])
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            get_profile('prores')
+
+
+if __name__ == '__main__':
+    unittest.main()
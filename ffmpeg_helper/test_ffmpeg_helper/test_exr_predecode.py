@@ -0,0 +1,89 @@
+import os
+import shutil
+from shot_grid_sub_2_dailies.ffmpeg_helper.capabilities import FFMpegCapabilities
+from shot_grid_sub_2_dailies.ffmpeg_helper.exr_predecode import ExrPredecoder
+from shot_grid_sub_2_dailies.tracing import Tracer
+from tempfile import mkdtemp
+import unittest
+
+
+class _FakeFFMpeg(object):
+    '''
+    writes the output of each command instead of running ffmpeg
+    '''
+    _exe = 'ffmpeg'
+
+    def __init__(self, filters=()):
+        self.tracer = Tracer()
+        self.capabilities = FFMpegCapabilities('ffmpeg', '6.0', ['libx264'], filters)
+        self.cmds = []
+
+    def _launch_and_track(self, cmd, workdir, qt_pg=None):
+        self.cmds.append(cmd)
+        with open(cmd[-1], 'wb') as strm:
+            strm.write(b'png')
+        return 0
+
+
+class ExrPredecodeTest(unittest.TestCase):
+    def setUp(self):
+        self._root = mkdtemp()
+        self._ffmpeg = _FakeFFMpeg()
+        self._predecoder = ExrPredecoder(cache_dir=os.path.join(self._root, 'cache'),
+                                         workers=2,
+                                         layer='beauty',
+                                         exposure=1.0)
+        self._frames = []
+        for frame in (1, 2, 3):
+            path = os.path.join(self._root, 'plate.%04d.exr' % frame)
+            with open(path, 'wb') as strm:
+                strm.write(b'exr')
+            self._frames.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self._root)
+
+    def test_decode(self):
+        # NOTE: held frames show up twice but are only converted once
+        frames = self._frames + [self._frames[-1]]
+        pngs = self._predecoder.decode(frames, self._ffmpeg)
+
+        self.assertEqual(len(pngs), 4)
+        self.assertEqual(pngs[2], pngs[3])
+        self.assertEqual(len(self._ffmpeg.cmds), 3)
+        self.assertTrue(all(os.path.isfile(png) for png in pngs))
+
+        cmd = self._ffmpeg.cmds[0]
+        self.assertEqual(cmd[cmd.index('-layer') + 1], 'beauty')
+        self.assertIn('colorchannelmixer', cmd[cmd.index('-vf') + 1])
+        self.assertIn('-apply_trc', cmd)
+
+    def test_linear_exposure(self):
+        ffmpeg = _FakeFFMpeg(filters=['zscale'])
+        self._predecoder.decode(self._frames, ffmpeg)
+
+        # NOTE: the gain is a full stop on the linear pixels, the sRGB curve comes after it
+        cmd = ffmpeg.cmds[0]
+        filters = cmd[cmd.index('-vf') + 1].split(',')
+        self.assertNotIn('-apply_trc', cmd)
+        self.assertListEqual(filters[:3], ['format=gbrpf32le',
+                                           'colorchannelmixer=rr=2.000000:gg=2.000000:bb=2.000000',
+                                           'zscale=transferin=linear:transfer=iec61966-2-1'])
+
+    def test_only_changed_frames(self):
+        self._predecoder.decode(self._frames, self._ffmpeg)
+
+        with open(self._frames[1], 'wb') as strm:
+            strm.write(b'new exr')
+
+        self._predecoder.decode(self._frames, self._ffmpeg)
+        self.assertEqual(len(self._ffmpeg.cmds), 4)
+
+        # NOTE: new settings mean new frames
+        self._predecoder.exposure = 0.0
+        self._predecoder.decode(self._frames, self._ffmpeg)
+        self.assertEqual(len(self._ffmpeg.cmds), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+from shot_grid_sub_2_dailies.ffmpeg_helper.progress import ProgressParser, ProgressTracker
+import unittest
+
+
+_BLOCK = '''frame=%d
+fps=25.00
+bitrate=5210.3kbits/s
+total_size=%d
+out_time_us=%d
+speed=1.50x
+progress=%s
+'''
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ProgressParserTest(unittest.TestCase):
+    def setUp(self):
+        self._clock = _Clock()
+        self._events = []
+        self._tracker = ProgressTracker(total_frames=100,
+                                        callback=self._events.append,
+                                        min_interval=1.0,
+                                        clock=self._clock)
+        self._parser = ProgressParser(self._tracker)
+
+    def _feed(self, frame, state='continue'):
+        for line in (_BLOCK % (frame, frame * 1000, frame * 40000, state)).splitlines():
+            self._parser.feed(line)
+
+    def test_event_fields(self):
+        self._clock.now = 2.0
+        self._feed(50)
+
+        event = self._events[-1]
+        self.assertEqual(event.frame, 50)
+        self.assertEqual(event.fps, 25.0)
+        self.assertEqual(event.speed, 1.5)
+        self.assertEqual(event.bitrate, 5210.3)
+        self.assertEqual(event.total_size, 50000)
+        self.assertAlmostEqual(event.out_time, 2.0)
+        self.assertAlmostEqual(event.eta, 2.0)
+        self.assertEqual(event.percent, 50.0)
+        self.assertFalse(event.done)
+
+    def test_coalescing(self):
+        self._clock.now = 0.1
+        self._feed(10)
+        self._clock.now = 0.5
+        self._feed(20)
+        self._clock.now = 0.6
+        self._feed(100, state='end')
+
+        self.assertListEqual([event.frame for event in self._events], [10, 100])
+        self.assertTrue(self._events[-1].done)
+        self.assertEqual(self._events[-1].eta, 0.0)
+
+    def test_not_available(self):
+        self._parser.feed('frame=0')
+        self._parser.feed('fps=0.00')
+        self._parser.feed('bitrate=N/A')
+        self._parser.feed('out_time_us=N/A')
+        self._parser.feed('progress=continue')
+
+        event = self._events[-1]
+        self.assertIsNone(event.bitrate)
+        self.assertIsNone(event.out_time)
+        self.assertIsNone(event.eta)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import shutil
+from shot_grid_sub_2_dailies.ffmpeg_helper.sequence_index import SequenceIndex
+from tempfile import mkdtemp
+import unittest
+
+
+class SequenceIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._root = mkdtemp()
+        self._index = SequenceIndex()
+
+        for frame in (1001, 1002, 1004):
+            self._touch('beauty.%04d.exr' % frame, size=10)
+
+        for frame in (8, 9, 10, 11):
+            self._touch('shot_v2_%d.jpg' % frame)
+
+        self._touch('notes.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self._root)
+
+    def _touch(self, name, size=1):
+        with open(os.path.join(self._root, name), 'wb') as strm:
+            strm.write(b'x' * size)
+
+    def test_scan(self):
+        sequences = self._index.scan(self._root)
+        self.assertListEqual([seq.prefix for seq in sequences], ['beauty.', 'shot_v2_'])
+
+        beauty, shot = sequences
+        self.assertEqual(beauty.padding, 4)
+        self.assertEqual(beauty.first_frame, 1001)
+        self.assertEqual(beauty.last_frame, 1004)
+        self.assertListEqual(beauty.gaps, [1003])
+        self.assertEqual(beauty.total_bytes, 30)
+        self.assertEqual(beauty.pattern, os.path.join(self._root, 'beauty.%04d.exr'))
+
+        self.assertEqual(shot.padding, 0)
+        self.assertTrue(shot.is_contiguous)
+        self.assertEqual(shot.pattern, os.path.join(self._root, 'shot_v2_%d.jpg'))
+
+    def test_find(self):
+        sequence = self._index.find(os.path.join(self._root, 'beauty.1002.exr'))
+        self.assertEqual(sequence.first_path, os.path.join(self._root, 'beauty.1001.exr'))
+        self.assertEqual(sequence.frame_string(1001), '1001')
+
+        with self.assertRaises(ValueError):
+            self._index.find(os.path.join(self._root, 'notes.txt'))
+
+    @unittest.skipIf(os.path.normcase('A') == 'a', 'file names are case insensitive')
+    def test_case_sensitive(self):
+        self._touch('plate.0001.EXR')
+        self._touch('plate.0002.exr')
+
+        # NOTE: ffmpeg can't read plate.%04d.EXR as one sequence, they are two
+        sequence = self._index.find(os.path.join(self._root, 'plate.0002.exr'))
+        self.assertEqual(sequence.ext, '.exr')
+        self.assertListEqual(sequence.frames, [2])
+        self.assertEqual(len(self._index.scan(self._root)), 4)
+
+    def test_missing_frames(self):
+        beauty = self._index.scan(self._root)[0]
+        self.assertTrue(beauty.has_frame(1002))
+        self.assertFalse(beauty.has_frame(1003))
+        self.assertEqual(beauty.previous_frame(1003), 1002)
+        self.assertEqual(beauty.previous_frame(1004), 1004)
+
+    def test_cache(self):
+        first = self._index.scan(self._root)
+        self.assertIs(first, self._index.scan(self._root))
+
+        # NOTE: adding a frame changes the directory mtime so it gets indexed again
+        stat = os.stat(self._root)
+        self._touch('beauty.1003.exr')
+        os.utime(self._root, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        beauty = self._index.scan(self._root)[0]
+        self.assertTrue(beauty.is_contiguous)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,617 @@
+'''
+job_queue
+=========
+
+durable queue of submissions shared by the dialog, the command line and the workers, the
+jobs live in a SQLite file so closing the dialog or a crash mid encode never loses them and
+one workstation can drain the dailies of a whole department
+
+    python -m shot_grid_sub_2_dailies.job_queue enqueue --task 1234 --comment "first pass" /renders/sh010.1001.exr
+    python -m shot_grid_sub_2_dailies.job_queue work --encode-slots 2 --upload-slots 4
+    python -m shot_grid_sub_2_dailies.job_queue status
+
+a job goes queued -> encoding -> encoded -> uploading -> done, failures are retried with a
+growing delay and end up failed after max_attempts, workers that died leave their jobs in
+encoding or uploading and recover() hands those back to the queue
+
+everybody submitting to the queue needs write access to the database, the file and its
+-wal/-shm companions are created group writable, for a department point SUB2D_QUEUE at a
+folder owned by the department group with the setgid bit set so the files get that group
+
+    mkdir -m 2775 /shared/sub2d && chgrp dailies /shared/sub2d
+    export SUB2D_QUEUE=/shared/sub2d/queue.sqlite
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import argparse
+from contextlib import contextmanager
+import getpass
+import json
+from logging import getLogger
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import stat
+from tempfile import gettempdir
+from threading import Event, Thread
+import time
+
+from shot_grid_sub_2_dailies.chunked_upload import UploadInterruptedError
+from shot_grid_sub_2_dailies.workspace import _pid_alive
+
+
+QUEUED = 'queued'
+ENCODING = 'encoding'
+ENCODED = 'encoded'
+UPLOADING = 'uploading'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+STATES = (QUEUED, ENCODING, ENCODED, UPLOADING, DONE, FAILED, CANCELLED)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    state TEXT NOT NULL,
+    task TEXT NOT NULL,
+    media_path TEXT NOT NULL,
+    comment TEXT NOT NULL,
+    profile TEXT,
+    submitter TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    not_before REAL NOT NULL DEFAULT 0,
+    owner TEXT,
+    workspace TEXT,
+    movie_path TEXT,
+    version TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, not_before, priority);
+'''
+
+_JSON_COLUMNS = ('task', 'version')
+
+
+def _owner():
+    return '%s:%d' % (socket.gethostname(), os.getpid())
+
+
+def _owner_alive(owner):
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname():
+        # NOTE: can't tell for other machines, their own worker recovers them
+        return True
+
+    try:
+        return _pid_alive(int(pid))
+    except ValueError:
+        return False
+
+
+def default_path():
+    '''
+    returns the queue database used when none is given, SUB2D_QUEUE or sub2d_queue.sqlite in the temp folder
+    '''
+    return os.environ.get('SUB2D_QUEUE') or os.path.join(gettempdir(), 'sub2d_queue.sqlite')
+
+
+class JobQueue(object):
+    '''
+    SQLite backed job queue, every call opens its own connection so it can be used from
+    any thread and from many processes at once
+
+    :param str path: database file, defaults to SUB2D_QUEUE or sub2d_queue.sqlite in the temp folder
+    :param float retry_delay: seconds before the first retry, doubled on every attempt
+    '''
+
+    def __init__(self, path=None, retry_delay=30.0):
+        self.path = path or default_path()
+        self.retry_delay = retry_delay
+        self.log = getLogger('Sub2D_JobQueue')
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+            self._share(folder, stat.S_IRWXG)
+
+        self._create_database()
+        with self._connect() as conn:
+            # NOTE: readers don't block the writer, status queries stay fast while workers update jobs
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+        # NOTE: SQLite gives the -wal/-shm files the mode of the database, these only matter for old files
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                self._share(self.path + suffix, stat.S_IRGRP | stat.S_IWGRP)
+
+    def _share(self, path, bits):
+        '''
+        add the group permission bits to a file or folder we own, the umask strips them on creation
+        '''
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+            if mode & bits != bits:
+                os.chmod(path, mode | bits)
+        except OSError as msg:
+            # NOTE: somebody else's file, they had to share it
+            self.log.debug('could not share %s: %s' % (path, msg))
+
+    def _create_database(self):
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o664)
+        except FileExistsError:
+            return
+
+        os.close(fd)
+        self._share(self.path, stat.S_IRGRP | stat.S_IWGRP)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            # NOTE: take the write lock up front so two workers never claim the same job
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+
+        job = dict(row)
+        for key in _JSON_COLUMNS:
+            if job[key] is not None:
+                job[key] = json.loads(job[key])
+        return job
+
+    def enqueue(self, task_ent, media_path, comment, profile=None, priority=0, max_attempts=3, submitter=None):
+        '''
+        add a submission and returns its job id
+
+        :param dict task_ent: Task with "project", "entity" and "cached_display_name"
+        :param str media_path: any frame of the sequence
+        :param str comment: Version description
+        :param str profile: encode profile name, None uses Sub2DAPI.encode_profile
+        :param int priority: higher runs first
+        :param int max_attempts: tries before the job is marked failed
+        :param str submitter: who asked for it, defaults to the login of the current user
+        '''
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute('INSERT INTO jobs (state, task, media_path, comment, profile, submitter, priority, '
+                                  'max_attempts, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                  (QUEUED, json.dumps(task_ent), os.path.abspath(media_path), comment, profile,
+                                   submitter or getpass.getuser(), priority, max_attempts, now, now))
+            return cursor.lastrowid
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            return self._to_dict(conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone())
+
+    def jobs(self, states=None, limit=None):
+        '''
+        returns the jobs, newest first
+
+        :param [str] states: only the jobs in these states
+        :param int limit:
+        '''
+        query = 'SELECT * FROM jobs'
+        args = []
+        if states:
+            query += ' WHERE state IN (%s)' % ', '.join('?' * len(states))
+            args.extend(states)
+        query += ' ORDER BY id DESC'
+        if limit:
+            query += ' LIMIT %d' % limit
+
+        with self._connect() as conn:
+            return [self._to_dict(row) for row in conn.execute(query, args)]
+
+    def counts(self):
+        '''
+        returns {state: number of jobs}
+        '''
+        counts = dict.fromkeys(STATES, 0)
+        with self._connect() as conn:
+            for row in conn.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state'):
+                counts[row[0]] = row[1]
+        return counts
+
+    def claim(self, state, next_state):
+        '''
+        atomically take the next ready job in the given state, returns None when there is none
+
+        :param str state: QUEUED or ENCODED
+        :param str next_state: ENCODING or UPLOADING
+        '''
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE state = ? AND not_before <= ? '
+                               'ORDER BY priority DESC, id ASC LIMIT 1', (state, now)).fetchone()
+            if row is None:
+                return None
+
+            conn.execute('UPDATE jobs SET state = ?, owner = ?, updated = ? WHERE id = ?',
+                         (next_state, _owner(), now, row['id']))
+
+        job = self._to_dict(row)
+        job['state'] = next_state
+        return job
+
+    def update(self, job_id, **values):
+        '''
+        set columns of a job, task and version are stored as json
+        '''
+        values['updated'] = time.time()
+        for key in _JSON_COLUMNS:
+            if key in values and values[key] is not None:
+                values[key] = json.dumps(values[key])
+
+        columns = sorted(values)
+        with self._connect() as conn:
+            conn.execute('UPDATE jobs SET %s WHERE id = ?' % ', '.join('%s = ?' % column for column in columns),
+                         [values[column] for column in columns] + [job_id])
+
+    def fail(self, job, error, retry_state=None):
+        '''
+        record a failed attempt, the job goes back to retry_state after a delay or to FAILED
+        once it used all its attempts
+
+        :param dict job:
+        :param str error:
+        :param str retry_state: QUEUED or ENCODED, None fails the job right away
+        :return: the new state
+        '''
+        attempts = job['attempts'] + 1
+        if retry_state is None or attempts >= job['max_attempts']:
+            state = FAILED
+            not_before = 0
+        else:
+            state = retry_state
+            not_before = time.time() + self.retry_delay * 2 ** (attempts - 1)
+
+        self.update(job['id'], state=state, attempts=attempts, not_before=not_before, error=error, owner=None)
+        return state
+
+    def retry(self, job_id):
+        '''
+        put a failed or cancelled job back in the queue with fresh attempts
+        '''
+        job = self.get(job_id)
+        if job is None:
+            raise ValueError('there is no job %s' % job_id)
+
+        if job['state'] not in (FAILED, CANCELLED):
+            raise ValueError('job %s is %s, only failed or cancelled jobs can be retried' % (job_id, job['state']))
+
+        state = ENCODED if job['movie_path'] and os.path.isfile(job['movie_path']) else QUEUED
+        self.update(job_id, state=state, attempts=0, not_before=0, error=None)
+
+    def cancel(self, job_id):
+        '''
+        cancel a job that no worker picked up yet
+        '''
+        with self._transaction() as conn:
+            row = conn.execute('SELECT state FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                raise ValueError('there is no job %s' % job_id)
+
+            if row['state'] not in (QUEUED, ENCODED, FAILED):
+                raise ValueError('job %s is %s and can not be cancelled' % (job_id, row['state']))
+
+            conn.execute('UPDATE jobs SET state = ?, updated = ? WHERE id = ?', (CANCELLED, time.time(), job_id))
+
+    def recover(self):
+        '''
+        hand the jobs of dead workers on this machine back to the queue, encodes start over
+        and uploads resume from the movie that was already encoded
+
+        :return: ids of the recovered jobs
+        '''
+        recovered = []
+        with self._transaction() as conn:
+            rows = conn.execute('SELECT id, state, owner, movie_path FROM jobs WHERE state IN (?, ?)',
+                                (ENCODING, UPLOADING)).fetchall()
+            for row in rows:
+                if _owner_alive(row['owner']):
+                    continue
+
+                if row['state'] == UPLOADING and row['movie_path'] and os.path.isfile(row['movie_path']):
+                    state = ENCODED
+                else:
+                    state = QUEUED
+
+                conn.execute('UPDATE jobs SET state = ?, owner = NULL, updated = ? WHERE id = ?',
+                             (state, time.time(), row['id']))
+                recovered.append(row['id'])
+
+        if recovered:
+            self.log.info('recovered jobs %s' % recovered)
+        return recovered
+
+
+class JobWorker(object):
+    '''
+    drains a JobQueue with a pool of encode and upload threads
+
+    :param Sub2DAPI api: used to encode, create the Versions and upload
+    :param JobQueue queue:
+    :param int encode_slots: encodes running at the same time
+    :param int upload_slots: uploads running at the same time
+    :param int backlog: encoders wait while this many movies are waiting for an upload, keeps
+                        the scratch disk usage bounded
+    :param float poll_interval: seconds an idle slot waits before looking for work again
+    '''
+
+    def __init__(self, api, queue, encode_slots=2, upload_slots=4, backlog=4, poll_interval=2.0):
+        self.encode_slots = encode_slots
+        self.upload_slots = upload_slots
+        self.backlog = backlog
+        self.poll_interval = poll_interval
+
+        self._api = api
+        self._queue = queue
+        self._stop = Event()
+        self._wake = Event()
+        self.log = getLogger('Sub2D_JobWorker')
+
+    def _encode_segments(self):
+        # NOTE: the encode slots run side by side so each one gets its share of the cores
+        return max(1, (os.cpu_count() or 1) // max(self.encode_slots, 1))
+
+    def encode_one(self):
+        '''
+        encode the next queued job, returns False when there was nothing to do
+        '''
+        if self._queue.counts()[ENCODED] >= self.backlog:
+            return False
+
+        job = self._queue.claim(QUEUED, ENCODING)
+        if job is None:
+            return False
+
+        workspace = None
+        try:
+            self._api._validate_task(job['task'])
+            self._api._validate_media(job['media_path'])
+
+            # NOTE: kept so the movie survives a crash of this process until the upload is done
+            workspace = self._api.workspaces.create('queue')
+            workspace.keep()
+            movie_path = self._api._encode_review_media(job['media_path'],
+                                                        workspace.file('review.mov'),
+                                                        segments=self._encode_segments(),
+                                                        profile=job['profile'])
+        except (ValueError, NotImplementedError) as msg:
+            self._discard(workspace)
+            self._queue.fail(job, str(msg))
+            return True
+        except Exception as msg:
+            self.log.error('failed to encode job %d: %s' % (job['id'], msg))
+            self._discard(workspace)
+            self._queue.fail(job, str(msg), retry_state=QUEUED)
+            return True
+
+        self._queue.update(job['id'], state=ENCODED, owner=None, movie_path=movie_path,
+                           workspace=workspace.path, error=None)
+        self._wake.set()
+        return True
+
+    def upload_one(self):
+        '''
+        upload the next encoded job, returns False when there was nothing to do
+        '''
+        job = self._queue.claim(ENCODED, UPLOADING)
+        if job is None:
+            return False
+
+        if not job['movie_path'] or not os.path.isfile(job['movie_path']):
+            # NOTE: the scratch folder got collected, encode again
+            self._queue.update(job['id'], state=QUEUED, owner=None, movie_path=None, workspace=None)
+            return True
+
+        try:
+            sg_version = job['version']
+            if not sg_version:
+                sg_version = self._api.make_version_for_task(job['task'],
+                                                             self._api._get_version_base_name(job['task']),
+                                                             job['comment'])
+                # NOTE: stored right away so a retry or a crash never makes a second Version
+                self._queue.update(job['id'], version=sg_version)
+
+            self._api._upload_version_movie(sg_version, job['movie_path'])
+        except UploadInterruptedError as msg:
+            # NOTE: the Version and the partial upload are kept, the next attempt resumes it
+            self.log.error('upload of job %d interrupted: %s' % (job['id'], msg))
+            self._queue.fail(job, str(msg), retry_state=ENCODED)
+            return True
+        except Exception as msg:
+            # NOTE: any other failure drops the Version so the retry starts from a clean one
+            self.log.error('failed to upload job %d: %s' % (job['id'], msg))
+            if sg_version:
+                try:
+                    self._api._delete_version(sg_version)
+                except Exception:
+                    # NOTE: _upload_version_movie already deleted it
+                    pass
+            self._queue.update(job['id'], version=None)
+            self._queue.fail(job, str(msg), retry_state=ENCODED)
+            return True
+
+        self._queue.update(job['id'], state=DONE, owner=None, error=None)
+        self._discard(job['workspace'])
+        return True
+
+    @staticmethod
+    def _discard(workspace):
+        if workspace is None:
+            return
+
+        shutil.rmtree(getattr(workspace, 'path', workspace), ignore_errors=True)
+
+    def _slot(self, work):
+        while not self._stop.is_set():
+            try:
+                busy = work()
+            except Exception as msg:
+                self.log.exception('worker slot error: %s' % msg)
+                busy = False
+
+            if not busy:
+                # NOTE: a finished encode wakes the upload slots up early
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self):
+        '''
+        recover the jobs of dead workers and start the slots, returns the threads
+        '''
+        self._queue.recover()
+
+        threads = [Thread(target=self._slot, args=(self.encode_one,), name='sub2d_encode_%d' % index)
+                   for index in range(self.encode_slots)]
+        threads.extend(Thread(target=self._slot, args=(self.upload_one,), name='sub2d_upload_%d' % index)
+                       for index in range(self.upload_slots))
+
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        return threads
+
+    def run(self):
+        '''
+        work until stop is called
+        '''
+        threads = self.start()
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(1.0)
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+def format_jobs(jobs):
+    '''
+    returns the jobs as a text table
+    '''
+    lines = ['%-6s %-10s %-8s %-12s %-40s %s' % ('id', 'state', 'attempts', 'submitter', 'media', 'error')]
+    for job in jobs:
+        lines.append('%-6d %-10s %-8s %-12s %-40s %s' % (job['id'],
+                                                        job['state'],
+                                                        '%d/%d' % (job['attempts'], job['max_attempts']),
+                                                        job['submitter'] or '',
+                                                        os.path.basename(job['media_path']),
+                                                        (job['error'] or '').splitlines()[0] if job['error'] else ''))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='queue submissions and run the workers that drain the queue')
+    parser.add_argument('--queue', help='queue database, defaults to SUB2D_QUEUE or the temp folder')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    enqueue = commands.add_parser('enqueue', help='add a submission')
+    enqueue.add_argument('media_path')
+    enqueue.add_argument('--task', type=int, required=True, help='Task id')
+    enqueue.add_argument('--comment', required=True)
+    enqueue.add_argument('--profile', help='encode profile, see ffmpeg_helper.encode_profiles')
+    enqueue.add_argument('--priority', type=int, default=0)
+
+    status = commands.add_parser('status', help='list the jobs')
+    status.add_argument('job_ids', nargs='*', type=int)
+    status.add_argument('--state', action='append', choices=STATES)
+    status.add_argument('--limit', type=int, default=50)
+
+    retry = commands.add_parser('retry', help='retry a failed or cancelled job')
+    retry.add_argument('job_id', type=int)
+
+    cancel = commands.add_parser('cancel', help='cancel a job no worker picked up yet')
+    cancel.add_argument('job_id', type=int)
+
+    work = commands.add_parser('work', help='drain the queue until interrupted')
+    work.add_argument('--encode-slots', type=int, default=2)
+    work.add_argument('--upload-slots', type=int, default=4)
+    work.add_argument('--backlog', type=int, default=4)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    queue = JobQueue(args.queue)
+
+    if args.command == 'status':
+        jobs = [queue.get(job_id) for job_id in args.job_ids] if args.job_ids else queue.jobs(args.state, args.limit)
+        print(format_jobs([job for job in jobs if job]))
+        print(' '.join('%s=%d' % item for item in queue.counts().items()))
+        return 0
+
+    if args.command == 'retry':
+        queue.retry(args.job_id)
+        return 0
+
+    if args.command == 'cancel':
+        queue.cancel(args.job_id)
+        return 0
+
+    # NOTE: imported here so status, retry and cancel don't pay for loading the api
+    from shot_grid_sub_2_dailies.sub2d_api import Sub2DAPI
+
+    api = Sub2DAPI()
+    api.enable_store()
+
+    if args.command == 'enqueue':
+        tasks = api.get_tasks(None, extra_filters=[['id', 'is', args.task]])
+        if not tasks:
+            parser.error('there is no Task %d' % args.task)
+
+        api._validate_task(tasks[0])
+        api._validate_media(args.media_path)
+        print(queue.enqueue(tasks[0], args.media_path, args.comment, profile=args.profile, priority=args.priority))
+        return 0
+
+    api.enable_encode_cache(root=os.environ.get('SUB2D_ENCODE_CACHE'))
+    api.enable_exr_predecode()
+    worker = JobWorker(api,
+                       queue,
+                       encode_slots=args.encode_slots,
+                       upload_slots=args.upload_slots,
+                       backlog=args.backlog)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+'''
+qt_workers
+==========
+
+small task layer used by the UI to run Sub2DAPI calls on a QThreadPool so the
+window never freezes, results and progress come back through Qt signals
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from logging import getLogger
+import traceback
+
+from PySide2 import QtCore
+
+
+class TaskSignals(QtCore.QObject):
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+    progress = QtCore.Signal(int)
+    maximum = QtCore.Signal(int)
+    # NOTE: emitted when run() returns, cancelled or not
+    done = QtCore.Signal()
+
+
+class SignalProgress(object):
+    '''
+    stands in for a QProgressBar inside worker threads, instead of touching the widget
+    it emits signals that are delivered on the GUI thread
+
+    :param TaskSignals signals:
+    '''
+
+    def __init__(self, signals):
+        self._signals = signals
+
+    def setValue(self, value):
+        self._signals.progress.emit(int(value))
+
+    def setMaximum(self, value):
+        self._signals.maximum.emit(int(value))
+
+
+class ApiTask(QtCore.QRunnable):
+    '''
+    runs func(*args, **kwargs) on a worker thread
+
+    :param callable func:
+    :param str progress_kwarg: name of the keyword argument that receives a SignalProgress
+    '''
+
+    def __init__(self, func, *args, **kwargs):
+        super(ApiTask, self).__init__()
+        self.progress_kwarg = kwargs.pop('progress_kwarg', None)
+        self.signals = TaskSignals()
+
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._cancelled = False
+        self.log = getLogger('Sub2D_Tasks')
+
+        # NOTE: the pool deleting the task once it ran would leave tryTake with a dead C++ object,
+        # the TaskRunner keeps it alive until done instead
+        self.setAutoDelete(False)
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        '''
+        flag the task as stale, if it did not start yet it won't run and
+        if it is already running its result will be dropped
+        '''
+        self._cancelled = True
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            self.signals.done.emit()
+
+    def _run(self):
+        if self._cancelled:
+            return
+
+        if self.progress_kwarg:
+            self._kwargs[self.progress_kwarg] = SignalProgress(self.signals)
+
+        try:
+            result = self._func(*self._args, **self._kwargs)
+        except Exception as msg:
+            self.log.error(traceback.format_exc())
+            if not self._cancelled:
+                self.signals.failed.emit(str(msg))
+            return
+
+        if not self._cancelled:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner(QtCore.QObject):
+    '''
+    dispatches ApiTasks on a thread pool, each task runs on a named channel and
+    starting a new task on a channel cancels the one that was there before
+
+    :param int max_threads: maximum number of worker threads
+    '''
+
+    def __init__(self, max_threads=4, parent=None):
+        super(TaskRunner, self).__init__(parent=parent)
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._channels = {}
+        self._tasks = set()
+
+    def run(self, channel, func, *args, **kwargs):
+        '''
+        start func on a worker thread and return the task so callers can connect to its signals
+
+        :param str channel: name used to cancel stale tasks ie "hierarchy"
+        :param callable func:
+        '''
+        self.cancel(channel)
+
+        task = ApiTask(func, *args, **kwargs)
+        self._channels[channel] = task
+        self._tasks.add(task)
+        task.signals.done.connect(lambda: self._tasks.discard(task))
+
+        # NOTE: drop our reference once the task is done so the signals can be collected
+        task.signals.finished.connect(lambda _: self._release(channel, task))
+        task.signals.failed.connect(lambda _: self._release(channel, task))
+
+        self._pool.start(task)
+        return task
+
+    def cancel(self, channel):
+        task = self._channels.pop(channel, None)
+        if task:
+            task.cancel()
+            # NOTE: a task taken back before it started never runs so it never reports done
+            if self._pool.tryTake(task):
+                self._tasks.discard(task)
+
+    def is_running(self, channel):
+        return channel in self._channels
+
+    def _release(self, channel, task):
+        if self._channels.get(channel) is task:
+            del self._channels[channel]
+
+    def wait(self, msecs=-1):
+        return self._pool.waitForDone(msecs)
@@ -0,0 +1,124 @@
+'''
+query_cache
+===========
+
+small in memory result cache used by Sub2DAPI to avoid re-querying Shotgrid
+every time the user flips back and forth between entities
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from collections import OrderedDict
+import json
+from threading import RLock
+import time
+
+
+def make_query_key(entity_type, filters, fields, order=None):
+    '''
+    build a hashable key out of the arguments of a Shotgrid find call
+
+    :param str entity_type:
+    :param [list] filters:
+    :param [str] fields:
+    :param [dict] order:
+    '''
+    return (entity_type,
+            json.dumps([filters, sorted(fields), order], sort_keys=True, default=str))
+
+
+class QueryCache(object):
+    '''
+    TTL + LRU cache for Shotgrid find results
+
+    :param int max_entries: maximum number of results kept before the least recently used is evicted
+    :param float default_ttl: seconds a result stays valid when the entity type has no specific ttl
+    :param dict ttls: seconds a result stays valid per entity type ie {'Project': 600}
+    '''
+    default_ttls = {'Project': 600.0,
+                    'Asset': 120.0,
+                    'Sequence': 120.0,
+                    'Shot': 120.0,
+                    'Task': 60.0,
+                    'Version': 15.0}
+
+    def __init__(self, max_entries=256, default_ttl=60.0, ttls=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(self.default_ttls)
+        self.ttls.update(ttls or {})
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key):
+        '''
+        returns the cached value for the key or None if missing or expired
+
+        :param tuple key: key built with make_query_key
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return list(value)
+
+    def set(self, key, value):
+        '''
+        stores a result, the ttl is picked based on the entity type of the key
+
+        :param tuple key: key built with make_query_key
+        :param list value: find result
+        '''
+        ttl = self.ttls.get(key[0], self.default_ttl)
+
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, list(value))
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, entity_type=None):
+        '''
+        drop cached results, all of them or only the ones for the given entity type
+
+        :param str entity_type:
+        '''
+        with self._lock:
+            if entity_type is None:
+                self._entries.clear()
+                return
+
+            for key in [key for key in self._entries if key[0] == entity_type]:
+                del self._entries[key]
+
+    def stats(self):
+        '''
+        returns hit/miss counters so ttls can be tuned
+        '''
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries),
+                    'hit_ratio': float(self.hits) / total if total else 0.0}
@@ -0,0 +1,116 @@
+'''
+sg_pool
+=======
+
+shotgun_api3.Shotgun instances can't be shared across threads, this pool hands out
+one authenticated client per caller and reuses them so their connections stay warm
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock, local
+
+
+class ShotgunPool(object):
+    '''
+    bounded checkout/return pool of Shotgun clients
+
+    :param callable factory: function returning a new authenticated Shotgun client
+    :param int max_size: maximum number of clients alive at once, caps the load we put on the server
+    :param float timeout: seconds to wait for a free client before giving up, None waits forever
+    '''
+
+    def __init__(self, factory, max_size=4, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._factory = factory
+        self._idle = []
+        self._created = 0
+        self._generation = 0
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(max_size)
+        self._local = local()
+
+    @property
+    def size(self):
+        '''
+        number of clients created so far
+        '''
+        return self._created
+
+    @contextmanager
+    def connection(self):
+        '''
+        check out a client for the current thread, nested checkouts on the same
+        thread get the same client so they never dead lock waiting on themselves
+
+        :example:
+
+        >>> with pool.connection() as sg:
+        ...     sg.find('Project', [])
+        '''
+        current = getattr(self._local, 'client', None)
+        if current is not None:
+            yield current
+            return
+
+        acquired = self._slots.acquire(timeout=self.timeout) if self.timeout is not None else self._slots.acquire()
+        if not acquired:
+            raise RuntimeError('timed out waiting for a free Shotgrid connection')
+
+        try:
+            client, generation = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._local.client = client
+        try:
+            yield client
+        finally:
+            self._local.client = None
+            with self._lock:
+                stale = generation != self._generation
+                if stale:
+                    self._created -= 1
+                else:
+                    self._idle.append(client)
+            self._slots.release()
+
+            # NOTE: checked out before clear, it still carries the old login
+            if stale:
+                self._close(client)
+
+    def _checkout(self):
+        with self._lock:
+            generation = self._generation
+            if self._idle:
+                return self._idle.pop(), generation
+
+        client = self._factory()
+        with self._lock:
+            self._created += 1
+
+        return client, generation
+
+    @staticmethod
+    def _close(client):
+        close = getattr(client, 'close', None)
+        if close:
+            close()
+
+    def clear(self):
+        '''
+        drop all the idle clients, used when the credentials change, the clients checked out
+        right now are dropped when they come back
+        '''
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._generation += 1
+
+        for client in idle:
+            self._close(client)
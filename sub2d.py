@@ -3,8 +3,19 @@ Created on Nov 30, 2021
 
 @author: carlos.anguiano
 '''
+from logging import getLogger
 import os
+import time
+
+# NOTE: time to first paint is measured from here, see MyApp.first_paint_target
+_START = time.perf_counter()
+
+from shot_grid_sub_2_dailies.entity_picker import EntityPicker
+from shot_grid_sub_2_dailies.job_queue import JobQueue, default_path
+from shot_grid_sub_2_dailies.qt_workers import TaskRunner
 from shot_grid_sub_2_dailies.sub2d_api import Sub2DAPI
+from shot_grid_sub_2_dailies.tracing import TRACER
+from shot_grid_sub_2_dailies.workspace import WorkspaceManager
 
 from PySide2 import QtWidgets, QtUiTools, QtCore
 
@@ -57,39 +68,118 @@ class CredDialog(QtWidgets.QDialog, UiLoaderClass):
                                         'Credential Error',
                                         str(msg))
             return
+
+        # NOTE: pooled clients still carry the old login
+        self._api.reset_clients()
         # NOTE: if there is no error we bounce out let the tool do it's thing
         self.result = True
         self.close()
 
 
 class MyApp(QtWidgets.QDialog, UiLoaderClass):
+    # NOTE: seconds from the start of the module to the first paint of the window, slower starts are logged
+    first_paint_target = 0.5
+    loading_label = 'Loading...'
+
     def __init__(self, parent=None):
         super(MyApp, self).__init__(parent=parent)
 
         self.dont_open = False
+        self.first_paint = None
+        self._logged_in = False
+        self.log = getLogger('Sub2D_UI')
 
         # NOTE let's make our main widget and add it to your app
         ui_file = os.path.join(os.path.dirname(
             __file__), 'views', 'mainWidget.ui')
         self._mwidget = self._add_my_ui_file(ui_file)
 
-        self._api = Sub2DAPI()
+        # NOTE: searchable pickers, shows with tens of thousands of shots stay responsive
+        self._prj_picker = EntityPicker(self._mwidget.PrjComboBox, 'name')
+        self._seq_picker = EntityPicker(self._mwidget.SeqComboBox, 'code')
+        self._shot_picker = EntityPicker(self._mwidget.shotComboBox, 'code')
+        self._task_picker = EntityPicker(self._mwidget.TaskComboBox, 'cached_display_name')
 
-        try:
-            self._api.sg
-        except RuntimeError:
-            val = self._collect_creds()
-            if not val:
-                self.dont_open = True
+        # NOTE: SUB2D_SCRATCH_IN_MEMORY=1 renders the movies in /dev/shm when the system has it
+        workspaces = WorkspaceManager(in_memory=os.environ.get('SUB2D_SCRATCH_IN_MEMORY') == '1')
+        # NOTE: cheap to build, shotgun_api3 and ffmpeg are only loaded when they are first needed
+        self._api = Sub2DAPI(workspaces=workspaces)
+        self._tasks_runner = TaskRunner(parent=self)
 
         self._projects = []
+        self._hierarchies = {}
         self._sequences = []
         self._shots = []
         self._tasks = []
 
-        self._populate_projects()
-
         self._connect_signals()
+        self._show_placeholders()
+
+        # NOTE: with no stored credentials there is nothing to do until the user gives us some
+        if not self._api._get_cached_settings() and not self._collect_creds():
+            self.dont_open = True
+
+    def paintEvent(self, event):
+        super(MyApp, self).paintEvent(event)
+
+        if self.first_paint is not None:
+            return
+
+        self.first_paint = time.perf_counter() - _START
+        TRACER.record('sub2d.first_paint', self.first_paint)
+        if self.first_paint > self.first_paint_target:
+            self.log.warning('first paint took %.0fms, the target is %.0fms' % (self.first_paint * 1000,
+                                                                              self.first_paint_target * 1000))
+
+        # NOTE: everything else starts once the window is on screen
+        if not self.dont_open:
+            QtCore.QTimer.singleShot(0, self._start)
+
+    def _show_placeholders(self):
+        for picker in (self._prj_picker, self._seq_picker, self._shot_picker, self._task_picker):
+            picker.set_entities([])
+            picker.set_placeholder(self.loading_label)
+
+        # NOTE: enabled once we know the credentials work
+        self._mwidget.SubmitButton.setEnabled(False)
+
+    def _start(self):
+        # NOTE: clean up after sessions that crashed mid submit
+        self._tasks_runner.run('workspace_gc', self._api.workspaces.gc)
+
+        # NOTE: serve what we know from disk first and refresh from the server once logged in
+        self._api.enable_store()
+        self._api.enable_encode_cache(root=os.environ.get('SUB2D_ENCODE_CACHE'))
+        self._api.enable_exr_predecode()
+        self._populate_projects(refresh=False)
+
+        self._login()
+
+    def _login(self):
+        task = self._tasks_runner.run('login', lambda: self._api.sg)
+        task.signals.finished.connect(self._on_logged_in)
+        task.signals.failed.connect(self._on_login_failed)
+
+    def _on_logged_in(self, _):
+        self._logged_in = True
+        self._mwidget.SubmitButton.setEnabled(True)
+        self._refresh_projects()
+
+        # NOTE: the tree of the project picked from the store was only read from disk so far
+        prj = self._current_project()
+        if prj:
+            self._request_hierarchy(prj)
+
+    def _on_login_failed(self, msg):
+        self.log.warning('could not log in: %s' % msg)
+        if not self._collect_creds():
+            self.close()
+            return
+
+        # NOTE: the store is per site and the new credentials may point at another one
+        self._api.enable_store()
+        self._populate_projects(refresh=False)
+        self._login()
 
     def _connect_signals(self):
         self._mwidget.PrjComboBox.currentIndexChanged.connect(lambda _: self._populate_sequences())
@@ -103,57 +193,126 @@ class MyApp(QtWidgets.QDialog, UiLoaderClass):
         collect_creds.exec_()
         return collect_creds.result
 
-    def _populate_projects(self):
-        self._projects = self._api.get_projects()
-        self._mwidget.PrjComboBox.addItems([prj['name'] for prj in self._projects])
+    @staticmethod
+    def _find_index(entities, ent_id):
+        for i, ent in enumerate(entities):
+            if ent['id'] == ent_id:
+                return i
 
-        self.blockSignals(True)
-        self._populate_sequences()
-        self.blockSignals(False)
+        return 0
 
-    def _populate_sequences(self):
-        self._sequences = []
-        self._mwidget.SeqComboBox.clear()
+    @staticmethod
+    def _current_id(entities, combo):
+        if not entities or combo.currentIndex() < 0:
+            return None
+
+        return entities[combo.currentIndex()]['id']
+
+    @staticmethod
+    def _fill_picker(picker, entities, index=0):
+        picker.set_placeholder('')
+        picker.set_entities(entities, index=index)
+
+    def _show_error(self, msg):
+        QtWidgets.QMessageBox.about(self, 'Sub2Dailies', msg)
 
+    def _current_project(self):
         if not self._projects:
-            self._popluate_shots()
+            return None
+
+        return self._projects[self._mwidget.PrjComboBox.currentIndex()]
+
+    def _populate_projects(self, refresh=True):
+        self._projects = self._api.get_projects(stored_only=True)
+
+        # NOTE: nothing stored yet, keep the placeholders until the server answers
+        if self._projects:
+            self._fill_picker(self._prj_picker, self._projects)
+            self._populate_sequences()
+
+        if refresh:
+            self._refresh_projects()
+
+    def _refresh_projects(self):
+        task = self._tasks_runner.run('projects', self._api.get_projects)
+        task.signals.finished.connect(self._on_projects_loaded)
+        task.signals.failed.connect(self._show_error)
+
+    def _on_projects_loaded(self, projects):
+        if projects and projects == self._projects:
             return
 
-        prj = self._projects[self._mwidget.PrjComboBox.currentIndex()]
-        self._sequences = self._api.get_sequences(prj)
+        prj_id = self._current_id(self._projects, self._mwidget.PrjComboBox)
+        self._projects = projects
 
-        self._mwidget.SeqComboBox.addItems([seq['code'] for seq in self._sequences])
+        self._fill_picker(self._prj_picker, self._projects, index=self._find_index(self._projects, prj_id))
+        self._populate_sequences()
 
-        self.blockSignals(True)
-        self._popluate_shots()
-        self.blockSignals(False)
+    def _request_hierarchy(self, prj):
+        # NOTE: the whole project tree is pulled once, the combo box cascade reads from memory
+        if prj['id'] not in self._hierarchies:
+            self._hierarchies[prj['id']] = self._api.get_hierarchy(prj, stored_only=True)
 
-    def _popluate_shots(self):
-        self._shots = []
-        self._mwidget.shotComboBox.clear()
+        # NOTE: the server is only asked once the credentials checked out, see _on_logged_in
+        if self._logged_in:
+            # NOTE: starting a new request cancels the one for the project the user moved away from
+            task = self._tasks_runner.run('hierarchy', self._api.get_hierarchy, prj)
+            task.signals.finished.connect(self._on_hierarchy_loaded)
+            task.signals.failed.connect(self._show_error)
+
+        return self._hierarchies[prj['id']]
 
-        if not self._sequences:
-            self._populate_tasks()
+    def _on_hierarchy_loaded(self, hierarchy):
+        prj = hierarchy['project']
+        if hierarchy == self._hierarchies.get(prj['id']):
             return
 
-        seq = self._sequences[self._mwidget.SeqComboBox.currentIndex()]
-        self._shots = self._api.get_shots(seq)
-        self._mwidget.shotComboBox.addItems([shot['code'] for shot in self._shots])
+        self._hierarchies[prj['id']] = hierarchy
 
-        self.blockSignals(True)
-        self._populate_tasks()
-        self.blockSignals(False)
+        current = self._current_project()
+        if not current or current['id'] != prj['id']:
+            return
 
-    def _populate_tasks(self):
+        # NOTE: repopulate keeping whatever the user had selected
+        seq_id = self._current_id(self._sequences, self._mwidget.SeqComboBox)
+        shot_id = self._current_id(self._shots, self._mwidget.shotComboBox)
+        task_id = self._current_id(self._tasks, self._mwidget.TaskComboBox)
+
+        self._populate_sequences(hierarchy=hierarchy, seq_id=seq_id, shot_id=shot_id, task_id=task_id)
+
+    def _populate_sequences(self, hierarchy=None, seq_id=None, shot_id=None, task_id=None):
+        self._sequences = []
+        prj = self._current_project()
+
+        if prj:
+            hierarchy = hierarchy or self._request_hierarchy(prj)
+            self._sequences = hierarchy['sequences']
+
+        self._fill_picker(self._seq_picker, self._sequences, index=self._find_index(self._sequences, seq_id))
+
+        self._popluate_shots(hierarchy=hierarchy, shot_id=shot_id, task_id=task_id)
+
+    def _popluate_shots(self, hierarchy=None, shot_id=None, task_id=None):
+        self._shots = []
+
+        if self._sequences:
+            hierarchy = hierarchy or self._hierarchies[self._current_project()['id']]
+            seq = self._sequences[self._mwidget.SeqComboBox.currentIndex()]
+            self._shots = hierarchy['shots'].get(seq['id'], [])
+
+        self._fill_picker(self._shot_picker, self._shots, index=self._find_index(self._shots, shot_id))
+
+        self._populate_tasks(hierarchy=hierarchy, task_id=task_id)
+
+    def _populate_tasks(self, hierarchy=None, task_id=None):
         self._tasks = []
-        self._mwidget.TaskComboBox.clear()
 
-        if not self._shots:
-            return
+        if self._shots:
+            hierarchy = hierarchy or self._hierarchies[self._current_project()['id']]
+            shot = self._shots[self._mwidget.shotComboBox.currentIndex()]
+            self._tasks = hierarchy['tasks'].get(shot['id'], [])
 
-        shot = self._shots[self._mwidget.shotComboBox.currentIndex()]
-        self._tasks = self._api.get_tasks(shot)
-        self._mwidget.TaskComboBox.addItems([task['cached_display_name'] for task in self._tasks])
+        self._fill_picker(self._task_picker, self._tasks, index=self._find_index(self._tasks, task_id))
 
     def _load_media(self):
         media_types = ['*%s' % key for key in Sub2DAPI.media_formats.keys()]
@@ -186,15 +345,56 @@ class MyApp(QtWidgets.QDialog, UiLoaderClass):
             QtWidgets.QMessageBox.about(self, 'Sub2Dailies', 'Please add a comment to your media')
             return
 
-        self._api.upload_review_media(task,
+        if self._mwidget.QueueCheckBox.isChecked():
+            self._enqueue_media(task, media_path, comment)
+            return
+
+        # NOTE: encode and upload happen on a worker thread, the progress bar is fed through signals
+        self._mwidget.SubmitButton.setEnabled(False)
+        task = self._tasks_runner.run('submit',
+                                      self._api.upload_review_media,
+                                      task,
                                       media_path,
                                       comment,
-                                      qt_pg=self._mwidget.progressBar)
+                                      progress_kwarg='qt_pg')
+        task.signals.progress.connect(self._mwidget.progressBar.setValue)
+        task.signals.maximum.connect(self._mwidget.progressBar.setMaximum)
+        task.signals.finished.connect(self._on_media_submitted)
+        task.signals.failed.connect(self._on_submit_failed)
+
+    def _enqueue_media(self, task, media_path, comment):
+        # NOTE: a queue worker (python -m shot_grid_sub_2_dailies.job_queue work) picks it up from here
+        try:
+            job_id = JobQueue().enqueue(task, media_path, comment)
+        except Exception as msg:
+            # NOTE: usually a queue database created by another user, see the job_queue docs
+            self._show_error('Failed to queue your media in %s\n%s\n\n'
+                             'SUB2D_QUEUE has to point at a database every artist can write to' % (default_path(), msg))
+            return
+
+        QtWidgets.QMessageBox.about(self,
+                                    'Sub2D',
+                                    'Your media has been queued for review as job %d' % job_id)
+        self.close()
+
+    def _on_media_submitted(self, _):
         QtWidgets.QMessageBox.about(self,
                                     'Sub2D',
                                     'Your media has been successfully submitted for review!')
         self.close()
 
+    def _on_submit_failed(self, msg):
+        self._mwidget.SubmitButton.setEnabled(True)
+        self._show_error('Failed to submit your media\n%s' % msg)
+
+    def closeEvent(self, event):
+        if self._tasks_runner.is_running('submit'):
+            QtWidgets.QMessageBox.about(self, 'Sub2Dailies', 'Please wait for your submission to finish')
+            event.ignore()
+            return
+
+        super(MyApp, self).closeEvent(event)
+
 
 if __name__ == '__main__':
     _APP = QtWidgets.QApplication([])
@@ -204,3 +404,7 @@ if __name__ == '__main__':
     if _UI.dont_open:
         _UI.close()
     _APP.exec_()
+
+    # NOTE: set SUB2D_TRACE_FILE to dump where the time went during this session
+    if os.environ.get('SUB2D_TRACE_FILE'):
+        TRACER.export(os.environ['SUB2D_TRACE_FILE'])
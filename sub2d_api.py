@@ -3,52 +3,273 @@ Created on Nov 30, 2021
 
 @author: carlos.anguiano
 '''
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import hashlib
 import json
+from logging import getLogger
 import os
+import random
+import re
+import time
+from shot_grid_sub_2_dailies.chunked_upload import ChunkedUploader, UploadInterruptedError
+from shot_grid_sub_2_dailies.encode_cache import EncodeCache
+from shot_grid_sub_2_dailies.entity_store import EntityStore
 from shot_grid_sub_2_dailies.ffmpeg_helper import FFMpegHelper
-from tempfile import gettempdir
+from shot_grid_sub_2_dailies.ffmpeg_helper.encode_profiles import get_profile
+from shot_grid_sub_2_dailies.ffmpeg_helper.exr_predecode import ExrPredecoder
+from shot_grid_sub_2_dailies.query_cache import QueryCache, make_query_key
+from shot_grid_sub_2_dailies.sg_pool import ShotgunPool
+from shot_grid_sub_2_dailies.submission_pipeline import SubmissionPipeline
+from shot_grid_sub_2_dailies.tracing import TRACER, TracedClient
+from shot_grid_sub_2_dailies.workspace import WorkspaceManager
 
-from shotgun_api3 import Shotgun
-from shotgun_api3.shotgun import AuthenticationFault, ShotgunError
+
+def _shotgun_api3():
+    '''
+    shotgun_api3 pulls in ssl, http and its bundled libraries which used to be most of the start
+    up time of the tool, it is only imported once the first client is made
+    '''
+    import shotgun_api3
+    return shotgun_api3
+
+
+def __getattr__(name):
+    # NOTE: keeps "from shot_grid_sub_2_dailies.sub2d_api import Shotgun" working without the eager import
+    if name in ('Shotgun', 'ShotgunError', 'AuthenticationFault'):
+        return getattr(_shotgun_api3(), name)
+
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
 
 
 class Sub2DAPI(object):
     _sg_api = None
     media_formats = {'.jpg': 'image',
                      '.exr': 'image'}
-
-    def __init__(self):
-        self._ffmpeg = FFMpegHelper()
+    version_lookup_limit = 5
+    upload_chunk_size = 20 * 1024 * 1024
+    upload_retries = 5
+    encode_segments = None
+    # NOTE: see ffmpeg_helper.encode_profiles for the available profiles
+    encode_profile = 'final'
+    # NOTE: render our own thumbnail and filmstrip so the Version is reviewable before Shotgrid transcodes
+    upload_extras = True
+    # NOTE: missing frames are held so the review movie keeps the timing of the shot
+    hold_missing_frames = True
+
+    def __init__(self,
+                 cache=None,
+                 store=None,
+                 max_connections=4,
+                 tracer=None,
+                 encode_cache=None,
+                 workspaces=None,
+                 sg_factory=None):
+        """
+        :param QueryCache cache: optional result cache, pass your own to tune ttls and size
+        :param EntityStore store: optional on disk store, see enable_store
+        :param int max_connections: maximum number of Shotgrid clients used in parallel
+        :param Tracer tracer: span recorder, defaults to the shared tracing.TRACER
+        :param EncodeCache encode_cache: optional cache of encoded movies, see enable_encode_cache
+        :param WorkspaceManager workspaces: where the jobs get their scratch folders, defaults to
+                                            the temp folder
+        :param callable sg_factory: returns a new Shotgun client, replaces the stored credentials ie to
+                                    run against fake_shotgun.FakeShotgun
+        """
+        self.tracer = tracer or TRACER
+        self.log = getLogger('Sub2D_API')
+        self._ffmpeg = FFMpegHelper(tracer=self.tracer)
+        self._cache = cache if cache is not None else QueryCache()
+        self._store = store
+        self._encode_cache = encode_cache
+        self._exr_predecoder = None
+        self._workspaces = workspaces or WorkspaceManager()
+        self._sg_factory = sg_factory
+        self._pool = ShotgunPool(lambda: TracedClient(self._new_client(validate=False), self.tracer),
+                                 max_size=max_connections)
 
     @property
     def sg(self):
+        """
+        validated client for the calling thread, internally all the calls go through
+        the connection pool so they are safe to run from worker threads
+        """
         if not self._sg_api:
-            self._sg_api = self._init_shotgun()
+            self._sg_api = self._new_client()
 
         return self._sg_api
 
+    def _new_client(self, validate=True):
+        if self._sg_factory is not None:
+            return self._sg_factory()
+
+        return self._init_shotgun(validate=validate)
+
+    def _client(self):
+        """
+        check out a Shotgun client from the pool for the current thread
+
+        :example:
+
+        >>> with self._client() as sg:
+        ...     sg.find('Project', [])
+        """
+        return self._pool.connection()
+
+    def reset_clients(self):
+        """
+        forget the clients logged in with the previous credentials, call it after set_cache_settings
+        or clear_cache_settings
+        """
+        self._sg_api = None
+        self._pool.clear()
+        # NOTE: the new credentials may point at another site
+        self._cache.invalidate()
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def store(self):
+        return self._store
+
+    def enable_store(self, store=None):
+        """
+        turn on the on disk entity store, by default the store lives next to the settings json
+
+        :param EntityStore store: optional store to use instead of the default one
+        """
+        if store is None:
+            settings = self._get_cached_settings()
+            if not settings:
+                raise RuntimeError('There are no Shotgrid credentials stored on the system')
+
+            store = EntityStore(self._get_store_file_path(settings['url']))
+
+        self._store = store
+        return store
+
+    @property
+    def encode_cache(self):
+        return self._encode_cache
+
+    def enable_encode_cache(self, root=None, max_bytes=20 * 1024 ** 3, content_hash=False):
+        """
+        keep the encoded movies around so submitting the same frames again skips ffmpeg
+
+        :param str root: folder of the cache, defaults to sub2d_encode_cache in the temp folder
+        :param int max_bytes: size of the cache before the least recently used movies get removed
+        :param bool content_hash: also hash the frames content, see EncodeCache
+        """
+        self._encode_cache = EncodeCache(root=root, max_bytes=max_bytes, content_hash=content_hash)
+        return self._encode_cache
+
+    @property
+    def workspaces(self):
+        return self._workspaces
+
+    @property
+    def exr_predecoder(self):
+        return self._exr_predecoder
+
+    def enable_exr_predecode(self, **kwargs):
+        """
+        convert EXR submissions to light PNGs on all the cores before the encode, see ExrPredecoder
+        for the options (layer, exposure, lut_3d, max_width, bit_depth, cache_dir, ...)
+        """
+        self._exr_predecoder = ExrPredecoder(**kwargs)
+        return self._exr_predecoder
+
+    def _find(self, entity_type, filters, fields, order=None, use_cache=True, stored_only=False):
+        """
+        wrapper around Shotgun.find that goes through the query cache and the entity store
+
+        :param str entity_type:
+        :param [list] filters:
+        :param [str] fields:
+        :param [dict] order:
+        :param bool use_cache: set to False to skip the cache and always hit the server
+        :param bool stored_only: only return what is in the entity store without going to the server
+        """
+        key = make_query_key(entity_type, filters, fields, order)
+        use_store = self._store is not None and entity_type in self._store.entity_types
+
+        if stored_only:
+            if not use_store:
+                return []
+
+            return self._store.rows(key, order) or []
+
+        if use_cache:
+            result = self._cache.get(key)
+            if result is not None:
+                return result
+
+        if use_store:
+            result = self._sync_store(key, entity_type, filters, fields, order)
+        else:
+            with self._client() as sg:
+                result = sg.find(entity_type, filters, fields, order=order)
+
+        self._cache.set(key, result)
+
+        return result
+
+    def _sync_store(self, key, entity_type, filters, fields, order):
+        now = time.time()
+
+        if self._store.needs_full_sync(key, now=now):
+            with self._client() as sg:
+                result = sg.find(entity_type, filters, fields, order=order)
+            self._store.replace(key, result, synced_at=now)
+            return result
+
+        # NOTE: only pull what changed since the last time we asked
+        since = datetime.datetime.fromtimestamp(self._store.since(key))
+        with self._client() as sg:
+            changed = sg.find(entity_type,
+                              filters + [['updated_at', 'greater_than', since]],
+                              fields,
+                              order=order)
+
+        self._store.upsert(key, changed, synced_at=now)
+
+        return self._store.rows(key, order)
+
+    def cache_stats(self):
+        """
+        returns the hit/miss counters of the query cache
+        """
+        return self._cache.stats()
+
     @classmethod
-    def _init_shotgun(cls, settings=None):
+    def _init_shotgun(cls, settings=None, validate=True):
         settings = settings or cls._get_cached_settings()
         if not settings:
             raise RuntimeError(
                 'There are no Shotgrid credentials stored on the system')
 
+        shotgun_api3 = _shotgun_api3()
+
         # NOTE: script based authentications
         if not settings['is_user']:
-            sg = Shotgun(settings['url'],
-                         script_name=settings['user'],
-                         api_key=settings['password'])
+            sg = shotgun_api3.Shotgun(settings['url'],
+                                      script_name=settings['user'],
+                                      api_key=settings['password'])
         # NOTE: user based authentication
         else:
 
-            sg = Shotgun(settings['url'],
-                         login=settings['user'],
-                         password=settings['password'])
+            sg = shotgun_api3.Shotgun(settings['url'],
+                                      login=settings['user'],
+                                      password=settings['password'])
+
+        if not validate:
+            return sg
 
         try:
             prjs = sg.find('Project', [])
-        except AuthenticationFault as msg:
+        except shotgun_api3.AuthenticationFault as msg:
             raise RuntimeError('Could not log in with the given creds\n%s' % str(msg))
 
         return sg
@@ -58,6 +279,12 @@ class Sub2DAPI(object):
         appdatapath = '%APPDATA%\ZeniMaxGlobalTechArtApps\Shotgri_Sub2D\setting.json'
         return os.path.expandvars(appdatapath)
 
+    @classmethod
+    def _get_store_file_path(cls, url):
+        # NOTE: one store per site so switching creds never mixes entities
+        site = hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]
+        return os.path.join(os.path.dirname(cls._get_settings_file_path()), 'entity_store_%s.sqlite' % site)
+
     @classmethod
     def _get_cached_settings(cls):
         '''
@@ -108,7 +335,7 @@ class Sub2DAPI(object):
         if os.path.isfile(setting_json):
             os.unlink(setting_json)
 
-    def get_projects(self, active_only=True, name=None, extra_fields=None, extra_filters=None, sort=None):
+    def get_projects(self, active_only=True, name=None, extra_fields=None, extra_filters=None, sort=None, stored_only=False):
         '''
         returns a list of projects based on the given criteria 
 
@@ -117,6 +344,7 @@ class Sub2DAPI(object):
         :param [str] extra_fields:
         :param [list] extra_filters:
         :param [dict] sort:
+        :param bool stored_only: only return what is in the entity store without going to the server
         '''
         extra_fields = extra_fields or []
         extra_filters = extra_filters or []
@@ -140,10 +368,11 @@ class Sub2DAPI(object):
         if active_only:
             filters.append(['sg_status', 'is', 'Active'])
 
-        return self.sg.find('Project',
-                            filters,
-                            fields,
-                            order=sort)
+        return self._find('Project',
+                          filters,
+                          fields,
+                          order=sort,
+                          stored_only=stored_only)
 
     def get_assets(self, proj_ent, active_only=True, extra_fields=None, extra_filters=None, sort=None):
         '''
@@ -178,9 +407,9 @@ class Sub2DAPI(object):
         if active_only:
             filters.append(['sg_status_list', 'is', 'ip'])
 
-        return self.sg.find('Asset', filters, fields, order=sort)
+        return self._find('Asset', filters, fields, order=sort)
 
-    def get_sequences(self, proj_ent, name=None, active_only=True, extra_fields=None, extra_filters=None, sort=None):
+    def get_sequences(self, proj_ent, name=None, active_only=True, extra_fields=None, extra_filters=None, sort=None, stored_only=False):
         '''
         pulls all the sequence data for a given Project
 
@@ -190,6 +419,7 @@ class Sub2DAPI(object):
         :param [str] extra_fields: additional fields you might want to add to the data
         :param [list] extra_filters: extra filter you might want to define
         :param [dict] sort: list of dictionaries controlling sorting the results
+        :param bool stored_only: only return what is in the entity store without going to the server
         '''
 
         extra_fields = extra_fields or []
@@ -219,21 +449,24 @@ class Sub2DAPI(object):
         if active_only:
             filters.append(['sg_status_list', 'is', 'ip'])
 
-        return self.sg.find('Sequence', filters, fields, order=sort)
+        return self._find('Sequence', filters, fields, order=sort, stored_only=stored_only)
 
-    def get_shots(self, seq_ent, name=None, active_only=True, extra_fields=None, extra_filters=None, sort=None):
+    def get_shots(self, seq_ent, name=None, active_only=True, extra_fields=None, extra_filters=None, sort=None, stored_only=False):
         '''
 
-        :param dict seq_ent:
+        :param dict seq_ent: sequence entity, can be None when extra_filters scope the query
         :param bool active_only:
         :param [str] extra_fields:
         :param [list] extra_filters:
         :param [dict] sort:
+        :param bool stored_only: only return what is in the entity store without going to the server
         '''
         extra_fields = extra_fields or []
         extra_filters = extra_filters or []
 
-        filters = [['sg_sequence', 'is', seq_ent]]
+        filters = []
+        if seq_ent:
+            filters.append(['sg_sequence', 'is', seq_ent])
 
         if name:
             filters.append(['code', 'is', name])
@@ -251,19 +484,22 @@ class Sub2DAPI(object):
         if not sort:
             sort = [{'field_name': 'code', 'direction': 'asc'}]
 
-        return self.sg.find('Shot', filters, fields, order=sort)
+        return self._find('Shot', filters, fields, order=sort, stored_only=stored_only)
 
-    def get_tasks(self, shot_ent, extra_fields=None, extra_filters=None):
+    def get_tasks(self, shot_ent, extra_fields=None, extra_filters=None, stored_only=False):
         """
 
-        :param dict shot_ent:
+        :param dict shot_ent: shot entity, can be None when extra_filters scope the query
         :param [str] extra_fields:
         :param [list] extra_filters:
+        :param bool stored_only: only return what is in the entity store without going to the server
         """
         extra_fields = extra_fields or []
         extra_filters = extra_filters or []
 
-        filters = [['entity', 'is', shot_ent]]
+        filters = []
+        if shot_ent:
+            filters.append(['entity', 'is', shot_ent])
 
         if extra_filters:
             filters.extend(extra_filters)
@@ -272,12 +508,74 @@ class Sub2DAPI(object):
         if extra_fields:
             fields.extend(extra_fields)
 
-        return self.sg.find('Task', filters, fields)
+        return self._find('Task', filters, fields, stored_only=stored_only)
+
+    def get_hierarchy(self, proj_ent, active_only=True, stored_only=False):
+        """
+        pulls the sequences, shots and tasks of a project in a fixed number of queries
+        (one per entity type) and returns them as an in-memory tree
+
+        :param dict proj_ent: project entity
+        :param bool active_only: default True will only list active sequences and shots
+        :param bool stored_only: only return what is in the entity store without going to the server
+        :return: dict with "sequences" list, "shots" dict keyed by sequence id
+                 and "tasks" dict keyed by shot id
+        """
+        hierarchy = {'project': proj_ent,
+                     'sequences': [],
+                     'shots': {},
+                     'tasks': {}}
+
+        sequences = self.get_sequences(proj_ent, active_only=active_only, stored_only=stored_only)
+        hierarchy['sequences'] = sequences
+
+        if not sequences:
+            return hierarchy
+
+        for seq in sequences:
+            hierarchy['shots'][seq['id']] = []
 
-    def get_task_version(self, task_ent, extra_fields=None, extra_filters=None):
+        # NOTE: filtering by project keeps the queries the same no matter which sequences
+        # are active, shots and tasks that don't belong to the tree are dropped when we group them
+        proj_ref = {'type': 'Project', 'id': proj_ent['id']}
+
+        shots = self.get_shots(None,
+                               active_only=active_only,
+                               extra_fields=['sg_sequence'],
+                               extra_filters=[['project', 'is', proj_ref],
+                                              ['sg_sequence', 'is_not', None]],
+                               stored_only=stored_only)
+
+        for shot in shots:
+            seq_shots = hierarchy['shots'].get(shot['sg_sequence']['id'])
+            if seq_shots is None:
+                continue
+
+            seq_shots.append(shot)
+            hierarchy['tasks'][shot['id']] = []
+
+        if not hierarchy['tasks']:
+            return hierarchy
+
+        tasks = self.get_tasks(None,
+                               extra_filters=[['project', 'is', proj_ref],
+                                              ['entity', 'type_is', 'Shot']],
+                               stored_only=stored_only)
+
+        for task in tasks:
+            shot_tasks = hierarchy['tasks'].get(task['entity']['id'])
+            if shot_tasks is not None:
+                shot_tasks.append(task)
+
+        return hierarchy
+
+    def get_task_version(self, task_ent, extra_fields=None, extra_filters=None, use_cache=True):
         """
 
         :param dict task_ent:
+        :param [str] extra_fields:
+        :param [list] extra_filters:
+        :param bool use_cache: set to False when you need the latest versions from the server
         """
         extra_fields = extra_fields or []
         extra_filters = extra_filters or []
@@ -291,52 +589,135 @@ class Sub2DAPI(object):
         if extra_filters:
             filters.extend(extra_filters)
 
-        return self.sg.find('Version', filters, fields)
+        return self._find('Version', filters, fields, use_cache=use_cache)
 
-    def gen_unique_version_name(self, task_ent, ver_name):
-        current_ver = 0
-        ver_name = ver_name + '_v'
-        versions = self.get_task_version(task_ent, extra_filters=[['code', 'starts_with', ver_name]])
-        versions_int = [self._ffmpeg.extract_padding(ver['code']) for ver in versions if self._ffmpeg.extract_padding(ver['code'])]
-        if versions_int:
-            versions_int.sort(reverse=True)
+    def _get_latest_version_number(self, task_ent, ver_prefix):
+        """
+        returns the highest version number used on the task for the given prefix, the sorting
+        happens on the server so we only pull a handful of rows no matter how many versions exist
+
+        :param dict task_ent:
+        :param str ver_prefix: version name including the "_v" suffix
+        """
+        filters = [['sg_task', 'is', task_ent],
+                   ['code', 'starts_with', ver_prefix]]
 
-            if current_ver < versions_int[0]:
-                current_ver = versions_int[0]
+        # NOTE: codes are zero padded so sorting them desc puts the highest number first, we pull
+        # a few extra rows in case the top ones don't end with a number
+        with self._client() as sg:
+            versions = sg.find('Version',
+                               filters,
+                               ['code'],
+                               order=[{'field_name': 'code', 'direction': 'desc'}],
+                               limit=self.version_lookup_limit)
 
-        final_version = str(current_ver + 1)
+        versions_int = self._version_numbers(versions, ver_prefix)
+
+        # NOTE: suffixed codes ie "_v0012_retake" can fill the whole window and past v9999 the
+        # padding doesn't sort anymore, in both cases every code of the task gets looked at
+        if (not versions_int and len(versions) >= self.version_lookup_limit) or max(versions_int or [0]) >= 9999:
+            with self._client() as sg:
+                versions = sg.find('Version', filters, ['code'])
+            versions_int = self._version_numbers(versions, ver_prefix)
+
+        return max(versions_int) if versions_int else 0
+
+    @staticmethod
+    def _version_numbers(versions, ver_prefix):
+        """
+        returns the numbers of the codes made of the prefix followed by digits only
+        """
+        # NOTE: starts_with doesn't care about the case on Shotgrid
+        number_regex = re.compile(r'^%s(\d+)$' % re.escape(ver_prefix), re.IGNORECASE)
+        matches = [number_regex.match(ver['code'] or '') for ver in versions]
+        return [int(match.group(1)) for match in matches if match]
+
+    @staticmethod
+    def _format_version_name(ver_prefix, number):
+        final_version = str(number)
 
         if len(final_version) < 4:
             final_version = final_version.zfill(4)
 
-        return '%s%s' % (ver_name, final_version)
+        return '%s%s' % (ver_prefix, final_version)
 
-    def make_version_for_task(self, task_ent, ver_name, comment):
-        if not 'type' in task_ent and task_ent['type'] != 'Task':
-            raise ValueError('task_ent must be of type "Task"')
+    def gen_unique_version_name(self, task_ent, ver_name):
+        ver_name = ver_name + '_v'
+        with self.tracer.span('sub2d.allocate_version_name'):
+            current_ver = self._get_latest_version_number(task_ent, ver_name)
 
-        fields = ['project', 'entity', 'sg_task', 'code', 'description', 'code', 'sg_path_to_frames']
+        return self._format_version_name(ver_name, current_ver + 1)
 
-        # NOTE: append version number to the media name
-        ver_name = self.gen_unique_version_name(task_ent,
-                                                ver_name)
-        data = {
-            'project': task_ent['project'],
-            'code': ver_name,
-            'description': comment,
-            'sg_task': task_ent,
-            'entity': task_ent['entity']
-        }
+    def _is_first_with_code(self, sg, sg_version):
+        """
+        returns True when no other Version of the task was created with the same code before ours
+        """
+        dupes = sg.find('Version',
+                        [['sg_task', 'is', sg_version['sg_task']],
+                         ['code', 'is', sg_version['code']]],
+                        ['id'],
+                        order=[{'field_name': 'id', 'direction': 'asc'}],
+                        limit=1)
 
-        return self.sg.create('Version', data, fields)
+        return not dupes or dupes[0]['id'] == sg_version['id']
 
-    def upload_review_media(self, task_ent, media_path, comment, qt_pg=None):
+    def make_version_for_task(self, task_ent, ver_name, comment, retries=5):
         """
+        create a new Version for the task with the next free version number, Shotgrid has no unique
+        constraint on codes so after creating it we check nobody else grabbed the same name first
+        and retry with the next number if they did
 
         :param dict task_ent:
-        :param str media_path:
+        :param str ver_name: base name of the version, the version number gets appended
         :param str comment:
-        :param QtWidgets.QProgressBar qt_pg:
+        :param int retries: how many times we try again when the name collides
+        """
+        if not 'type' in task_ent and task_ent['type'] != 'Task':
+            raise ValueError('task_ent must be of type "Task"')
+
+        fields = ['project', 'entity', 'sg_task', 'code', 'description', 'code', 'sg_path_to_frames']
+
+        for attempt in range(retries + 1):
+            # NOTE: append version number to the media name
+            data = {
+                'project': task_ent['project'],
+                'code': self.gen_unique_version_name(task_ent, ver_name),
+                'description': comment,
+                'sg_task': task_ent,
+                'entity': task_ent['entity']
+            }
+
+            with self._client() as sg:
+                sg_version = sg.create('Version', data, fields)
+
+                try:
+                    is_first = self._is_first_with_code(sg, sg_version)
+                except Exception:
+                    # NOTE: don't leave a Version holding a number behind when the check fails
+                    try:
+                        sg.delete('Version', sg_version['id'])
+                    except Exception as msg:
+                        self.log.warning('failed to delete Version %s: %s' % (sg_version['id'], msg))
+                    self._cache.invalidate('Version')
+                    raise
+
+                if is_first:
+                    self._cache.invalidate('Version')
+                    return sg_version
+
+                # NOTE: somebody beat us to this name, back off and try the next one
+                sg.delete('Version', sg_version['id'])
+
+            time.sleep(random.uniform(0.05, 0.2) * (attempt + 1))
+
+        self._cache.invalidate('Version')
+        raise RuntimeError('Could not allocate a unique version name for %s' % ver_name)
+
+    def _validate_media(self, media_path):
+        """
+        raises if the media can't be submitted
+
+        :param str media_path:
         """
         # NOTE: small validation
         _, ext = os.path.splitext(media_path.lower())
@@ -347,34 +728,340 @@ class Sub2DAPI(object):
         if self.media_formats[ext] != 'image':
             raise NotImplementedError('only images are supported at the moment')
 
-        # NOTE: gen render path
-        temp_media_path = os.path.join(gettempdir(), 'temp_sg_upload_media.mov')
-        if os.path.isfile(temp_media_path):
-            os.unlink(temp_media_path)
+        if not os.path.isfile(media_path):
+            raise ValueError('%s does not exist' % media_path)
+
+    @staticmethod
+    def _validate_task(task_ent):
+        if task_ent.get('type') != 'Task':
+            raise ValueError('task_ent must be of type "Task"')
+
+        for key in ('project', 'entity', 'cached_display_name'):
+            if not task_ent.get(key):
+                raise ValueError('task_ent is missing "%s"' % key)
+
+    @staticmethod
+    def _get_version_base_name(task_ent):
+        # NOTE: you can come up with cooler way to name your media
+        return "%s_%s_%s" % (task_ent['entity']['name'], task_ent['cached_display_name'], 'Sub2D')
+
+    def _encode_review_media(self, media_path, output, qt_pg=None, segments=None, profile=None):
+        """
+        encode the image sequence into the review movie
+
+        :param str media_path: any frame of the image sequence
+        :param str output: path to the movie to render
+        :param QtWidgets.QProgressBar qt_pg:
+        :param int segments: how many ffmpeg processes split the encode, defaults to encode_segments
+        :param str profile: encode profile name, defaults to encode_profile
+        :return: path of the movie, always output, the thumbnail and filmstrip sit next to it
+                 (see _extras_paths)
+        """
+        profile = profile or self.encode_profile
+        thumbnail, filmstrip = self._extras_paths(output) if self.upload_extras else (None, None)
+
+        for path in (output, thumbnail, filmstrip):
+            if path and os.path.isfile(path):
+                os.unlink(path)
+
+        cache_key = None
+        if self._encode_cache is not None:
+            cache_key = self._encode_cache_key(media_path, profile)
+            # NOTE: the job works on its own link of the cached movie, evictions can't take it away
+            if self._encode_cache.get(cache_key, target=output):
+                if qt_pg:
+                    qt_pg.setMaximum(1)
+                    qt_pg.setValue(1)
+                return output
 
         self._ffmpeg.image_list_to_mov(media_path,
-                                       temp_media_path,
-                                       qt_pg=qt_pg)
+                                       output,
+                                       qt_pg=qt_pg,
+                                       codec=profile,
+                                       segments=segments or self.encode_segments,
+                                       hold_missing=self.hold_missing_frames,
+                                       predecoder=self._exr_predecoder,
+                                       thumbnail=thumbnail,
+                                       filmstrip=filmstrip)
+
+        if not os.path.isfile(output):
+            raise RuntimeError('Failed to generate temporary media %s' % output)
+
+        if cache_key:
+            self._encode_cache.put(cache_key, output, extras=[thumbnail, filmstrip] if thumbnail else [])
+
+        return output
+
+    @staticmethod
+    def _extras_paths(movie_path):
+        """
+        returns where the thumbnail and the filmstrip of a movie are written
+        """
+        root = os.path.dirname(movie_path)
+        return os.path.join(root, 'thumbnail.jpg'), os.path.join(root, 'filmstrip.jpg')
+
+    def _encode_cache_key(self, media_path, profile):
+        """
+        fingerprint of the frames that would be encoded plus everything that changes the movie
+        """
+        sequence = self._ffmpeg.get_image_sequence(media_path)
+        frame_paths = self._ffmpeg.sequence_frame_paths(sequence, hold_missing=self.hold_missing_frames)
+
+        params = {'profile': self._ffmpeg._resolve_profile(profile).args(),
+                  'hold_missing': self.hold_missing_frames,
+                  'extras': self.upload_extras,
+                  'ffmpeg': self._ffmpeg._exe}
+
+        if self._exr_predecoder is not None and self._exr_predecoder.handles(sequence):
+            params['predecode'] = self._exr_predecoder.params()
+
+        with self.tracer.span('sub2d.encode_fingerprint', frames=len(frame_paths)):
+            return self._encode_cache.fingerprint(frame_paths, params)
+
+    def _delete_version(self, sg_version):
+        with self._client() as sg:
+            sg.delete('Version', sg_version['id'])
+        self._cache.invalidate('Version')
+
+    def _upload_version_movie(self, sg_version, movie_path, qt_pg=None):
+        """
+        upload the movie to the Version in chunks, if the transfer gets interrupted the Version
+        is kept so the upload can be resumed with resume_upload, any other failure deletes it
+
+        :param dict sg_version:
+        :param str movie_path:
+        :param QtWidgets.QProgressBar qt_pg: receives the KiB sent so far
+        """
+        # NOTE: the thumbnail and filmstrip go up on their own connections while the movie uploads
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            extras = self._upload_version_extras(executor, sg_version, movie_path)
+            try:
+                # NOTE: uploading some stuff baby boy!!!
+                with self._client() as sg, self.tracer.span('sub2d.upload_movie', bytes=os.path.getsize(movie_path)):
+                    uploader = ChunkedUploader(sg,
+                                               chunk_size=self.upload_chunk_size,
+                                               retries=self.upload_retries,
+                                               tracer=self.tracer)
+                    uploader.upload('Version',
+                                    sg_version['id'],
+                                    movie_path,
+                                    'sg_uploaded_movie',
+                                    os.path.basename(movie_path),
+                                    qt_pg=qt_pg)
+            except UploadInterruptedError:
+                raise
+            except Exception:
+                # NOTE: a Version without its movie is useless, network errors included
+                try:
+                    self._delete_version(sg_version)
+                except Exception as msg:
+                    self.log.warning('failed to delete Version %s: %s' % (sg_version['id'], msg))
+                raise
+            finally:
+                for path, future in extras:
+                    try:
+                        future.result()
+                    except Exception as msg:
+                        # NOTE: Shotgrid makes its own once the movie is transcoded so this is not fatal
+                        self.log.warning('failed to upload %s: %s' % (path, msg))
+
+    def _upload_version_extras(self, executor, sg_version, movie_path):
+        """
+        start the uploads of the thumbnail and filmstrip rendered with the movie
+
+        :return: [(path, future)]
+        """
+        thumbnail, filmstrip = self._extras_paths(movie_path)
+        futures = []
+
+        for path, method in ((thumbnail, 'upload_thumbnail'), (filmstrip, 'upload_filmstrip_thumbnail')):
+            if os.path.isfile(path):
+                futures.append((path, executor.submit(self._upload_extra, method, sg_version, path)))
+
+        return futures
+
+    def _upload_extra(self, method, sg_version, path):
+        with self._client() as sg:
+            return getattr(sg, method)('Version', sg_version['id'], path)
+
+    def resume_upload(self, sg_version, movie_path, qt_pg=None):
+        """
+        pick up an upload that raised UploadInterruptedError from the last confirmed chunk
+
+        :param dict sg_version:
+        :param str movie_path: the same movie that was being uploaded
+        :param QtWidgets.QProgressBar qt_pg: receives the KiB sent so far
+        """
+        self._upload_version_movie(sg_version, movie_path, qt_pg=qt_pg)
 
-        if not os.path.isfile(temp_media_path):
-            raise RuntimeError('Failed to generate temporary media %s' % temp_media_path)
+    def upload_review_media(self, task_ent, media_path, comment, qt_pg=None, profile=None):
+        """
 
-        # NOTE: now that our media is ready let's upload this sucker!!!
+        :param dict task_ent:
+        :param str media_path:
+        :param str comment:
+        :param QtWidgets.QProgressBar qt_pg:
+        :param str profile: encode profile name, defaults to encode_profile
+        """
+        with self.tracer.span('sub2d.upload_review_media', media_path=media_path, profile=profile):
+            return self._upload_review_media(task_ent, media_path, comment, qt_pg=qt_pg, profile=profile)
+
+    def _upload_review_media(self, task_ent, media_path, comment, qt_pg=None, profile=None):
+        self._validate_media(media_path)
+
+        # NOTE: every submission renders in its own folder so parallel ones can't clobber each other
+        with self._workspaces.create('upload') as workspace:
+
+            # NOTE: the Version gets created on the side while ffmpeg is busy
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                version_future = executor.submit(self.make_version_for_task,
+                                                 task_ent,
+                                                 self._get_version_base_name(task_ent),
+                                                 comment)
+                try:
+                    movie_path = self._encode_review_media(media_path,
+                                                           workspace.file('review.mov'),
+                                                           qt_pg=qt_pg,
+                                                           profile=profile)
+                except Exception:
+                    # NOTE: the encode error is the one worth reporting, don't let the Version hide it
+                    try:
+                        self._delete_version(version_future.result())
+                    except Exception as msg:
+                        self.log.warning('failed to drop the Version after the encode failed: %s' % msg)
+                    raise
+
+                sg_version = version_future.result()
+
+            # NOTE: now that our media is ready let's upload this sucker!!!
+            try:
+                self._upload_version_movie(sg_version, movie_path, qt_pg=qt_pg)
+            except UploadInterruptedError:
+                # NOTE: the movie has to stay around for resume_upload
+                workspace.keep()
+                raise
+
+        return sg_version
+
+    def _create_versions_batch(self, jobs):
+        """
+        create the Versions for many jobs with a single batch request, version numbers are
+        allocated once per task/name and handed out in order to the jobs sharing them
 
-        sg_version = self.make_version_for_task(task_ent,
-                                                "%s_%s_%s" % (task_ent['entity']['name'], task_ent['cached_display_name'], 'Sub2D'),  # NOTE: you can come up with cooler way to name your media
-                                                comment)
+        :param [dict] jobs: valid jobs, each one gets its "version" key set, or "version_error"
+                            when its name collided and a new Version could not be made
+        """
+        fields = ['project', 'entity', 'sg_task', 'code', 'description', 'sg_path_to_frames']
+        latest = {}
+        requests = []
+
+        for job in jobs:
+            task_ent = job['task']
+            ver_prefix = self._get_version_base_name(task_ent) + '_v'
+            group = (task_ent['id'], ver_prefix)
+
+            if group not in latest:
+                latest[group] = self._get_latest_version_number(task_ent, ver_prefix)
+
+            latest[group] += 1
+            requests.append({'request_type': 'create',
+                             'entity_type': 'Version',
+                             'data': {'project': task_ent['project'],
+                                      'code': self._format_version_name(ver_prefix, latest[group]),
+                                      'description': job['comment'],
+                                      'sg_task': task_ent,
+                                      'entity': task_ent['entity']},
+                             'return_fields': fields})
+
+        with self._client() as sg:
+            versions = sg.batch(requests)
+        self._cache.invalidate('Version')
+
+        # NOTE: from here on the Versions exist on the site, each job owns its own
+        for job, sg_version in zip(jobs, versions):
+            job['version'] = sg_version
 
         try:
-            # NOTE: uploading some stuff baby boy!!!
-            self.sg.upload('Version',
-                           sg_version['id'],
-                           temp_media_path,
-                           'sg_uploaded_movie',
-                           os.path.basename(temp_media_path))
-        except ShotgunError as msg:
-            self.sg.delete('Version', sg_version['id'])
-            raise msg
+            # NOTE: check all the names in one go, anything another submitter grabbed first
+            # gets deleted and re allocated one by one
+            with self._client() as sg:
+                dupes = sg.find('Version',
+                                [['sg_task', 'in', [job['task'] for job in jobs]],
+                                 ['code', 'in', [ver['code'] for ver in versions]]],
+                                ['id', 'code', 'sg_task'],
+                                order=[{'field_name': 'id', 'direction': 'asc'}])
+        except Exception:
+            # NOTE: without the check the names can't be trusted, don't leave the Versions behind
+            for job, sg_version in zip(jobs, versions):
+                job.pop('version', None)
+                try:
+                    self._delete_version(sg_version)
+                except Exception as msg:
+                    self.log.warning('failed to delete Version %s: %s' % (sg_version['id'], msg))
+            raise
+
+        first_ids = {}
+        for dupe in dupes:
+            first_ids.setdefault((dupe['sg_task']['id'], dupe['code']), dupe['id'])
+
+        for job, sg_version in zip(jobs, versions):
+            if first_ids.get((job['task']['id'], sg_version['code']), sg_version['id']) == sg_version['id']:
+                continue
+
+            try:
+                self._delete_version(sg_version)
+                job['version'] = None
+                job['version'] = self.make_version_for_task(job['task'],
+                                                            self._get_version_base_name(job['task']),
+                                                            job['comment'])
+            except Exception as msg:
+                # NOTE: one collision only fails its own job
+                self.log.warning('failed to re allocate Version %s: %s' % (sg_version['code'], msg))
+                job['version_error'] = str(msg)
+
+    def submit_many(self, jobs, encode_workers=2, upload_workers=4, queue_size=4):
+        """
+        submit many image sequences at once, all the inputs are validated up front, the Versions
+        are created with a single batch request while the encodes run and the encoded movies are
+        uploaded as soon as they are ready (see SubmissionPipeline)
+
+        :param [dict] jobs: list of {"task": task_ent, "media_path": str, "comment": str}, a job can
+                            also pick its own encode "profile"
+        :param int encode_workers: how many encodes run at the same time
+        :param int upload_workers: how many uploads run at the same time
+        :param int queue_size: how many encoded movies can wait for an upload slot
+        :return: one {"job": dict, "version": dict, "error": str} report per job in the same order,
+                 a failing job never aborts the others
+        """
+        reports = [{'job': job, 'version': None, 'error': None} for job in jobs]
+        valid = []
+
+        for report in reports:
+            job = report['job']
+            try:
+                self._validate_task(job.get('task') or {})
+                self._validate_media(job.get('media_path') or '')
+                if not job.get('comment'):
+                    raise ValueError('a comment is required')
+                if job.get('profile'):
+                    get_profile(job['profile'])
+            except (ValueError, NotImplementedError) as msg:
+                report['error'] = str(msg)
+                continue
+
+            valid.append(dict(job, report=report))
+
+        if not valid:
+            return reports
+
+        pipeline = SubmissionPipeline(self,
+                                      encode_workers=encode_workers,
+                                      upload_workers=upload_workers,
+                                      queue_size=queue_size)
+        with self.tracer.span('sub2d.submit_many', jobs=len(valid)):
+            pipeline.run(valid)
+
+        return reports
 
 
 if __name__ == '__main__':
@@ -0,0 +1,276 @@
+'''
+sub2d_benchmark
+===============
+
+offline end to end benchmark of a submission, synthetic JPEG or EXR sequences are rendered
+with ffmpeg's test source and submitted to a fake_shotgun.FakeSite so the numbers only
+depend on this machine and the simulated network, every run is appended to a json lines
+file together with the commit it ran on and compared with the last run using the same
+settings so regressions show up between commits
+
+    python -m shot_grid_sub_2_dailies.sub2d_benchmark --jobs 4 --frames 48 --size 1920x1080 --ext .exr
+
+the stages measured are
+
+    discovery           finding the frames of each sequence on disk (cold SequenceIndex)
+    version_allocation  creating one Version per job with the batch request
+    version_single      creating a Version the way the dialog does
+    encode              encoding each sequence to the review movie
+    upload              uploading each movie with its thumbnail and filmstrip
+    submit_many         all of the above through the SubmissionPipeline
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+from tempfile import mkdtemp
+import time
+
+from shot_grid_sub_2_dailies.fake_shotgun import FakeShotgun, FakeSite
+from shot_grid_sub_2_dailies.ffmpeg_helper import FFMpegHelper
+from shot_grid_sub_2_dailies.ffmpeg_helper.sequence_index import SequenceIndex
+from shot_grid_sub_2_dailies.sub2d_api import Sub2DAPI
+from shot_grid_sub_2_dailies.tracing import Tracer
+from shot_grid_sub_2_dailies.workspace import WorkspaceManager
+
+
+DEFAULT_RESULTS = os.environ.get('SUB2D_BENCHMARK_RESULTS', 'sub2d_benchmarks.jsonl')
+
+
+def _stage(samples, unit, items):
+    '''
+    returns the stats of a stage
+
+    :param [float] samples: seconds taken by each job
+    :param str unit: what items counts ie "frames" or "bytes"
+    :param int items: total frames/bytes/jobs processed
+    '''
+    total = sum(samples)
+    return {'count': len(samples),
+            'unit': unit,
+            'items': items,
+            'total': total,
+            'mean': total / len(samples) if samples else 0.0,
+            'max': max(samples) if samples else 0.0,
+            'throughput': items / total if total else None}
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL,
+                                encoding='utf-8')
+    except OSError:
+        return None
+
+    return result.stdout.strip() or None
+
+
+def run_benchmark(jobs=4,
+                  frames=48,
+                  size='1920x1080',
+                  ext='.jpg',
+                  frame_rate=24,
+                  latency=0.05,
+                  bandwidth=50 * 1024 ** 2,
+                  profile=None,
+                  segments=None):
+    '''
+    run every stage once and returns the result record
+
+    :param int jobs: sequences submitted
+    :param int frames: frames per sequence
+    :param str size: width x height of the frames
+    :param str ext: .jpg or .exr
+    :param int frame_rate:
+    :param float latency: simulated seconds per Shotgrid request
+    :param float bandwidth: simulated upload bytes per second, None uploads instantly
+    :param str profile: encode profile, defaults to Sub2DAPI.encode_profile
+    :param int segments: passed to the encode, None lets Sub2DAPI decide
+    :return: {"commit", "time", "host", "params", "stages", "spans"}
+    '''
+    params = {'jobs': jobs,
+              'frames': frames,
+              'size': size,
+              'ext': ext,
+              'frame_rate': frame_rate,
+              'latency': latency,
+              'bandwidth': bandwidth,
+              'profile': profile or Sub2DAPI.encode_profile,
+              'segments': segments}
+
+    root = mkdtemp(prefix='sub2d_e2e_bench_')
+    try:
+        tracer = Tracer()
+        site = FakeSite()
+        tasks = site.populate(shots=jobs)
+        api = Sub2DAPI(tracer=tracer,
+                       workspaces=WorkspaceManager(root=os.path.join(root, 'jobs')),
+                       sg_factory=lambda: FakeShotgun(site, latency=latency, bandwidth=bandwidth))
+        ffmpeg = FFMpegHelper(tracer=tracer)
+
+        media_paths = []
+        for task in tasks:
+            pattern = os.path.join(root, 'renders', task['entity']['name'], 'plate.%04d' + ext)
+            media_paths.append(ffmpeg.render_test_sequence(pattern, frames=frames, size=size, frame_rate=frame_rate))
+
+        stages = {}
+
+        samples = [_timed(SequenceIndex().find, path)[1] for path in media_paths]
+        stages['discovery'] = _stage(samples, 'frames', frames * jobs)
+
+        batch_jobs = [{'task': task, 'comment': 'benchmark'} for task in tasks]
+        _, seconds = _timed(api._create_versions_batch, batch_jobs)
+        stages['version_allocation'] = _stage([seconds], 'versions', len(batch_jobs))
+
+        _, seconds = _timed(api.make_version_for_task, tasks[0], api._get_version_base_name(tasks[0]), 'benchmark')
+        stages['version_single'] = _stage([seconds], 'versions', 1)
+
+        movies = []
+        samples = []
+        for index, media_path in enumerate(media_paths):
+            output = os.path.join(root, 'movies', str(index), 'review.mov')
+            os.makedirs(os.path.dirname(output))
+            movie, seconds = _timed(api._encode_review_media, media_path, output, segments=segments, profile=profile)
+            movies.append(movie)
+            samples.append(seconds)
+        stages['encode'] = _stage(samples, 'frames', frames * jobs)
+
+        samples = []
+        for job, movie in zip(batch_jobs, movies):
+            samples.append(_timed(api._upload_version_movie, job['version'], movie)[1])
+        stages['upload'] = _stage(samples, 'bytes', sum(os.path.getsize(movie) for movie in movies))
+
+        submit_jobs = [{'task': task, 'media_path': media_path, 'comment': 'benchmark', 'profile': profile}
+                       for task, media_path in zip(tasks, media_paths)]
+        reports, seconds = _timed(api.submit_many, submit_jobs)
+        errors = [report['error'] for report in reports if report['error']]
+        if errors:
+            raise RuntimeError('submit_many failed: %s' % errors[0])
+        stages['submit_many'] = _stage([seconds], 'jobs', len(submit_jobs))
+
+        return {'commit': _commit(),
+                'time': time.time(),
+                'host': platform.node(),
+                'params': params,
+                'stages': stages,
+                'spans': tracer.summary()}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def load_results(path):
+    '''
+    returns the records stored in the results file, oldest first
+    '''
+    if not os.path.isfile(path):
+        return []
+
+    records = []
+    with open(path, 'r') as strm:
+        for line in strm:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def save_result(path, record):
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    with open(path, 'a') as strm:
+        strm.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def previous_result(records, record):
+    '''
+    returns the last record that ran with the same params and host, None when there is none
+    '''
+    for other in reversed(records):
+        if other['params'] == record['params'] and other['host'] == record['host']:
+            return other
+    return None
+
+
+def format_table(record, previous=None):
+    '''
+    returns the stages as a text table, with the change of the mean against the previous run
+    '''
+    lines = ['%-20s %6s %10s %10s %16s %10s' % ('stage', 'count', 'mean s', 'max s', 'throughput', 'change')]
+    for name, stage in record['stages'].items():
+        change = ''
+        if previous and name in previous['stages'] and previous['stages'][name]['mean']:
+            before = previous['stages'][name]['mean']
+            change = '%+.1f%%' % (100.0 * (stage['mean'] - before) / before)
+
+        throughput = stage['throughput']
+        if throughput is None:
+            throughput = '-'
+        elif stage['unit'] == 'bytes':
+            throughput = '%.1f MB/s' % (throughput / 1024 ** 2)
+        else:
+            throughput = '%.1f %s/s' % (throughput, stage['unit'])
+
+        lines.append('%-20s %6d %10.3f %10.3f %16s %10s' % (name, stage['count'], stage['mean'], stage['max'],
+                                                            throughput, change))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='measure a submission end to end against a fake Shotgrid site')
+    parser.add_argument('--jobs', type=int, default=4)
+    parser.add_argument('--frames', type=int, default=48)
+    parser.add_argument('--size', default='1920x1080')
+    parser.add_argument('--ext', default='.jpg', choices=('.jpg', '.exr'))
+    parser.add_argument('--frame-rate', type=int, default=24)
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated seconds per Shotgrid request')
+    parser.add_argument('--bandwidth', type=float, default=50.0, help='simulated upload MB/s, 0 for unlimited')
+    parser.add_argument('--profile', help='encode profile, see ffmpeg_helper.encode_profiles')
+    parser.add_argument('--segments', type=int, help='encode chunks, 0 uses one per core')
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help='json lines file the run is appended to')
+    parser.add_argument('--no-save', action='store_true', help='only print the results')
+    args = parser.parse_args(argv)
+
+    segments = args.segments
+    if segments == 0:
+        segments = os.cpu_count() or 1
+
+    record = run_benchmark(jobs=args.jobs,
+                           frames=args.frames,
+                           size=args.size,
+                           ext=args.ext,
+                           frame_rate=args.frame_rate,
+                           latency=args.latency,
+                           bandwidth=args.bandwidth * 1024 ** 2 or None,
+                           profile=args.profile,
+                           segments=segments)
+
+    previous = previous_result(load_results(args.results), record)
+    if previous:
+        print('compared with %s' % (previous['commit'] or time.ctime(previous['time'])))
+    print(format_table(record, previous))
+
+    if not args.no_save:
+        save_result(args.results, record)
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+'''
+submission_pipeline
+===================
+
+producer/consumer pipeline used to submit many image sequences, a pool of encoders
+feeds a pool of uploaders through a bounded queue so the cpu and the network are
+busy at the same time while the Versions get created in the background
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from concurrent.futures import ThreadPoolExecutor, wait
+from logging import getLogger
+import os
+from queue import Queue
+from threading import Thread
+
+from shot_grid_sub_2_dailies.chunked_upload import UploadInterruptedError
+
+
+class SubmissionPipeline(object):
+    '''
+    encode stage -> bounded queue -> upload stage
+
+    :param Sub2DAPI api: api used to create the Versions, encode and upload
+    :param int encode_workers: how many ffmpeg encodes run at the same time
+    :param int upload_workers: how many uploads run at the same time
+    :param int queue_size: how many encoded movies can wait for an upload slot before encoders
+                           block, keeps the temp disk usage bounded
+    '''
+
+    def __init__(self, api, encode_workers=2, upload_workers=4, queue_size=4):
+        self.encode_workers = encode_workers
+        self.upload_workers = upload_workers
+        self.queue_size = queue_size
+
+        self._api = api
+        self.log = getLogger('Sub2D_Pipeline')
+
+    def _encode_segments(self):
+        # NOTE: the encode workers already run side by side so each one gets its share of the cores
+        return max(1, (os.cpu_count() or 1) // self.encode_workers)
+
+    def _encode(self, job, queue):
+        try:
+            workspace = job['workspace'] = self._api.workspaces.create('job')
+            movie_path = self._api._encode_review_media(job['media_path'],
+                                                        workspace.file('review.mov'),
+                                                        segments=self._encode_segments(),
+                                                        profile=job.get('profile'))
+        except Exception as msg:
+            self.log.error('failed to encode %s: %s' % (job['media_path'], msg))
+            queue.put((job, None, msg))
+            return
+
+        queue.put((job, movie_path, None))
+
+    def _upload_worker(self, queue, versions_future):
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+
+            job, movie_path, error = item
+            try:
+                self._upload(job, movie_path, error, versions_future)
+            except Exception as msg:
+                # NOTE: an uploader that dies leaves the encoders blocked on the full queue
+                self.log.error('failed to upload %s: %s' % (job['media_path'], msg))
+                job['report']['error'] = job['report'].get('error') or str(msg)
+            finally:
+                self._release_workspace(job)
+
+    def _release_workspace(self, job):
+        workspace = job.get('workspace')
+        if workspace is None:
+            return
+
+        try:
+            # NOTE: interrupted uploads keep their movie around so they can be resumed
+            if job['report'].get('resume_movie'):
+                workspace.keep()
+            else:
+                workspace.cleanup()
+        except Exception as msg:
+            self.log.error('failed to clean up %s: %s' % (workspace.path, msg))
+
+    def _delete_version(self, job):
+        try:
+            self._api._delete_version(job['version'])
+        except Exception as msg:
+            self.log.error('failed to delete Version %s: %s' % (job['version'].get('id'), msg))
+
+    def _upload(self, job, movie_path, error, versions_future):
+        report = job['report']
+
+        try:
+            versions_future.result()
+        except Exception as msg:
+            report['error'] = 'Failed to create Version: %s' % msg
+            return
+
+        if job.get('version_error'):
+            report['error'] = 'Failed to create Version: %s' % job['version_error']
+            # NOTE: set when the colliding Version could not be deleted
+            if job.get('version'):
+                self._delete_version(job)
+            return
+
+        if error is not None:
+            report['error'] = str(error)
+            self._delete_version(job)
+            return
+
+        try:
+            self._api._upload_version_movie(job['version'], movie_path)
+        except UploadInterruptedError as msg:
+            report['error'] = str(msg)
+            report['version'] = job['version']
+            report['resume_movie'] = movie_path
+            return
+        except Exception as msg:
+            report['error'] = str(msg)
+            return
+
+        report['version'] = job['version']
+
+    def run(self, jobs):
+        '''
+        push the jobs through the pipeline, each job needs "task", "media_path", "comment" and
+        a "report" dict that gets its "version" or "error" keys filled in, jobs whose upload got
+        interrupted also get "resume_movie" so they can be finished with Sub2DAPI.resume_upload
+
+        :param [dict] jobs: jobs that already passed validation
+        '''
+        queue = Queue(maxsize=self.queue_size)
+
+        with ThreadPoolExecutor(max_workers=1) as creator, \
+                ThreadPoolExecutor(max_workers=self.encode_workers) as encoders:
+
+            # NOTE: Versions get created while the first encodes are running
+            versions_future = creator.submit(self._api._create_versions_batch, jobs)
+
+            uploaders = [Thread(target=self._upload_worker, args=(queue, versions_future))
+                         for _ in range(self.upload_workers)]
+            for uploader in uploaders:
+                uploader.daemon = True
+                uploader.start()
+
+            futures = [encoders.submit(self._encode, job, queue) for job in jobs]
+            try:
+                wait(futures)
+            finally:
+                # NOTE: the uploaders must always be told to stop or run() never returns
+                for _ in uploaders:
+                    queue.put(None)
+
+                for uploader in uploaders:
+                    uploader.join()
+
+            for future in futures:
+                future.result()
+
+        return [job['report'] for job in jobs]
@@ -0,0 +1,94 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import os
+import shutil
+from tempfile import mkdtemp
+import unittest
+
+from shot_grid_sub_2_dailies.chunked_upload import ChunkedUploader, UploadInterruptedError
+from shot_grid_sub_2_dailies.tracing import Tracer
+
+
+class _FakeStorageClient(object):
+    '''
+    stand in for the cloud storage side of a Shotgun client
+    '''
+
+    def __init__(self, fail_parts=None):
+        self.fail_parts = set(fail_parts or [])
+        self.parts = {}
+        self.completed = None
+
+    def _requires_direct_s3_upload(self, entity_type, field_name):
+        return True
+
+    def _get_attachment_upload_info(self, is_thumbnail, filename, is_multipart_upload):
+        return {'upload_info': 'link-info', 'upload_id': 'abc'}
+
+    def _get_upload_part_link(self, upload_info, filename, part_number):
+        if part_number in self.fail_parts:
+            raise IOError('connection reset')
+        return 'part-%d' % part_number
+
+    def _upload_data_to_storage(self, data, content_type, size, part_url):
+        self.parts[part_url] = data
+        return 'etag-%s' % part_url
+
+    def _complete_multipart_upload(self, upload_info, filename, etags):
+        self.completed = list(etags)
+
+
+class TestChunkedUploader(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._root = mkdtemp()
+        self._movie = os.path.join(self._root, 'movie.mov')
+        self._chunk_size = ChunkedUploader.min_chunk_size
+
+        with open(self._movie, 'wb') as strm:
+            strm.write(b'x' * (self._chunk_size * 2 + 10))
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    def _uploader(self, sg, tracer=None):
+        uploader = ChunkedUploader(sg,
+                                   chunk_size=self._chunk_size,
+                                   retries=1,
+                                   backoff=0,
+                                   state_dir=os.path.join(self._root, 'state'),
+                                   tracer=tracer)
+        uploader._link_upload = lambda *args: 42
+        return uploader
+
+    def test_resume_after_interruption(self):
+        sg = _FakeStorageClient(fail_parts=[2])
+
+        with self.assertRaises(UploadInterruptedError):
+            self._uploader(sg).upload('Version', 1, self._movie)
+
+        self.assertListEqual(sorted(sg.parts), ['part-1'])
+
+        # NOTE: second run only sends what is missing
+        sg.fail_parts.clear()
+        sg.parts.clear()
+        attachment_id = self._uploader(sg).upload('Version', 1, self._movie)
+
+        self.assertEqual(attachment_id, 42)
+        self.assertListEqual(sorted(sg.parts), ['part-2', 'part-3'])
+        self.assertListEqual(sg.completed, ['etag-part-1', 'etag-part-2', 'etag-part-3'])
+        self.assertListEqual(os.listdir(os.path.join(self._root, 'state')), [])
+
+    def test_tracer(self):
+        tracer = Tracer()
+        self._uploader(_FakeStorageClient(), tracer=tracer).upload('Version', 1, self._movie)
+
+        self.assertEqual(tracer.summary()['upload.chunk']['count'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import os
+import shutil
+from tempfile import mkdtemp
+import time
+import unittest
+
+from shot_grid_sub_2_dailies.encode_cache import EncodeCache
+
+
+class TestEncodeCache(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._root = mkdtemp()
+        self._cache = EncodeCache(root=os.path.join(self._root, 'cache'), max_bytes=25)
+
+        self._frames = []
+        for frame in range(3):
+            self._frames.append(self._write('frame.%04d.jpg' % frame, b'frame'))
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    def _write(self, name, data):
+        path = os.path.join(self._root, name)
+        with open(path, 'wb') as strm:
+            strm.write(data)
+        return path
+
+    def test_fingerprint(self):
+        key = self._cache.fingerprint(self._frames, {'profile': 'final'})
+        self.assertEqual(key, self._cache.fingerprint(self._frames, {'profile': 'final'}))
+        self.assertNotEqual(key, self._cache.fingerprint(self._frames, {'profile': 'preview'}))
+        self.assertNotEqual(key, self._cache.fingerprint(self._frames[:2], {'profile': 'final'}))
+
+        # NOTE: re rendering a frame changes its size or mtime
+        self._write('frame.0001.jpg', b'frame v2')
+        self.assertNotEqual(key, self._cache.fingerprint(self._frames, {'profile': 'final'}))
+
+    def test_get_put(self):
+        self.assertIsNone(self._cache.get('abc'))
+
+        movie = self._write('movie.mov', b'x' * 10)
+        cached = self._cache.put('abc', movie, move=True)
+
+        self.assertFalse(os.path.isfile(movie))
+        self.assertEqual(self._cache.get('abc'), cached)
+        self.assertTrue(self._cache.contains(cached))
+        self.assertFalse(self._cache.contains(movie))
+        self.assertDictEqual(self._cache.stats(), {'hits': 1, 'misses': 1, 'entries': 1, 'bytes': 10})
+
+    def test_extras(self):
+        movie = self._write('movie.mov', b'x' * 5)
+        thumbnail = self._write('thumbnail.jpg', b'x')
+
+        cached = self._cache.put('abc', movie, move=True, extras=[thumbnail])
+        self.assertTrue(os.path.isfile(os.path.join(os.path.dirname(cached), 'thumbnail.jpg')))
+        self.assertFalse(os.path.isfile(thumbnail))
+
+    def test_get_target(self):
+        movie = self._write('movie.mov', b'x' * 10)
+        thumbnail = self._write('thumbnail.jpg', b'x')
+        self._cache.put('abc', movie, move=True, extras=[thumbnail])
+
+        job_root = os.path.join(self._root, 'job')
+        os.makedirs(job_root)
+        target = os.path.join(job_root, 'review.mov')
+
+        self.assertEqual(self._cache.get('abc', target=target), target)
+        self.assertTrue(os.path.isfile(os.path.join(job_root, 'thumbnail.jpg')))
+
+        # NOTE: the job keeps its movie when the entry is evicted while it is uploading
+        self._cache.clear()
+        with open(target, 'rb') as strm:
+            self.assertEqual(strm.read(), b'x' * 10)
+        self.assertIsNone(self._cache.get('abc', target=target))
+
+    def test_lru_eviction(self):
+        for key in ('a', 'b'):
+            self._cache.put(key, self._write('%s.mov' % key, b'x' * 10))
+            time.sleep(0.02)
+
+        # NOTE: a hit makes "a" the most recently used one so "b" goes first
+        self._cache.get('a')
+        time.sleep(0.02)
+        self._cache.put('c', self._write('c.mov', b'x' * 10))
+
+        self.assertIsNotNone(self._cache.get('a'))
+        self.assertIsNone(self._cache.get('b'))
+        self.assertIsNotNone(self._cache.get('c'))
+
+
+if __name__ == '__main__':
+    unittest.main()
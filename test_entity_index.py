@@ -0,0 +1,67 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import time
+import unittest
+
+from shot_grid_sub_2_dailies.entity_index import EntityIndex
+
+
+SHOTS = [{'type': 'Shot', 'id': 1, 'code': 'SQ010_SH0010'},
+         {'type': 'Shot', 'id': 2, 'code': 'SQ010_SH0020'},
+         {'type': 'Shot', 'id': 3, 'code': 'sh0010_SQ020'},
+         {'type': 'Shot', 'id': 4, 'code': 'SQ020_SH0010'},
+         {'type': 'Shot', 'id': 5, 'code': None}]
+
+
+class TestEntityIndex(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._index = EntityIndex(SHOTS, 'code')
+
+    def test_empty_search(self):
+        self.assertListEqual(self._index.search(''), [0, 1, 2, 3, 4])
+        self.assertListEqual(self._index.search('  ', limit=2), [0, 1])
+        self.assertListEqual(EntityIndex().search('sh'), [])
+
+    def test_prefix(self):
+        self.assertListEqual(self._index.prefix('sq010'), [0, 1])
+        self.assertListEqual(self._index.prefix('SQ0'), [0, 1, 3])
+        self.assertListEqual(self._index.prefix('zz'), [])
+
+    def test_substring(self):
+        self.assertListEqual(self._index.substring('sh0010'), [0, 2, 3])
+        self.assertListEqual(self._index.substring('sh0010', limit=2), [0, 2])
+        # NOTE: matches never run across two labels
+        self.assertListEqual(self._index.substring('0010\nsq'), [])
+        self.assertListEqual(self._index.substring('0_sh0020'), [1])
+
+    def test_search_ranks_prefix_first(self):
+        self.assertListEqual(self._index.search('sh0010'), [2, 0, 3])
+        self.assertListEqual(self._index.search('SH0010', limit=2), [2, 0])
+
+    def test_labels(self):
+        self.assertEqual(self._index.label(4), '')
+        self.assertEqual(self._index.row_of(4), 3)
+        self.assertIsNone(self._index.row_of(99))
+        self.assertEqual(len(self._index), 5)
+
+    def test_large_show(self):
+        shots = [{'type': 'Shot', 'id': i, 'code': 'SQ%03d_SH%04d' % (i // 1000, i % 1000)} for i in range(50000)]
+        index = EntityIndex(shots, 'code')
+
+        start = time.perf_counter()
+        for text in ('s', 'sq04', 'sq049_sh09', '_sh0999', 'h09'):
+            rows = index.search(text)
+        seconds = time.perf_counter() - start
+
+        self.assertEqual(len(rows), 5000)
+        self.assertListEqual(index.search('_sh0999'), list(range(999, 50000, 1000)))
+        # NOTE: generous bound, a keystroke has to answer well inside a frame or two
+        self.assertLess(seconds, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import unittest
+
+from shot_grid_sub_2_dailies.entity_store import EntityStore
+from shot_grid_sub_2_dailies.query_cache import make_query_key
+
+
+class TestEntityStore(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._store = EntityStore(':memory:', full_sync_interval=100.0, clock_skew=10.0)
+        self._key = make_query_key('Shot', [['project', 'is', {'type': 'Project', 'id': 1}]], ['code'])
+        self._order = [{'field_name': 'code', 'direction': 'asc'}]
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        self._store.close()
+
+    def test_never_synced(self):
+        self.assertIsNone(self._store.rows(self._key))
+        self.assertIsNone(self._store.since(self._key))
+        self.assertTrue(self._store.needs_full_sync(self._key))
+
+    def test_replace_and_upsert(self):
+        self._store.replace(self._key,
+                            [{'type': 'Shot', 'id': 2, 'code': 'sh020'},
+                             {'type': 'Shot', 'id': 1, 'code': 'sh010'}],
+                            synced_at=1000.0)
+
+        self.assertFalse(self._store.needs_full_sync(self._key, now=1050.0))
+        self.assertTrue(self._store.needs_full_sync(self._key, now=1200.0))
+        self.assertEqual(self._store.since(self._key), 990.0)
+
+        self._store.upsert(self._key,
+                           [{'type': 'Shot', 'id': 2, 'code': 'sh005'},
+                            {'type': 'Shot', 'id': 3, 'code': 'sh030'}],
+                           synced_at=1060.0)
+
+        codes = [row['code'] for row in self._store.rows(self._key, self._order)]
+        self.assertListEqual(codes, ['sh005', 'sh010', 'sh030'])
+        self.assertEqual(self._store.since(self._key), 1050.0)
+
+        # NOTE: upserts don't move the full sync time
+        self.assertTrue(self._store.needs_full_sync(self._key, now=1150.0))
+
+    def test_replace_drops_old_rows(self):
+        self._store.replace(self._key, [{'type': 'Shot', 'id': 1, 'code': 'sh010'}])
+        self._store.replace(self._key, [{'type': 'Shot', 'id': 2, 'code': 'sh020'}])
+
+        self.assertListEqual([row['id'] for row in self._store.rows(self._key)], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import os
+import shutil
+from tempfile import mkdtemp
+import unittest
+
+from shot_grid_sub_2_dailies.fake_shotgun import FakeShotgun, FakeSite
+
+
+class TestFakeShotgun(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._site = FakeSite()
+        self._tasks = self._site.populate(shots=3, tasks=('comp', 'light'))
+        self._sg = FakeShotgun(self._site)
+
+    def test_populate(self):
+        self.assertEqual(len(self._tasks), 6)
+        projects = self._sg.find('Project', [['sg_status', 'is', 'Active']], ['name'])
+        self.assertListEqual([project['name'] for project in projects], ['Bench'])
+
+        for key in ('project', 'entity', 'cached_display_name'):
+            self.assertTrue(self._tasks[0][key])
+
+    def test_find(self):
+        shot = self._tasks[0]['entity']
+        tasks = self._sg.find('Task', [['entity', 'is', shot]], ['content'])
+        self.assertListEqual(sorted(task['content'] for task in tasks), ['comp', 'light'])
+
+        shots = self._sg.find('Shot',
+                              [['sg_sequence', 'is_not', None], ['code', 'starts_with', 'SQ010']],
+                              ['code'],
+                              order=[{'field_name': 'code', 'direction': 'desc'}],
+                              limit=2)
+        self.assertListEqual([shot['code'] for shot in shots], ['SQ010_SH0030', 'SQ010_SH0020'])
+
+        tasks = self._sg.find('Task', [['entity', 'type_is', 'Shot'], ['content', 'in', ['light']]], ['content'])
+        self.assertEqual(len(tasks), 3)
+
+        with self.assertRaises(NotImplementedError):
+            self._sg.find('Task', [['content', 'between', [1, 2]]])
+
+    def test_batch_and_delete(self):
+        task = self._tasks[0]
+        versions = self._sg.batch([{'request_type': 'create',
+                                    'entity_type': 'Version',
+                                    'data': {'code': 'v%03d' % index, 'sg_task': task},
+                                    'return_fields': ['project']} for index in range(2)])
+
+        self.assertListEqual([version['code'] for version in versions], ['v000', 'v001'])
+        self.assertIsNone(versions[0]['project'])
+
+        self.assertTrue(self._sg.delete('Version', versions[0]['id']))
+        found = self._sg.find('Version', [['sg_task', 'is', task]], ['code'])
+        self.assertListEqual([version['code'] for version in found], ['v001'])
+
+    def test_upload(self):
+        root = mkdtemp()
+        try:
+            path = os.path.join(root, 'review.mov')
+            with open(path, 'wb') as strm:
+                strm.write(b'0' * 1024)
+
+            version = self._sg.create('Version', {'code': 'v001'})
+            self._sg.upload('Version', version['id'], path, 'sg_uploaded_movie')
+            self._sg.upload_thumbnail('Version', version['id'], path)
+
+            self.assertListEqual([upload['field_name'] for upload in self._site.uploads],
+                                 ['sg_uploaded_movie', 'thumb_image'])
+            self.assertEqual(self._site.uploads[0]['bytes'], 1024)
+
+            with self.assertRaises(ValueError):
+                self._sg.upload('Version', 9999, path, 'sg_uploaded_movie')
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    unittest.main()
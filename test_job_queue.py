@@ -0,0 +1,239 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import os
+import shutil
+import socket
+import stat
+from tempfile import mkdtemp
+import time
+import unittest
+
+from shot_grid_sub_2_dailies.chunked_upload import UploadInterruptedError
+from shot_grid_sub_2_dailies.job_queue import (CANCELLED, DONE, ENCODED, ENCODING, FAILED, QUEUED, UPLOADING,
+                                               JobQueue, JobWorker)
+from shot_grid_sub_2_dailies.workspace import WorkspaceManager
+
+
+TASK = {'type': 'Task',
+        'id': 4,
+        'cached_display_name': 'comp',
+        'entity': {'type': 'Shot', 'id': 3},
+        'project': {'type': 'Project', 'id': 1}}
+
+
+class FakeAPI(object):
+    def __init__(self, root):
+        self.workspaces = WorkspaceManager(root=os.path.join(root, 'jobs'))
+        self.encode_errors = []
+        self.upload_errors = []
+        self.versions = []
+        self.deleted = []
+        self.uploads = []
+
+    @staticmethod
+    def _validate_task(task_ent):
+        if task_ent.get('type') != 'Task':
+            raise ValueError('task_ent must be of type "Task"')
+
+    def _validate_media(self, media_path):
+        if not media_path.endswith('.jpg'):
+            raise ValueError('not a supported file format')
+
+    @staticmethod
+    def _get_version_base_name(task_ent):
+        return 'base'
+
+    def _encode_review_media(self, media_path, output, qt_pg=None, segments=None, profile=None):
+        if self.encode_errors:
+            raise self.encode_errors.pop(0)
+
+        with open(output, 'wb') as strm:
+            strm.write(b'movie')
+        return output
+
+    def make_version_for_task(self, task_ent, ver_name, comment):
+        version = {'type': 'Version', 'id': 100 + len(self.versions), 'code': ver_name}
+        self.versions.append(version)
+        return version
+
+    def _upload_version_movie(self, sg_version, movie_path, qt_pg=None):
+        if self.upload_errors:
+            raise self.upload_errors.pop(0)
+        self.uploads.append((sg_version['id'], movie_path))
+
+    def _delete_version(self, sg_version):
+        self.deleted.append(sg_version['id'])
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._root = mkdtemp()
+        self._queue = JobQueue(os.path.join(self._root, 'queue.sqlite'), retry_delay=0)
+        self._api = FakeAPI(self._root)
+        self._worker = JobWorker(self._api, self._queue, poll_interval=0.05)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    def test_enqueue_and_drain(self):
+        job_id = self._queue.enqueue(TASK, '/renders/sh010.1001.jpg', 'first pass', submitter='artist')
+
+        job = self._queue.get(job_id)
+        self.assertEqual(job['state'], QUEUED)
+        self.assertDictEqual(job['task'], TASK)
+
+        self.assertTrue(self._worker.encode_one())
+        job = self._queue.get(job_id)
+        self.assertEqual(job['state'], ENCODED)
+        self.assertTrue(os.path.isfile(job['movie_path']))
+
+        self.assertTrue(self._worker.upload_one())
+        job = self._queue.get(job_id)
+        self.assertEqual(job['state'], DONE)
+        self.assertEqual(job['version']['id'], 100)
+        self.assertFalse(os.path.exists(job['workspace']))
+
+        self.assertFalse(self._worker.encode_one())
+        self.assertFalse(self._worker.upload_one())
+
+    def test_priority(self):
+        low = self._queue.enqueue(TASK, 'a.1001.jpg', 'low')
+        high = self._queue.enqueue(TASK, 'b.1001.jpg', 'high', priority=10)
+
+        self.assertEqual(self._queue.claim(QUEUED, ENCODING)['id'], high)
+        self.assertEqual(self._queue.claim(QUEUED, ENCODING)['id'], low)
+        self.assertIsNone(self._queue.claim(QUEUED, ENCODING))
+
+    def test_retries(self):
+        job_id = self._queue.enqueue(TASK, 'a.1001.jpg', 'retry', max_attempts=2)
+        self._api.encode_errors = [RuntimeError('ffmpeg crashed'), RuntimeError('ffmpeg crashed')]
+
+        self._worker.encode_one()
+        job = self._queue.get(job_id)
+        self.assertEqual(job['state'], QUEUED)
+        self.assertEqual(job['attempts'], 1)
+
+        self._worker.encode_one()
+        job = self._queue.get(job_id)
+        self.assertEqual(job['state'], FAILED)
+        self.assertEqual(job['error'], 'ffmpeg crashed')
+
+        self._queue.retry(job_id)
+        self._worker.encode_one()
+        self._worker.upload_one()
+        self.assertEqual(self._queue.get(job_id)['state'], DONE)
+
+    def test_invalid_job_fails_at_once(self):
+        job_id = self._queue.enqueue(TASK, 'a.1001.mov', 'bad media')
+        self._worker.encode_one()
+
+        job = self._queue.get(job_id)
+        self.assertEqual(job['state'], FAILED)
+        self.assertEqual(job['attempts'], 1)
+
+    def test_interrupted_upload_resumes(self):
+        job_id = self._queue.enqueue(TASK, 'a.1001.jpg', 'resume')
+        self._api.upload_errors = [UploadInterruptedError('network down')]
+
+        self._worker.encode_one()
+        self._worker.upload_one()
+        job = self._queue.get(job_id)
+        self.assertEqual(job['state'], ENCODED)
+        self.assertEqual(job['version']['id'], 100)
+
+        self._worker.upload_one()
+        self.assertEqual(self._queue.get(job_id)['state'], DONE)
+        # NOTE: the same Version was used for the second attempt
+        self.assertEqual(len(self._api.versions), 1)
+        self.assertListEqual(self._api.deleted, [])
+
+    def test_failed_upload_drops_version(self):
+        job_id = self._queue.enqueue(TASK, 'a.1001.jpg', 'drop')
+        self._api.upload_errors = [RuntimeError('bad field')]
+
+        self._worker.encode_one()
+        self._worker.upload_one()
+        self.assertIsNone(self._queue.get(job_id)['version'])
+        self.assertListEqual(self._api.deleted, [100])
+
+        self._worker.upload_one()
+        self.assertEqual(self._queue.get(job_id)['version']['id'], 101)
+
+    def test_backoff(self):
+        queue = JobQueue(self._queue.path, retry_delay=60)
+        job_id = queue.enqueue(TASK, 'a.1001.jpg', 'later')
+        job = queue.claim(QUEUED, ENCODING)
+        queue.fail(job, 'boom', retry_state=QUEUED)
+
+        self.assertIsNone(queue.claim(QUEUED, ENCODING))
+        self.assertGreater(queue.get(job_id)['not_before'], time.time() + 50)
+
+    def test_recover(self):
+        encoding = self._queue.enqueue(TASK, 'a.1001.jpg', 'encoding')
+        uploading = self._queue.enqueue(TASK, 'b.1001.jpg', 'uploading')
+        alive = self._queue.enqueue(TASK, 'c.1001.jpg', 'alive')
+
+        movie_path = os.path.join(self._root, 'review.mov')
+        with open(movie_path, 'wb') as strm:
+            strm.write(b'movie')
+
+        # NOTE: above the largest pid linux hands out
+        dead = '%s:%d' % (socket.gethostname(), 2 ** 22 + 1)
+        self._queue.update(encoding, state=ENCODING, owner=dead)
+        self._queue.update(uploading, state=UPLOADING, owner=dead, movie_path=movie_path)
+        self._queue.update(alive, state=ENCODING, owner='%s:%d' % (socket.gethostname(), os.getpid()))
+
+        self.assertListEqual(sorted(self._queue.recover()), [encoding, uploading])
+        self.assertEqual(self._queue.get(encoding)['state'], QUEUED)
+        self.assertEqual(self._queue.get(uploading)['state'], ENCODED)
+        self.assertEqual(self._queue.get(alive)['state'], ENCODING)
+
+    @unittest.skipUnless(os.name == 'posix', 'unix permissions')
+    def test_shared_permissions(self):
+        # NOTE: the umask most logins have, it strips the group write bit
+        umask = os.umask(0o022)
+        self.addCleanup(os.umask, umask)
+
+        path = os.path.join(self._root, 'shared', 'queue.sqlite')
+        queue = JobQueue(path)
+        queue.enqueue(TASK, 'a.1001.jpg', 'shared')
+
+        self.assertTrue(os.stat(os.path.dirname(path)).st_mode & stat.S_IWGRP)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                self.assertTrue(os.stat(path + suffix).st_mode & stat.S_IWGRP, suffix)
+
+    def test_cancel(self):
+        job_id = self._queue.enqueue(TASK, 'a.1001.jpg', 'cancel')
+        self._queue.cancel(job_id)
+        self.assertEqual(self._queue.get(job_id)['state'], CANCELLED)
+        self.assertFalse(self._worker.encode_one())
+
+        # NOTE: running jobs can't be cancelled
+        other = self._queue.enqueue(TASK, 'b.1001.jpg', 'running')
+        self._queue.claim(QUEUED, ENCODING)
+        with self.assertRaises(ValueError):
+            self._queue.cancel(other)
+
+    def test_worker_threads(self):
+        job_ids = [self._queue.enqueue(TASK, 'a%d.1001.jpg' % index, 'pool') for index in range(6)]
+        worker = JobWorker(self._api, self._queue, encode_slots=2, upload_slots=2, backlog=2, poll_interval=0.05)
+        worker.start()
+        try:
+            deadline = time.time() + 10
+            while time.time() < deadline and self._queue.counts()[DONE] < len(job_ids):
+                time.sleep(0.05)
+        finally:
+            worker.stop()
+
+        self.assertEqual(self._queue.counts()[DONE], len(job_ids))
+        self.assertEqual(len(self._api.uploads), len(job_ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
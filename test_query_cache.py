@@ -0,0 +1,67 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import time
+import unittest
+
+from shot_grid_sub_2_dailies.query_cache import QueryCache, make_query_key
+
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._cache = QueryCache(max_entries=2)
+        self._proj_key = make_query_key('Project', [], ['name'], None)
+        self._seq_key = make_query_key('Sequence', [['project', 'is', {'type': 'Project', 'id': 1}]], ['code'])
+        self._shot_key = make_query_key('Shot', [], ['code'])
+
+    def test_make_query_key(self):
+        key_a = make_query_key('Shot', [['code', 'is', 'a']], ['code', 'id'])
+        key_b = make_query_key('Shot', [['code', 'is', 'a']], ['id', 'code'])
+        key_c = make_query_key('Shot', [['code', 'is', 'b']], ['id', 'code'])
+        self.assertEqual(key_a, key_b)
+        self.assertNotEqual(key_a, key_c)
+
+    def test_hit_miss(self):
+        self.assertIsNone(self._cache.get(self._proj_key))
+        self._cache.set(self._proj_key, [{'id': 1}])
+        self.assertListEqual(self._cache.get(self._proj_key), [{'id': 1}])
+
+        stats = self._cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_ttl(self):
+        self._cache.ttls['Project'] = 0.01
+        self._cache.set(self._proj_key, [{'id': 1}])
+        time.sleep(0.02)
+        self.assertIsNone(self._cache.get(self._proj_key))
+
+    def test_lru_eviction(self):
+        self._cache.set(self._proj_key, [])
+        self._cache.set(self._seq_key, [])
+
+        # NOTE: touch the project so the sequence becomes the oldest entry
+        self._cache.get(self._proj_key)
+        self._cache.set(self._shot_key, [])
+
+        self.assertIsNotNone(self._cache.get(self._proj_key))
+        self.assertIsNone(self._cache.get(self._seq_key))
+        self.assertEqual(self._cache.stats()['evictions'], 1)
+
+    def test_invalidate(self):
+        self._cache.set(self._proj_key, [])
+        self._cache.set(self._seq_key, [])
+        self._cache.invalidate('Sequence')
+
+        self.assertIsNone(self._cache.get(self._seq_key))
+        self.assertIsNotNone(self._cache.get(self._proj_key))
+
+        self._cache.invalidate()
+        self.assertIsNone(self._cache.get(self._proj_key))
+
+
+if __name__ == '__main__':
+    unittest.main()
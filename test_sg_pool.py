@@ -0,0 +1,90 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from threading import Lock, Thread
+import time
+import unittest
+
+from shot_grid_sub_2_dailies.sg_pool import ShotgunPool
+
+
+class TestShotgunPool(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._pool = ShotgunPool(object, max_size=2, timeout=5)
+
+    def test_reuse(self):
+        with self._pool.connection() as sg_a:
+            pass
+
+        with self._pool.connection() as sg_b:
+            pass
+
+        self.assertIs(sg_a, sg_b)
+        self.assertEqual(self._pool.size, 1)
+
+    def test_nested_checkout(self):
+        with self._pool.connection() as sg_a:
+            with self._pool.connection() as sg_b:
+                self.assertIs(sg_a, sg_b)
+
+    def test_max_size(self):
+        lock = Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def work():
+            with self._pool.connection():
+                with lock:
+                    state['active'] += 1
+                    state['peak'] = max(state['peak'], state['active'])
+                time.sleep(0.02)
+                with lock:
+                    state['active'] -= 1
+
+        threads = [Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual(self._pool.size, 2)
+
+    def test_clear(self):
+        with self._pool.connection() as sg_a:
+            pass
+
+        with self._pool.connection() as sg_b:
+            self._pool.clear()
+
+        # NOTE: neither the idle client nor the one checked out during clear come back
+        with self._pool.connection() as sg_c:
+            pass
+
+        self.assertIs(sg_a, sg_b)
+        self.assertIsNot(sg_c, sg_a)
+        self.assertEqual(self._pool.size, 1)
+
+    def test_timeout(self):
+        pool = ShotgunPool(object, max_size=1, timeout=0.01)
+        errors = []
+
+        def work():
+            try:
+                with pool.connection():
+                    pass
+            except RuntimeError as msg:
+                errors.append(msg)
+
+        with pool.connection():
+            thread = Thread(target=work)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,13 @@ Created on Nov 30, 2021
 @author: carlos.anguiano
 '''
 
+import os
+import shutil
+import subprocess
+import sys
+from tempfile import mkdtemp
+
+from shot_grid_sub_2_dailies.fake_shotgun import FakeShotgun, FakeSite
 from shot_grid_sub_2_dailies.sub2d_api import Sub2DAPI, Shotgun
 import unittest
 
@@ -118,6 +125,21 @@ class TestSub2DAPI(unittest.TestCase):
 
         self.assertEqual(len(val_types), len(tasks))
 
+    def test_get_hierarchy(self):
+        prjs = self._api.get_projects(name='Demo: Animation')
+        hierarchy = self._api.get_hierarchy(prjs[0])
+        self.assertTrue(len(hierarchy['sequences']) > 0)
+
+        seqs = self._api.get_sequences(prjs[0], name='bunny_070')
+        shots = self._api.get_shots(seqs[0])
+        tree_shots = hierarchy['shots'][seqs[0]['id']]
+        self.assertListEqual([shot['id'] for shot in shots],
+                             [shot['id'] for shot in tree_shots])
+
+        tasks = self._api.get_tasks(shots[0])
+        self.assertSetEqual(set(task['id'] for task in tasks),
+                            set(task['id'] for task in hierarchy['tasks'][shots[0]['id']]))
+
     def test_get_task_versions(self):
         prjs = self._api.get_projects(name='Demo: Animation')
         seqs = self._api.get_sequences(prjs[0], name='bunny_070')
@@ -162,6 +184,188 @@ class TestSub2DAPI(unittest.TestCase):
         self._api.sg.delete('Version', new_ver['id'])  # clean up
         self._api.sg.delete('Version', new_ver2['id'])  # clean up
 
+    def test_submit_many_validation(self):
+        prjs = self._api.get_projects(name='Demo: Animation')
+        seqs = self._api.get_sequences(prjs[0], name='bunny_070')
+        shots = self._api.get_shots(seqs[0])
+        tasks = self._api.get_tasks(shots[0])
+
+        jobs = [{'task': tasks[0], 'media_path': 'c:/not_a_movie.txt', 'comment': 'unit test'},
+                {'task': tasks[0], 'media_path': 'c:/missing/frame.0001.jpg', 'comment': 'unit test'},
+                {'task': {'type': 'Shot', 'id': 1}, 'media_path': 'c:/missing/frame.0001.jpg', 'comment': 'unit test'}]
+
+        reports = self._api.submit_many(jobs)
+        self.assertEqual(len(reports), len(jobs))
+
+        for report, job in zip(reports, jobs):
+            self.assertIs(report['job'], job)
+            self.assertIsNone(report['version'])
+            self.assertTrue(report['error'])
+
+
+class HookedShotgun(FakeShotgun):
+    '''
+    FakeShotgun that pops a hook after every Version find, a hook can raise or change the site,
+    uploads raise upload_error when it is set
+    '''
+
+    def __init__(self, site, hooks, upload_error=None):
+        super(HookedShotgun, self).__init__(site)
+        self.hooks = hooks
+        self.upload_error = upload_error
+
+    def upload(self, entity_type, entity_id, path, field_name=None, display_name=None, tag_list=None):
+        if self.upload_error:
+            raise self.upload_error
+        return super(HookedShotgun, self).upload(entity_type, entity_id, path, field_name=field_name,
+                                                 display_name=display_name, tag_list=tag_list)
+
+    def find(self, entity_type, filters, fields=None, order=None, limit=0, **kwargs):
+        rows = super(HookedShotgun, self).find(entity_type, filters, fields=fields, order=order, limit=limit)
+        if entity_type == 'Version' and self.hooks:
+            hook = self.hooks.pop(0)
+            if hook:
+                hook(self)
+        return rows
+
+
+class TestVersionsOffline(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._site = FakeSite()
+        self._tasks = self._site.populate(shots=2)
+        self._hooks = []
+        self._api = Sub2DAPI(sg_factory=lambda: HookedShotgun(self._site, self._hooks))
+
+    def _versions(self):
+        return sorted(version['code'] for version in self._site.entities.get('Version', {}).values())
+
+    def _jobs(self):
+        return [{'task': task, 'comment': 'unit test'} for task in self._tasks]
+
+    def _intruder(self, sg):
+        # NOTE: another submitter grabbing the name of the second job before our batch
+        sg._create('Version', {'code': 'SQ010_SH0020_comp_Sub2D_v0001', 'sg_task': self._tasks[1]})
+
+    @staticmethod
+    def _fail(sg):
+        raise ConnectionError('Shotgrid is down')
+
+    def _add_versions(self, suffixes):
+        for suffix in suffixes:
+            self._site.add('Version', code='SQ010_SH0010_comp_Sub2D_v' + suffix, sg_task=self._tasks[0])
+
+    def test_latest_version_suffixes(self):
+        # NOTE: the suffixed codes fill the whole lookup window
+        self._add_versions(['0001', '0002', '0003', '0012_retake', '0012b', '0011_a', '0010_x', '0009_y'])
+        self.assertEqual(self._api.gen_unique_version_name(self._tasks[0], 'SQ010_SH0010_comp_Sub2D'),
+                         'SQ010_SH0010_comp_Sub2D_v0004')
+
+    def test_latest_version_past_padding(self):
+        # NOTE: sorted by code v10001 comes after v9995
+        self._add_versions(['9995', '9996', '9997', '9998', '9999', '10000', '10001'])
+        self.assertEqual(self._api.gen_unique_version_name(self._tasks[0], 'SQ010_SH0010_comp_Sub2D'),
+                         'SQ010_SH0010_comp_Sub2D_v10002')
+
+    def test_failed_upload_drops_version(self):
+        root = mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        movie = os.path.join(root, 'review.mov')
+        with open(movie, 'wb') as strm:
+            strm.write(b'movie')
+
+        api = Sub2DAPI(sg_factory=lambda: HookedShotgun(self._site, [], upload_error=IOError('connection reset')))
+        version = api.make_version_for_task(self._tasks[0], 'SQ010_SH0010_comp_Sub2D', 'unit test')
+        self.assertEqual(len(self._versions()), 1)
+
+        with self.assertRaises(IOError):
+            api._upload_version_movie(version, movie)
+
+        self.assertListEqual(self._versions(), [])
+
+    def test_reset_clients(self):
+        clients = []
+
+        def factory():
+            clients.append(FakeShotgun(self._site))
+            return clients[-1]
+
+        api = Sub2DAPI(sg_factory=factory)
+        api.get_projects()
+        api.reset_clients()
+        api.get_projects()
+
+        self.assertEqual(len(clients), 2)
+
+    def test_batch_collision(self):
+        self._hooks.extend([None, self._intruder])
+        jobs = self._jobs()
+        self._api._create_versions_batch(jobs)
+
+        self.assertEqual(jobs[0]['version']['code'], 'SQ010_SH0010_comp_Sub2D_v0001')
+        self.assertEqual(jobs[1]['version']['code'], 'SQ010_SH0020_comp_Sub2D_v0002')
+        self.assertListEqual(self._versions(), ['SQ010_SH0010_comp_Sub2D_v0001',
+                                                'SQ010_SH0020_comp_Sub2D_v0001',
+                                                'SQ010_SH0020_comp_Sub2D_v0002'])
+
+    def test_batch_collision_fails_one_job(self):
+        self._hooks.extend([None, self._intruder, None, self._fail])
+        jobs = self._jobs()
+        self._api._create_versions_batch(jobs)
+
+        self.assertEqual(jobs[0]['version']['code'], 'SQ010_SH0010_comp_Sub2D_v0001')
+        self.assertIsNone(jobs[1]['version'])
+        self.assertIn('Shotgrid is down', jobs[1]['version_error'])
+        self.assertListEqual(self._versions(), ['SQ010_SH0010_comp_Sub2D_v0001',
+                                                'SQ010_SH0020_comp_Sub2D_v0001'])
+
+    def test_version_check_fails(self):
+        # NOTE: the latest version lookup works, the dupe check after the create doesn't
+        self._hooks.extend([None, self._fail])
+        with self.assertRaises(ConnectionError):
+            self._api.make_version_for_task(self._tasks[0], 'SQ010_SH0010_comp_Sub2D', 'unit test')
+
+        self.assertListEqual(self._versions(), [])
+
+    def test_batch_collision_check_fails(self):
+        self._hooks.extend([None, self._intruder, None, None, self._fail])
+        jobs = self._jobs()
+        self._api._create_versions_batch(jobs)
+
+        self.assertIn('Shotgrid is down', jobs[1]['version_error'])
+        self.assertListEqual(self._versions(), ['SQ010_SH0010_comp_Sub2D_v0001',
+                                                'SQ010_SH0020_comp_Sub2D_v0001'])
+
+    def test_batch_dupe_check_fails(self):
+        self._hooks.extend([None, None, self._fail])
+        jobs = self._jobs()
+        with self.assertRaises(ConnectionError):
+            self._api._create_versions_batch(jobs)
+
+        # NOTE: the Versions of the batch don't stay behind
+        self.assertListEqual(self._versions(), [])
+        self.assertNotIn('version', jobs[0])
+
+
+class TestStartup(unittest.TestCase):
+    def test_lazy_imports(self):
+        # NOTE: a fresh interpreter, this one already imported shotgun_api3 above
+        code = ('import sys\n'
+                'from shot_grid_sub_2_dailies.sub2d_api import Sub2DAPI\n'
+                'Sub2DAPI()\n'
+                'print("shotgun_api3" in sys.modules)\n')
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env.pop('FFMPEG', None)
+
+        result = subprocess.run([sys.executable, '-c', code],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                encoding='utf-8',
+                                env=env)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), 'False')
+
 
 if __name__ == '__main__':
     unittest.main()
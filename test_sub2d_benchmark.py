@@ -0,0 +1,59 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import os
+import shutil
+from tempfile import mkdtemp
+import unittest
+
+from shot_grid_sub_2_dailies.ffmpeg_helper.capabilities import find_ffmpeg
+from shot_grid_sub_2_dailies.sub2d_benchmark import (format_table, load_results, previous_result, run_benchmark,
+                                                     save_result)
+
+
+def has_ffmpeg():
+    try:
+        find_ffmpeg()
+    except RuntimeError:
+        return False
+    return True
+
+
+class TestSub2DBenchmark(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._root = mkdtemp()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    @unittest.skipUnless(has_ffmpeg(), 'needs ffmpeg')
+    def test_run_benchmark(self):
+        record = run_benchmark(jobs=2, frames=6, size='128x72', latency=0, bandwidth=None, profile='preview')
+
+        self.assertListEqual(sorted(record['stages']), ['discovery', 'encode', 'submit_many', 'upload',
+                                                        'version_allocation', 'version_single'])
+        self.assertEqual(record['stages']['encode']['items'], 12)
+        self.assertEqual(record['stages']['submit_many']['count'], 1)
+        self.assertIn('sg.batch', record['spans'])
+
+    def test_results(self):
+        results = os.path.join(self._root, 'results.jsonl')
+        stage = {'count': 1, 'unit': 'frames', 'items': 10, 'total': 2.0, 'mean': 2.0, 'max': 2.0, 'throughput': 5.0}
+        first = {'commit': 'aaa', 'time': 1, 'host': 'box', 'params': {'jobs': 1}, 'stages': {'encode': stage}}
+        other = dict(first, commit='bbb', params={'jobs': 2})
+        second = dict(first, commit='ccc', stages={'encode': dict(stage, mean=1.0)})
+
+        save_result(results, first)
+        save_result(results, other)
+
+        self.assertEqual(previous_result(load_results(results), second)['commit'], 'aaa')
+        self.assertIn('-50.0%', format_table(second, first))
+        self.assertIsNone(previous_result([], second))
+
+
+if __name__ == '__main__':
+    unittest.main()
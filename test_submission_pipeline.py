@@ -0,0 +1,114 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import os
+import shutil
+from tempfile import mkdtemp
+from threading import Thread
+import unittest
+
+from shot_grid_sub_2_dailies.submission_pipeline import SubmissionPipeline
+from shot_grid_sub_2_dailies.workspace import WorkspaceManager
+
+
+class BrokenWorkspaces(object):
+    def create(self, prefix='job'):
+        raise OSError('no space left on device')
+
+
+class FakeAPI(object):
+    def __init__(self, root):
+        self.workspaces = WorkspaceManager(root=os.path.join(root, 'jobs'))
+        self.encode_error = None
+        self.delete_error = None
+        self.version_errors = {}
+        self.deleted = []
+        self.uploads = []
+
+    def _create_versions_batch(self, jobs):
+        for index, job in enumerate(jobs):
+            job['version'] = {'type': 'Version', 'id': 100 + index}
+            if index in self.version_errors:
+                job['version'] = None
+                job['version_error'] = self.version_errors[index]
+
+    def _encode_review_media(self, media_path, output, segments=None, profile=None):
+        if self.encode_error:
+            raise self.encode_error
+
+        with open(output, 'wb') as strm:
+            strm.write(b'movie')
+        return output
+
+    def _upload_version_movie(self, sg_version, movie_path):
+        self.uploads.append(sg_version['id'])
+
+    def _delete_version(self, sg_version):
+        if self.delete_error:
+            raise self.delete_error
+        self.deleted.append(sg_version['id'])
+
+
+class TestSubmissionPipeline(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._root = mkdtemp()
+        self._api = FakeAPI(self._root)
+        self._jobs = [{'task': {'type': 'Task', 'id': 4},
+                       'media_path': 'sh%03d.1001.jpg' % index,
+                       'comment': 'test',
+                       'report': {'version': None, 'error': None}} for index in range(6)]
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    def _run(self, pipeline):
+        # NOTE: run() on a thread so a hang fails the test instead of the whole suite
+        results = []
+        thread = Thread(target=lambda: results.append(pipeline.run(self._jobs)))
+        thread.daemon = True
+        thread.start()
+        thread.join(10)
+
+        self.assertFalse(thread.is_alive(), 'run() did not return')
+        return results[0]
+
+    def test_run(self):
+        reports = self._run(SubmissionPipeline(self._api, encode_workers=2, upload_workers=2, queue_size=1))
+
+        self.assertListEqual([report['version']['id'] for report in reports], list(range(100, 106)))
+        self.assertListEqual(sorted(self._api.uploads), list(range(100, 106)))
+        self.assertListEqual(os.listdir(os.path.join(self._root, 'jobs')), [])
+
+    def test_failed_delete(self):
+        self._api.encode_error = RuntimeError('ffmpeg crashed')
+        self._api.delete_error = ConnectionError('network down')
+
+        reports = self._run(SubmissionPipeline(self._api, encode_workers=2, upload_workers=1, queue_size=1))
+
+        self.assertListEqual([report['error'] for report in reports], ['ffmpeg crashed'] * len(self._jobs))
+        self.assertListEqual(os.listdir(os.path.join(self._root, 'jobs')), [])
+
+    def test_failed_version(self):
+        self._api.version_errors = {1: 'name taken'}
+
+        reports = self._run(SubmissionPipeline(self._api, encode_workers=2, upload_workers=2, queue_size=1))
+
+        self.assertEqual(reports[1]['error'], 'Failed to create Version: name taken')
+        self.assertListEqual([report['error'] for index, report in enumerate(reports) if index != 1], [None] * 5)
+        self.assertNotIn(101, self._api.uploads)
+
+    def test_failed_workspace(self):
+        self._api.workspaces = BrokenWorkspaces()
+
+        reports = self._run(SubmissionPipeline(self._api, encode_workers=2, upload_workers=1, queue_size=1))
+
+        self.assertListEqual([report['error'] for report in reports], ['no space left on device'] * len(self._jobs))
+        self.assertListEqual(sorted(self._api.deleted), list(range(100, 106)))
+
+
+if __name__ == '__main__':
+    unittest.main()
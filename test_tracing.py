@@ -0,0 +1,101 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import json
+import os
+import shutil
+from tempfile import mkdtemp
+import time
+import unittest
+
+from shot_grid_sub_2_dailies.tracing import Tracer, TracedClient
+
+
+class _FakeClient(object):
+    def find(self, entity_type, filters, fields=None):
+        return [{'type': entity_type, 'id': 1}, {'type': entity_type, 'id': 2}]
+
+    def _private(self):
+        return 'untraced'
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._tracer = Tracer(max_spans=3)
+        self._root = mkdtemp()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    def test_span(self):
+        with self._tracer.span('ffmpeg.encode', frames=10) as span:
+            span.set(bytes=100)
+
+        spans = self._tracer.spans()
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0]['name'], 'ffmpeg.encode')
+        self.assertDictEqual(spans[0]['attrs'], {'frames': 10, 'bytes': 100})
+
+    def test_span_error(self):
+        with self.assertRaises(ValueError):
+            with self._tracer.span('sg.find'):
+                raise ValueError('boom')
+
+        self.assertEqual(self._tracer.spans()[0]['attrs']['error'], 'boom')
+
+    def test_record(self):
+        before = time.time()
+        self._tracer.record('sub2d.first_paint', 0.25, target=0.5)
+
+        span = self._tracer.spans()[0]
+        self.assertEqual(span['duration'], 0.25)
+        self.assertDictEqual(span['attrs'], {'target': 0.5})
+        self.assertLess(span['start'], before)
+
+    def test_ring_buffer(self):
+        for i in range(5):
+            with self._tracer.span('step', index=i):
+                pass
+
+        self.assertListEqual([span['attrs']['index'] for span in self._tracer.spans()], [2, 3, 4])
+        self.assertEqual(self._tracer.summary()['step']['count'], 3)
+
+    def test_disabled(self):
+        self._tracer.enabled = False
+        with self._tracer.span('step') as span:
+            span.set(frames=1)
+
+        self.assertListEqual(self._tracer.spans(), [])
+
+    def test_traced_client(self):
+        client = TracedClient(_FakeClient(), self._tracer)
+        self.assertEqual(len(client.find('Shot', [])), 2)
+        self.assertEqual(client._private(), 'untraced')
+
+        spans = self._tracer.spans('sg.find')
+        self.assertEqual(len(spans), 1)
+        self.assertDictEqual(spans[0]['attrs'], {'entity_type': 'Shot', 'rows': 2})
+
+    def test_export(self):
+        with self._tracer.span('sg.find'):
+            pass
+
+        jsonl = os.path.join(self._root, 'trace.jsonl')
+        chrome = os.path.join(self._root, 'trace.json')
+        self._tracer.export(jsonl)
+        self._tracer.export(chrome)
+
+        with open(jsonl) as strm:
+            self.assertEqual(json.loads(strm.readline())['name'], 'sg.find')
+
+        with open(chrome) as strm:
+            events = json.loads(strm.read())['traceEvents']
+        self.assertEqual(events[0]['ph'], 'X')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,323 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import json
+import os
+import shutil
+from tempfile import mkdtemp
+import unittest
+
+from shot_grid_sub_2_dailies.watch_folder import (InotifyWatcher, PathTemplate, PollingWatcher, SubmissionState,
+                                                  WatchFolderDaemon)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeWatcher(object):
+    def wait(self, timeout):
+        return set()
+
+    def close(self):
+        pass
+
+
+class FakeAPI(object):
+    media_formats = {'.jpg': 'image',
+                     '.exr': 'image'}
+
+    def __init__(self):
+        self.submitted = []
+        self.task_queries = 0
+        self.project_errors = []
+        self.submit_errors = []
+
+    def get_projects(self, name=None, active_only=True):
+        if self.project_errors:
+            raise self.project_errors.pop(0)
+        return [{'type': 'Project', 'id': 1, 'name': name}]
+
+    def get_sequences(self, proj_ent, name=None, active_only=True):
+        return [{'type': 'Sequence', 'id': 2, 'code': name}]
+
+    def get_shots(self, seq_ent, name=None, active_only=True, extra_filters=None):
+        return [{'type': 'Shot', 'id': 3, 'code': name, 'name': name}]
+
+    def get_tasks(self, shot_ent, extra_filters=None):
+        self.task_queries += 1
+        content = extra_filters[0][2]
+        if content == 'missing':
+            return []
+
+        return [{'type': 'Task',
+                 'id': 4,
+                 'content': content,
+                 'cached_display_name': content,
+                 'entity': shot_ent,
+                 'project': {'type': 'Project', 'id': 1}}]
+
+    def submit_many(self, jobs):
+        if self.submit_errors:
+            raise self.submit_errors.pop(0)
+        self.submitted.extend(jobs)
+        return [{'job': job, 'version': {'type': 'Version', 'id': 10 + index, 'code': 'v%03d' % index}, 'error': None}
+                for index, job in enumerate(jobs)]
+
+
+def write_frames(folder, frames, prefix='beauty.', ext='.jpg', size=10):
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    for frame in frames:
+        with open(os.path.join(folder, '%s%04d%s' % (prefix, frame, ext)), 'wb') as strm:
+            strm.write(b'0' * size)
+
+
+class TestPathTemplate(unittest.TestCase):
+    def test_parse(self):
+        template = PathTemplate('{project}/{sequence}/{shot}/renders/{task}')
+        self.assertDictEqual(template.parse(os.path.join('PRJ', 'SQ010', 'SH0010', 'renders', 'comp')),
+                             {'project': 'PRJ', 'sequence': 'SQ010', 'shot': 'SH0010', 'task': 'comp'})
+        self.assertIsNone(template.parse('PRJ/SQ010/SH0010/comp'))
+        self.assertIsNone(template.parse('PRJ/SQ010/SH0010/renders/comp/v001'))
+
+    def test_wildcard(self):
+        template = PathTemplate('{shot}/*/{task}')
+        self.assertDictEqual(template.parse('SH0010/v003/comp'), {'shot': 'SH0010', 'task': 'comp'})
+
+    def test_required(self):
+        with self.assertRaises(ValueError):
+            PathTemplate('{project}/{shot}')
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._root = mkdtemp()
+        os.makedirs(os.path.join(self._root, 'SH0010', 'comp'))
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    def _check_watcher(self, watcher):
+        try:
+            self.assertSetEqual(watcher.wait(0), set())
+
+            folder = os.path.join(self._root, 'SH0010', 'comp')
+            write_frames(folder, [1001])
+            self.assertIn(folder, watcher.wait(1))
+
+            new_folder = os.path.join(self._root, 'SH0020', 'light')
+            write_frames(new_folder, [1001])
+            self.assertIn(new_folder, watcher.wait(1))
+        finally:
+            watcher.close()
+
+    def test_polling(self):
+        watcher = PollingWatcher([self._root], interval=0)
+        # NOTE: some file systems only keep second resolution mtimes
+        os.utime(os.path.join(self._root, 'SH0010', 'comp'), (0, 0))
+        watcher.wait(0)
+        self._check_watcher(watcher)
+
+    @unittest.skipUnless(InotifyWatcher.available(), 'inotify is linux only')
+    def test_inotify(self):
+        self._check_watcher(InotifyWatcher([self._root]))
+
+
+class TestWatchFolderDaemon(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._root = mkdtemp()
+        self._state_path = os.path.join(self._root, 'state', 'state.json')
+        self._renders = os.path.join(self._root, 'renders')
+        self._folder = os.path.join(self._renders, 'PRJ', 'SQ010', 'SH0010', 'comp')
+        self._clock = FakeClock()
+        self._api = FakeAPI()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    def _daemon(self, **kwargs):
+        return WatchFolderDaemon(self._api,
+                                 [self._renders],
+                                 '{project}/{sequence}/{shot}/{task}',
+                                 settle=10,
+                                 state_path=self._state_path,
+                                 watcher=kwargs.pop('watcher', FakeWatcher()),
+                                 clock=self._clock,
+                                 **kwargs)
+
+    def test_settle_and_submit(self):
+        daemon = self._daemon()
+        write_frames(self._folder, range(1001, 1005))
+
+        self.assertListEqual(daemon.tick([self._folder]), [])
+
+        # NOTE: first look only takes a snapshot
+        self._clock.now = 10
+        self.assertListEqual(daemon.tick(), [])
+
+        # NOTE: still growing
+        write_frames(self._folder, range(1005, 1009))
+        self._clock.now = 20
+        self.assertListEqual(daemon.tick(), [])
+
+        self._clock.now = 30
+        reports = daemon.tick()
+        self.assertEqual(len(reports), 1)
+
+        job = self._api.submitted[0]
+        self.assertEqual(job['task']['content'], 'comp')
+        self.assertEqual(job['media_path'], os.path.join(self._folder, 'beauty.1001.jpg'))
+        self.assertIn('beauty.', job['comment'])
+
+        with open(self._state_path, 'r') as strm:
+            state = json.loads(strm.read())
+        self.assertEqual(list(state.values())[0]['signature'], [1001, 1008, 8, 80])
+
+        # NOTE: nothing changed, nothing to submit
+        daemon.tick([self._folder])
+        self._clock.now = 50
+        self.assertListEqual(daemon.tick(), [])
+        self.assertEqual(len(self._api.submitted), 1)
+
+    def test_state_survives_restart(self):
+        write_frames(self._folder, range(1001, 1005))
+
+        daemon = self._daemon()
+        daemon.tick([self._folder])
+        self._clock.now = 10
+        daemon.tick()
+        self._clock.now = 20
+        daemon.tick()
+        self.assertEqual(len(self._api.submitted), 1)
+
+        daemon = self._daemon()
+        daemon.tick([self._folder])
+        self._clock.now = 30
+        daemon.tick()
+        self._clock.now = 40
+        daemon.tick()
+        self.assertEqual(len(self._api.submitted), 1)
+
+    def test_unmatched_and_missing_task(self):
+        daemon = self._daemon()
+        unmatched = os.path.join(self._renders, 'PRJ', 'misc')
+        missing = os.path.join(self._renders, 'PRJ', 'SQ010', 'SH0010', 'missing')
+        write_frames(unmatched, [1001])
+        write_frames(missing, [1001])
+
+        daemon.tick([unmatched, missing])
+        self._clock.now = 10
+        daemon.tick()
+        self._clock.now = 20
+        self.assertListEqual(daemon.tick(), [])
+        self.assertListEqual(self._api.submitted, [])
+
+        # NOTE: a failed sequence is only retried once its frames change
+        daemon.tick([missing])
+        self._clock.now = 40
+        daemon.tick()
+        self.assertEqual(self._api.task_queries, 1)
+
+    def test_retry_with_backoff(self):
+        daemon = self._daemon(retry_delay=100)
+        write_frames(self._folder, range(1001, 1005))
+        self._api.project_errors = [ConnectionError('Shotgrid is down')]
+        self._api.submit_errors = [ConnectionError('Shotgrid is down')]
+
+        daemon.tick([self._folder])
+        self._clock.now = 10
+        daemon.tick()
+        self._clock.now = 20
+        self.assertListEqual(daemon.tick(), [])
+
+        # NOTE: waits for the backoff, not for the folder to settle again
+        self._clock.now = 110
+        self.assertListEqual(daemon.tick(), [])
+        self._clock.now = 120
+        self.assertListEqual(daemon.tick(), [])
+        self.assertListEqual(self._api.submitted, [])
+
+        # NOTE: the second failure waits twice as long
+        self._clock.now = 310
+        self.assertListEqual(daemon.tick(), [])
+        self._clock.now = 320
+        self.assertEqual(len(daemon.tick()), 1)
+        self.assertEqual(len(self._api.submitted), 1)
+
+    def test_give_up(self):
+        daemon = self._daemon(retry_delay=0, max_attempts=2)
+        write_frames(self._folder, [1001])
+        self._api.project_errors = [ConnectionError('Shotgrid is down')] * 2
+
+        daemon.tick([self._folder])
+        for now in (10, 20, 30, 40):
+            self._clock.now = now
+            daemon.tick()
+
+        self.assertListEqual(self._api.project_errors, [])
+        self.assertListEqual(self._api.submitted, [])
+
+    def test_run_survives_errors(self):
+        daemon = None
+
+        class StoppingWatcher(FakeWatcher):
+            calls = 0
+
+            def wait(self, timeout):
+                self.calls += 1
+                if self.calls > 1:
+                    daemon.stop()
+                return {'changed'}
+
+        def tick(changed=()):
+            raise RuntimeError('boom')
+
+        watcher = StoppingWatcher()
+        daemon = self._daemon(watcher=watcher)
+        daemon.tick = tick
+        daemon.run(catch_up=False)
+        self.assertEqual(watcher.calls, 2)
+
+    def test_task_cache(self):
+        daemon = self._daemon()
+        write_frames(self._folder, [1001], prefix='beauty.')
+        write_frames(self._folder, [1001], prefix='spec.', ext='.exr')
+
+        daemon.tick([self._folder])
+        self._clock.now = 10
+        daemon.tick()
+        self._clock.now = 20
+        self.assertEqual(len(daemon.tick()), 2)
+        self.assertEqual(self._api.task_queries, 1)
+
+
+class TestSubmissionState(unittest.TestCase):
+    def test_corrupt_file(self):
+        root = mkdtemp()
+        try:
+            path = os.path.join(root, 'state.json')
+            with open(path, 'w') as strm:
+                strm.write('{not json')
+
+            state = SubmissionState(path)
+            self.assertFalse(state.is_submitted('a', [1, 2, 2, 10]))
+            state.mark('a', [1, 2, 2, 10], 5)
+            self.assertTrue(SubmissionState(path).is_submitted('a', [1, 2, 2, 10]))
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    unittest.main()
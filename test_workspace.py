@@ -0,0 +1,66 @@
+'''
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import json
+import os
+import shutil
+from tempfile import mkdtemp
+import unittest
+
+from shot_grid_sub_2_dailies.workspace import JobWorkspace, WorkspaceManager
+
+
+class TestWorkspaceManager(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self._root = mkdtemp()
+        self._manager = WorkspaceManager(root=self._root)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self._root)
+
+    def _set_owner(self, workspace, **values):
+        owner_path = workspace.file(JobWorkspace.owner_file)
+        with open(owner_path, 'r') as strm:
+            owner = json.loads(strm.read())
+
+        owner.update(values)
+        with open(owner_path, 'w') as strm:
+            strm.write(json.dumps(owner))
+
+    def test_unique_and_cleaned_up(self):
+        with self._manager.create() as first, self._manager.create() as second:
+            self.assertNotEqual(first.file('review.mov'), second.file('review.mov'))
+            self.assertTrue(os.path.isdir(first.path))
+
+        self.assertListEqual(os.listdir(self._root), [])
+
+    def test_keep(self):
+        with self._manager.create() as workspace:
+            workspace.keep()
+
+        self.assertTrue(os.path.isdir(workspace.path))
+
+    def test_gc(self):
+        alive = self._manager.create()
+        orphan = self._manager.create()
+        kept = self._manager.create()
+        old = self._manager.create()
+
+        # NOTE: above the largest pid linux hands out
+        self._set_owner(orphan, pid=2 ** 22 + 1)
+        self._set_owner(kept, pid=2 ** 22 + 1, kept=True)
+        self._set_owner(old, created=0)
+
+        removed = self._manager.gc()
+
+        self.assertListEqual(sorted(removed), sorted([orphan.path, old.path]))
+        self.assertTrue(os.path.isdir(alive.path))
+        self.assertTrue(os.path.isdir(kept.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
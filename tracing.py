@@ -0,0 +1,223 @@
+'''
+tracing
+=======
+
+light weight span recorder used to find where a submission spends its time,
+spans are kept in a bounded in memory ring so it is cheap enough to leave on
+and can be dumped as json lines or as a chrome trace (chrome://tracing, perfetto)
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+from collections import deque
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+
+class Span(object):
+    '''
+    a timed section of code, attributes can be added while the span is open
+
+    :example:
+
+    >>> with TRACER.span('ffmpeg.encode', frames=100) as span:
+    ...     span.set(bytes=os.path.getsize(output))
+    '''
+    __slots__ = ('name', 'start', 'duration', 'thread', 'attrs')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.thread = threading.current_thread().name
+        self.start = time.time()
+        self.duration = 0.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {'name': self.name,
+                'start': self.start,
+                'duration': self.duration,
+                'thread': self.thread,
+                'attrs': self.attrs}
+
+
+class _NullSpan(object):
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer(object):
+    '''
+    records spans into a ring buffer
+
+    :param int max_spans: how many spans are kept, the oldest ones are dropped first
+    :param bool enabled: when False span() does nothing
+    '''
+
+    def __init__(self, max_spans=10000, enabled=True):
+        self.enabled = enabled
+        self._spans = deque(maxlen=max_spans)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        '''
+        time the wrapped block, exceptions are recorded on the span and re raised
+
+        :param str name: dotted name of the stage ie "sg.find"
+        '''
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        span = Span(name, attrs)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as msg:
+            span.attrs['error'] = str(msg)
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            # NOTE: deque.append is atomic so no lock is needed
+            self._spans.append(span)
+
+    def record(self, name, duration, **attrs):
+        '''
+        add a span that was timed elsewhere and just ended, ie from the process start to the
+        first paint of the window
+
+        :param str name:
+        :param float duration: seconds
+        '''
+        if not self.enabled:
+            return
+
+        span = Span(name, attrs)
+        span.start -= duration
+        span.duration = duration
+        self._spans.append(span)
+
+    def spans(self, name=None):
+        '''
+        returns the recorded spans as dicts, optionally only the ones with the given name
+
+        :param str name:
+        '''
+        return [span.to_dict() for span in list(self._spans) if name is None or span.name == name]
+
+    def clear(self):
+        self._spans.clear()
+
+    def summary(self):
+        '''
+        returns count, total, mean and max duration per span name
+        '''
+        out = {}
+        for span in list(self._spans):
+            stats = out.setdefault(span.name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += span.duration
+            stats['max'] = max(stats['max'], span.duration)
+
+        for stats in out.values():
+            stats['mean'] = stats['total'] / stats['count']
+
+        return out
+
+    def export_jsonl(self, path):
+        '''
+        write one json object per span
+
+        :param str path:
+        '''
+        with open(path, 'w') as strm:
+            for span in self.spans():
+                strm.write(json.dumps(span, default=str) + '\n')
+
+    def export_chrome_trace(self, path):
+        '''
+        write the spans in the chrome trace event format
+
+        :param str path:
+        '''
+        events = []
+        threads = {}
+        for span in self.spans():
+            tid = threads.setdefault(span['thread'], len(threads) + 1)
+            events.append({'name': span['name'],
+                           'ph': 'X',
+                           'ts': span['start'] * 1e6,
+                           'dur': span['duration'] * 1e6,
+                           'pid': os.getpid(),
+                           'tid': tid,
+                           'args': span['attrs']})
+
+        for thread_name, tid in threads.items():
+            events.append({'name': 'thread_name',
+                           'ph': 'M',
+                           'pid': os.getpid(),
+                           'tid': tid,
+                           'args': {'name': thread_name}})
+
+        with open(path, 'w') as strm:
+            strm.write(json.dumps({'traceEvents': events}, default=str))
+
+    def export(self, path):
+        '''
+        write the spans picking the format from the extension, ".jsonl" for json lines
+        and anything else for a chrome trace
+
+        :param str path:
+        '''
+        if path.lower().endswith('.jsonl'):
+            return self.export_jsonl(path)
+
+        return self.export_chrome_trace(path)
+
+
+class TracedClient(object):
+    '''
+    wraps a Shotgun client so each of its public calls is recorded as a "sg.<method>" span
+
+    :param Shotgun client:
+    :param Tracer tracer:
+    '''
+    traced_methods = ('find', 'find_one', 'summarize', 'create', 'update', 'delete', 'batch',
+                      'upload', 'upload_thumbnail', 'upload_filmstrip_thumbnail')
+
+    def __init__(self, client, tracer):
+        self.client = client
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name not in self.traced_methods:
+            return attr
+
+        def traced(*args, **kwargs):
+            entity_type = args[0] if args and isinstance(args[0], str) else None
+            with self._tracer.span('sg.%s' % name, entity_type=entity_type) as span:
+                if name.startswith('upload') and len(args) > 2 and os.path.isfile(args[2]):
+                    span.set(bytes=os.path.getsize(args[2]))
+
+                result = attr(*args, **kwargs)
+
+                if isinstance(result, list):
+                    span.set(rows=len(result))
+
+                return result
+
+        return traced
+
+
+# NOTE: shared tracer used by Sub2DAPI and FFMpegHelper unless they are given their own
+TRACER = Tracer(enabled=os.environ.get('SUB2D_TRACING', '1') != '0')
@@ -0,0 +1,700 @@
+'''
+watch_folder
+============
+
+headless daemon that submits image sequences as soon as the renders land in the watched
+folders, no artist has to click through the dialog
+
+    python -m shot_grid_sub_2_dailies.watch_folder /renders --template "{project}/{sequence}/{shot}/{task}"
+
+changes are picked up with inotify on linux and by comparing directory mtimes everywhere
+else, either way only directories are watched or stat'ed never single frames so many big
+trees can be watched at once, a directory is only looked at once it stopped changing for
+"settle" seconds and its sequences are only submitted once they stopped growing between
+two of those looks
+
+the folder a sequence lives in is mapped to a Shot and Task with a path template, what
+was submitted is kept in a small json file so restarting the daemon never submits the
+same frames twice
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import json
+from logging import getLogger
+import logging
+import os
+import re
+import select
+import struct
+from tempfile import gettempdir
+from threading import Event
+import time
+
+from shot_grid_sub_2_dailies.ffmpeg_helper.sequence_index import SequenceIndex
+
+
+LOG = getLogger('Sub2D_WatchFolder')
+
+
+class PathTemplate(object):
+    '''
+    maps the folder of a sequence, relative to the watched root, to ShotGrid names
+
+        PathTemplate('{project}/{sequence}/{shot}/{task}').parse('MYPRJ/SQ010/SH0010/comp')
+        {'project': 'MYPRJ', 'sequence': 'SQ010', 'shot': 'SH0010', 'task': 'comp'}
+
+    a field matches a single folder name, "*" matches any single folder and the template
+    has to match the whole relative path, {shot} and {task} are required
+
+    :param str template: folders separated by "/"
+    '''
+    required = ('shot', 'task')
+
+    def __init__(self, template):
+        self.template = template.strip('/')
+        self.fields = re.findall(r'{(\w+)}', self.template)
+
+        for field in self.required:
+            if field not in self.fields:
+                raise ValueError('template %s is missing {%s}' % (template, field))
+
+        pattern = ''
+        for part in re.split(r'({\w+}|\*)', self.template):
+            if part == '*':
+                pattern += r'[^/]+'
+            elif part.startswith('{') and part.endswith('}'):
+                pattern += r'(?P<%s>[^/]+)' % part[1:-1]
+            else:
+                pattern += re.escape(part)
+
+        self._regex = re.compile('^%s$' % pattern)
+
+    def __repr__(self):
+        return '<PathTemplate %s>' % self.template
+
+    def parse(self, relative_dir):
+        '''
+        returns the fields found in the folder or None when it doesn't match
+
+        :param str relative_dir: folder of the sequence relative to the watched root
+        '''
+        match = self._regex.match(relative_dir.replace(os.sep, '/').strip('/'))
+        return match.groupdict() if match else None
+
+
+class PollingWatcher(object):
+    '''
+    finds the changed folders by comparing the directory mtimes, adding, removing or
+    renaming a frame bumps the mtime of its folder so the frames themselves are never stat'ed
+
+    :param [str] roots: folders watched recursively
+    :param float interval: minimum seconds between two walks of the trees
+    '''
+
+    def __init__(self, roots, interval=5.0):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.interval = interval
+
+        self._mtimes = {}
+        self._last_walk = None
+        for root in self.roots:
+            self._walk(root, {})
+
+    def _walk(self, root, changed):
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                if self._mtimes.get(path) != mtime:
+                    self._mtimes[path] = mtime
+                    changed[path] = True
+
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                # NOTE: removed while walking, it is dropped below
+                continue
+
+    def wait(self, timeout):
+        '''
+        returns the folders that changed since the last call, waits up to timeout seconds
+        for the next walk
+
+        :param float timeout:
+        '''
+        if self._last_walk is not None:
+            delay = self.interval - (time.monotonic() - self._last_walk)
+            if delay > timeout:
+                time.sleep(timeout)
+                return set()
+
+            if delay > 0:
+                time.sleep(delay)
+
+        self._last_walk = time.monotonic()
+
+        changed = {}
+        for root in self.roots:
+            self._walk(root, changed)
+
+        for path in [path for path in self._mtimes if not os.path.isdir(path)]:
+            del self._mtimes[path]
+
+        return set(changed)
+
+    def close(self):
+        self._mtimes.clear()
+
+
+class InotifyWatcher(object):
+    '''
+    linux only, the kernel tells which folders changed so nothing is walked after start up,
+    every folder of the trees takes one watch (see /proc/sys/fs/inotify/max_user_watches)
+
+    :param [str] roots: folders watched recursively
+    '''
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    # NOTE: no IN_MODIFY, a frame counts once its writer closed it or renamed it in place
+    watch_mask = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+                  IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+    _EVENT = struct.Struct('iIII')
+    _libc = None
+
+    def __init__(self, roots):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self._paths = {}
+        self._wds = {}
+
+        libc = self._load_libc()
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+        try:
+            for root in self.roots:
+                self._add_tree(root, set())
+        except OSError:
+            self.close()
+            raise
+
+    @classmethod
+    def _load_libc(cls):
+        if cls._libc is None:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            cls._libc = libc
+
+        return cls._libc
+
+    @classmethod
+    def available(cls):
+        if not hasattr(os, 'uname') or os.uname().sysname != 'Linux':
+            return False
+
+        try:
+            return hasattr(cls._load_libc(), 'inotify_init1')
+        except OSError:
+            return False
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.watch_mask)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code in (errno.ENOENT, errno.ENOTDIR):
+                return
+
+            # NOTE: ENOSPC means the max_user_watches limit was hit
+            raise OSError(code, os.strerror(code), path)
+
+        self._paths[wd] = path
+        self._wds[path] = wd
+
+    def _add_tree(self, root, changed):
+        '''
+        watch the folder and everything below it, folders found here are reported as
+        changed since frames may have been written before their watch existed
+        '''
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            if path not in self._wds:
+                self._add_watch(path)
+            changed.add(path)
+
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _forget(self, wd):
+        path = self._paths.pop(wd, None)
+        if path is not None:
+            self._wds.pop(path, None)
+
+    def wait(self, timeout):
+        '''
+        returns the folders that changed, waits up to timeout seconds for the first event
+
+        :param float timeout:
+        '''
+        changed = set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return changed
+
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset + self._EVENT.size <= len(data):
+                wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + self._EVENT.size:offset + self._EVENT.size + length].rstrip(b'\0'))
+                offset += self._EVENT.size + length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    # NOTE: events were dropped, rescan everything we know about
+                    LOG.warning('inotify queue overflow, rescanning the watched folders')
+                    changed.update(self._wds)
+                    continue
+
+                path = self._paths.get(wd)
+                if path is None:
+                    continue
+
+                if mask & self.IN_IGNORED:
+                    self._forget(wd)
+                    continue
+
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        self._add_tree(os.path.join(path, name), changed)
+                    continue
+
+                changed.add(path)
+
+        return changed
+
+    def close(self):
+        if self._fd is not None and self._fd >= 0:
+            os.close(self._fd)
+        self._fd = None
+        self._paths.clear()
+        self._wds.clear()
+
+
+def create_watcher(roots, poll=False, interval=5.0):
+    '''
+    returns an InotifyWatcher when the platform has it and there are enough watches left,
+    a PollingWatcher otherwise
+
+    :param [str] roots: folders watched recursively
+    :param bool poll: always use the PollingWatcher, ie for network shares inotify can't see
+    :param float interval: seconds between the walks of the PollingWatcher
+    '''
+    if not poll and InotifyWatcher.available():
+        try:
+            return InotifyWatcher(roots)
+        except OSError as msg:
+            LOG.warning('inotify unavailable (%s), polling every %ss instead' % (msg, interval))
+
+    return PollingWatcher(roots, interval=interval)
+
+
+class SubmissionState(object):
+    '''
+    what was already submitted, sequences are identified by their path pattern and
+    re-submitted only when their frames change
+
+    :param str path: json file holding the state
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+
+        if os.path.isfile(path):
+            try:
+                with open(path, 'r') as strm:
+                    self._entries = json.loads(strm.read())
+            except (IOError, OSError, ValueError):
+                LOG.warning('could not read %s, starting with an empty state' % path)
+
+    def is_submitted(self, key, signature):
+        entry = self._entries.get(key)
+        return bool(entry) and entry['signature'] == list(signature)
+
+    def mark(self, key, signature, version=None):
+        self._entries[key] = {'signature': list(signature),
+                              'version': version,
+                              'submitted': time.time()}
+        self._save()
+
+    def _save(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        temp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        with open(temp_path, 'w') as strm:
+            strm.write(json.dumps(self._entries, indent=1, sort_keys=True))
+        os.replace(temp_path, self.path)
+
+
+class WatchFolderDaemon(object):
+    '''
+    submits the sequences appearing under the watched roots
+
+    :param Sub2DAPI api: used to find the tasks and to submit
+    :param [str] roots: folders watched recursively
+    :param PathTemplate template: maps the folder of a sequence to its shot and task
+    :param float settle: seconds a folder must stay unchanged before its sequences are looked at
+    :param str state_path: json file of SubmissionState, defaults to sub2d_watch_state.json in the temp folder
+    :param str comment: Version comment, formatted with the template fields and "path"
+    :param str profile: encode profile name, see ffmpeg_helper.encode_profiles
+    :param int min_frames: sequences shorter than this are ignored
+    :param float retry_delay: seconds before a failed submission is tried again, doubled on every attempt
+    :param int max_attempts: failed submissions are only tried again once their frames change after this
+    :param watcher: InotifyWatcher or PollingWatcher, defaults to create_watcher(roots)
+    :param callable clock: time source, only replaced by the tests
+    '''
+    max_retry_delay = 60 * 60.0
+
+    def __init__(self,
+                 api,
+                 roots,
+                 template,
+                 settle=15.0,
+                 state_path=None,
+                 comment='auto submitted from %(path)s',
+                 profile=None,
+                 min_frames=1,
+                 retry_delay=60.0,
+                 max_attempts=8,
+                 watcher=None,
+                 clock=time.monotonic):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.template = template if isinstance(template, PathTemplate) else PathTemplate(template)
+        self.settle = settle
+        self.comment = comment
+        self.profile = profile
+        self.min_frames = min_frames
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+
+        self._api = api
+        self._clock = clock
+        self._watcher = watcher or create_watcher(self.roots)
+        self._state = SubmissionState(state_path or os.path.join(gettempdir(), 'sub2d_watch_state.json'))
+        self._index = SequenceIndex()
+        self._tasks = {}
+        self._pending = {}
+        self._snapshots = {}
+        self._failed = {}
+        self._attempts = {}
+        self._retry_at = {}
+        self._stop = Event()
+
+    def _root_of(self, folder):
+        for root in self.roots:
+            if folder == root or folder.startswith(root + os.sep):
+                return root
+        return None
+
+    def _fields(self, folder):
+        root = self._root_of(folder)
+        if root is None:
+            return None
+
+        return self.template.parse(os.path.relpath(folder, root))
+
+    def _find_one(self, entities, what):
+        if not entities:
+            raise ValueError('could not find %s' % what)
+
+        return entities[0]
+
+    def _resolve_task(self, fields):
+        '''
+        returns the Task the template fields point at, the answers are kept for the life of the daemon
+        '''
+        key = tuple(sorted(fields.items()))
+        if key in self._tasks:
+            return self._tasks[key]
+
+        shot_filters = []
+        if fields.get('project'):
+            project = self._find_one(self._api.get_projects(name=fields['project'], active_only=False),
+                                     'Project %s' % fields['project'])
+            shot_filters.append(['project', 'is', project])
+
+            if fields.get('sequence'):
+                sequence = self._find_one(self._api.get_sequences(project, name=fields['sequence'], active_only=False),
+                                          'Sequence %s' % fields['sequence'])
+                shot_filters.append(['sg_sequence', 'is', sequence])
+
+        shot = self._find_one(self._api.get_shots(None,
+                                                  name=fields['shot'],
+                                                  active_only=False,
+                                                  extra_filters=shot_filters),
+                              'Shot %s' % fields['shot'])
+        task = self._find_one(self._api.get_tasks(shot, extra_filters=[['content', 'is', fields['task']]]),
+                              'Task %s on %s' % (fields['task'], fields['shot']))
+
+        self._tasks[key] = task
+        return task
+
+    def _sequences(self, folder):
+        # NOTE: the index only rescans when the folder mtime changes, frames growing in place don't change it
+        self._index.invalidate(folder)
+        try:
+            sequences = self._index.scan(folder)
+        except OSError:
+            return []
+
+        return [sequence for sequence in sequences
+                if sequence.ext.lower() in self._api.media_formats and sequence.count >= self.min_frames]
+
+    @staticmethod
+    def _signature(sequence):
+        return [sequence.first_frame, sequence.last_frame, sequence.count, sequence.total_bytes]
+
+    def notify(self, folders):
+        '''
+        record that the folders changed, they are looked at once they settle
+
+        :param [str] folders:
+        '''
+        now = self._clock()
+        for folder in folders:
+            if self._root_of(folder) is not None:
+                self._pending[folder] = now
+
+    def _settled_jobs(self, folder):
+        '''
+        returns the jobs of the folder's sequences that did not change since the last look,
+        and True when the folder has to be looked at again
+        '''
+        fields = self._fields(folder)
+        if fields is None:
+            return [], False
+
+        jobs = []
+        recheck = False
+        snapshots = {}
+        for sequence in self._sequences(folder):
+            key = sequence.pattern
+            signature = self._signature(sequence)
+            snapshots[key] = signature
+
+            if self._state.is_submitted(key, signature) or self._failed.get(key) == signature:
+                continue
+
+            if self._snapshots.get(folder, {}).get(key) != signature:
+                # NOTE: first look or still growing
+                recheck = True
+                continue
+
+            jobs.append({'key': key, 'signature': signature, 'sequence': sequence, 'fields': fields, 'folder': folder})
+
+        self._snapshots[folder] = snapshots
+        return jobs, recheck
+
+    def tick(self, changed=()):
+        '''
+        process the changed folders and submit what settled, returns the submission reports
+
+        :param [str] changed: folders reported by the watcher
+        '''
+        self.notify(changed)
+
+        now = self._clock()
+        ready = []
+        for folder, last_change in list(self._pending.items()):
+            if now - last_change < self.settle or self._retry_at.get(folder, now) > now:
+                continue
+
+            jobs, recheck = self._settled_jobs(folder)
+            ready.extend(jobs)
+            self._retry_at.pop(folder, None)
+            if recheck:
+                self._pending[folder] = now
+            else:
+                del self._pending[folder]
+                self._snapshots.pop(folder, None)
+
+        if not ready:
+            return []
+
+        return self._submit(ready)
+
+    def _retry(self, item, msg):
+        '''
+        look at the sequence again later, waiting twice as long after every failed attempt
+        '''
+        attempts = self._attempts.get(item['key'], 0) + 1
+        if attempts >= self.max_attempts:
+            LOG.error('giving up on %s after %d attempts: %s' % (item['key'], attempts, msg))
+            self._attempts.pop(item['key'], None)
+            self._failed[item['key']] = item['signature']
+            return
+
+        self._attempts[item['key']] = attempts
+        delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+        LOG.warning('failed to submit %s, trying again in %ds: %s' % (item['key'], delay, msg))
+
+        # NOTE: the sequence already settled, keep its snapshot so the retry doesn't wait for it again
+        folder = item['folder']
+        now = self._clock()
+        self._snapshots.setdefault(folder, {})[item['key']] = item['signature']
+        self._pending[folder] = now - self.settle
+        self._retry_at[folder] = max(self._retry_at.get(folder, now), now + delay)
+
+    def _submit(self, ready):
+        jobs = []
+        for item in ready:
+            try:
+                task = self._resolve_task(item['fields'])
+            except ValueError as msg:
+                LOG.warning('skipping %s: %s' % (item['key'], msg))
+                self._failed[item['key']] = item['signature']
+                continue
+            except Exception as msg:
+                # NOTE: Shotgrid or the network, worth another try
+                self._retry(item, msg)
+                continue
+
+            comment_fields = dict(item['fields'], path=item['key'])
+            job = {'task': task,
+                   'media_path': item['sequence'].first_path,
+                   'comment': self.comment % comment_fields,
+                   'item': item}
+            if self.profile:
+                job['profile'] = self.profile
+            jobs.append(job)
+
+        if not jobs:
+            return []
+
+        LOG.info('submitting %d sequences' % len(jobs))
+        try:
+            reports = self._api.submit_many(jobs)
+        except Exception as msg:
+            for job in jobs:
+                self._retry(job['item'], msg)
+            return []
+
+        for report in reports:
+            item = report['job']['item']
+            if report['error']:
+                self._retry(item, report['error'])
+                continue
+
+            version = report['version']
+            LOG.info('submitted %s as %s' % (item['key'], version.get('code') if version else None))
+            self._failed.pop(item['key'], None)
+            self._attempts.pop(item['key'], None)
+            self._state.mark(item['key'], item['signature'], version['id'] if version else None)
+
+        return reports
+
+    def run(self, catch_up=True):
+        '''
+        watch and submit until stop is called
+
+        :param bool catch_up: also submit what was rendered while the daemon was not running
+        '''
+        if catch_up:
+            folders = set()
+            for root in self.roots:
+                for folder, _, _ in os.walk(root):
+                    folders.add(folder)
+            self.notify(folders)
+
+        LOG.info('watching %s with %s' % (', '.join(self.roots), type(self._watcher).__name__))
+        while not self._stop.is_set():
+            changed = self._watcher.wait(min(self.settle, 1.0))
+            try:
+                self.tick(changed)
+            except Exception:
+                # NOTE: nobody is watching a headless daemon, log it and keep going
+                LOG.exception('failed to process the watched folders')
+
+        self._watcher.close()
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='submit the image sequences rendered in the watched folders')
+    parser.add_argument('roots', nargs='+', help='folders watched recursively')
+    parser.add_argument('--template', required=True,
+                        help='folders below a root ie "{project}/{sequence}/{shot}/{task}", {shot} and {task} are required')
+    parser.add_argument('--settle', type=float, default=15.0, help='seconds a folder has to stay unchanged')
+    parser.add_argument('--state', help='json file remembering what was submitted')
+    parser.add_argument('--comment', default='auto submitted from %(path)s')
+    parser.add_argument('--profile', help='encode profile, see ffmpeg_helper.encode_profiles')
+    parser.add_argument('--poll', action='store_true', help='poll the folders instead of using inotify')
+    parser.add_argument('--interval', type=float, default=5.0, help='seconds between two polls')
+    parser.add_argument('--no-catch-up', action='store_true', help='ignore what is already on disk')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    # NOTE: imported here so the watchers can be used without shotgun_api3
+    from shot_grid_sub_2_dailies.sub2d_api import Sub2DAPI
+
+    api = Sub2DAPI()
+    api.enable_store()
+    api.enable_encode_cache(root=os.environ.get('SUB2D_ENCODE_CACHE'))
+    api.enable_exr_predecode()
+
+    daemon = WatchFolderDaemon(api,
+                               args.roots,
+                               args.template,
+                               settle=args.settle,
+                               state_path=args.state,
+                               comment=args.comment,
+                               profile=args.profile,
+                               watcher=create_watcher(args.roots, poll=args.poll, interval=args.interval))
+    try:
+        daemon.run(catch_up=not args.no_catch_up)
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,182 @@
+'''
+workspace
+=========
+
+per job scratch folders, every submission renders into its own folder so jobs running
+side by side (two windows, submit_many) never share a file name, the folders are
+removed when the job is done and folders left behind by crashed processes are collected
+the next time the tool starts
+
+Created on Oct 18, 2026
+
+@author: carlos.anguiano
+'''
+import json
+from logging import getLogger
+import os
+import shutil
+import socket
+from tempfile import gettempdir
+import time
+import uuid
+
+
+def _pid_alive(pid):
+    '''
+    returns True when a process with the given id is running on this machine
+
+    :param int pid:
+    '''
+    if os.name == 'nt':
+        import ctypes
+
+        # NOTE: os.kill on windows terminates the process so we ask the kernel instead
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+class JobWorkspace(object):
+    '''
+    scratch folder of a single job, use it as a context manager to have it removed on exit
+
+    :param str path: folder of the workspace, created if it doesn't exist
+    '''
+    owner_file = 'owner.json'
+
+    def __init__(self, path):
+        self.path = path
+        self._kept = False
+
+        os.makedirs(path)
+        self._write_owner()
+
+    def __repr__(self):
+        return '<JobWorkspace %s>' % self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self._kept:
+            self.cleanup()
+
+    def _write_owner(self):
+        owner = {'pid': os.getpid(),
+                 'host': socket.gethostname(),
+                 'created': time.time(),
+                 'kept': self._kept}
+
+        with open(os.path.join(self.path, self.owner_file), 'w') as strm:
+            strm.write(json.dumps(owner))
+
+    def file(self, name):
+        '''
+        returns the path of a file inside the workspace
+
+        :param str name:
+        '''
+        return os.path.join(self.path, name)
+
+    def keep(self):
+        '''
+        keep the workspace after the job, ie to resume an interrupted upload of the movie in it,
+        kept workspaces are only collected once they are older than WorkspaceManager.max_age
+        '''
+        self._kept = True
+        self._write_owner()
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class WorkspaceManager(object):
+    '''
+    hands out job workspaces under a common root
+
+    :param str root: parent folder of the workspaces, defaults to sub2d_jobs in the temp folder
+    :param bool in_memory: put the workspaces on a ram backed file system (/dev/shm) when there is one
+    :param float max_age: seconds after which a workspace is collected even if its owner looks alive
+    '''
+    ram_roots = ('/dev/shm',)
+
+    def __init__(self, root=None, in_memory=False, max_age=2 * 24 * 60 * 60):
+        self.max_age = max_age
+        self.root = root or self._default_root(in_memory)
+        self.log = getLogger('Sub2D_Workspace')
+
+    @classmethod
+    def _default_root(cls, in_memory):
+        if in_memory:
+            for ram_root in cls.ram_roots:
+                if os.path.isdir(ram_root) and os.access(ram_root, os.W_OK):
+                    return os.path.join(ram_root, 'sub2d_jobs')
+
+        return os.path.join(gettempdir(), 'sub2d_jobs')
+
+    def create(self, prefix='job'):
+        '''
+        returns a new empty JobWorkspace
+
+        :param str prefix: start of the folder name, only used to tell the jobs apart
+        '''
+        return JobWorkspace(os.path.join(self.root, '%s_%s' % (prefix, uuid.uuid4().hex)))
+
+    def _is_orphan(self, path, now):
+        try:
+            with open(os.path.join(path, JobWorkspace.owner_file), 'r') as strm:
+                owner = json.loads(strm.read())
+        except (IOError, OSError, ValueError):
+            # NOTE: the owner file is written right after the folder, give a job being created a moment
+            return now - os.path.getmtime(path) > 60
+
+        if now - owner['created'] > self.max_age:
+            return True
+
+        if owner.get('kept') or owner['host'] != socket.gethostname():
+            return False
+
+        return not _pid_alive(owner['pid'])
+
+    def gc(self):
+        '''
+        remove the workspaces whose process is gone and the ones older than max_age
+
+        :return: the removed folders
+        '''
+        removed = []
+        if not os.path.isdir(self.root):
+            return removed
+
+        now = time.time()
+        with os.scandir(self.root) as items:
+            for item in items:
+                if not item.is_dir():
+                    continue
+
+                try:
+                    orphan = self._is_orphan(item.path, now)
+                except OSError:
+                    continue
+
+                if orphan:
+                    self.log.info('removing orphaned workspace %s' % item.path)
+                    shutil.rmtree(item.path, ignore_errors=True)
+                    removed.append(item.path)
+
+        return removed